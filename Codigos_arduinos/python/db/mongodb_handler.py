@@ -4,8 +4,12 @@ import threading
 import numpy as np
 import csv
 import os
+import sys
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from storage import sample_store, ring_file
+
 class SensorBuffer:
     """Maneja el buffer de datos del sensor con interpolación con historial y detección de fallos"""
     
@@ -19,6 +23,7 @@ class SensorBuffer:
         self.current_hour = None  # Hora actual del buffer (ej: 15 para las 15:xx)
         self.last_check_time = datetime.now()
         self.history = []  # Historial completo para interpolación avanzada
+        self.history_hours = 24  # Ventana de historial leída del anillo reciente
     
     def add_sample(self, temperature, humidity, pressure):
         """Agrega una muestra al buffer y retorna si necesita procesar"""
@@ -98,6 +103,76 @@ class SensorBuffer:
         
         return history
     
+    def load_history_from_store(self, store_dir=sample_store.STORE_DIR):
+        """
+        Carga las últimas self.history_hours horas del sensor desde el almacén
+        columnar (solo las particiones del rango, sus columnas y su fuente)
+        """
+        try:
+            data = sample_store.read_samples(
+                start=datetime.now() - timedelta(hours=self.history_hours),
+                columns=['epoch', 'temperature', 'humidity', 'pressure'],
+                sources=[self.source_name],
+                store_dir=store_dir
+            )
+        except Exception as e:
+            print(f"[WARN] [{self.source_name.upper()}] Error cargando historial del almacén: {e}")
+            return []
+        
+        return [
+            {
+                'temperature': t,
+                'humidity': h,
+                'pressure': p,
+                'timestamp': sample_store.from_epoch(epoch)
+            }
+            for epoch, t, h, p in zip(
+                data['epoch'].tolist(),
+                data['temperature'].tolist(),
+                data['humidity'].tolist(),
+                data['pressure'].tolist()
+            )
+        ]
+    
+    def load_history_from_ring(self, path=ring_file.RING_FILENAME):
+        """
+        Carga solo las últimas self.history_hours horas desde el archivo anillo
+        (memmap: sin parsear y sin leer el historial completo)
+        """
+        try:
+            ring = ring_file.open_reader(path)
+            if ring is None:
+                return None
+            start_epoch = sample_store.to_epoch(datetime.now() - timedelta(hours=self.history_hours))
+            records = ring_file.filter_source(ring.since(start_epoch), self.source_name)
+        except Exception as e:
+            print(f"[WARN] [{self.source_name.upper()}] Error leyendo anillo reciente: {e}")
+            return None
+        
+        return [
+            {
+                'temperature': t,
+                'humidity': h,
+                'pressure': p,
+                'timestamp': sample_store.from_epoch(epoch)
+            }
+            for epoch, t, h, p in zip(
+                records['epoch'].tolist(),
+                records['temperature'].tolist(),
+                records['humidity'].tolist(),
+                records['pressure'].tolist()
+            )
+        ]
+    
+    def load_history(self, csv_path):
+        """Historial del sensor: anillo reciente, almacén columnar o CSV antiguo (en ese orden)"""
+        history = self.load_history_from_ring()
+        if history:
+            return history
+        if sample_store.store_exists():
+            return self.load_history_from_store()
+        return self.load_history_from_csv(csv_path)
+    
     def interpolate_missing_samples(self, csv_path):
         """Interpola muestras faltantes usando regresión lineal con TODO el historial
         IMPORTANTE: Esta función DEBE llamarse desde dentro de un 'with self.lock:' existente
@@ -108,8 +183,8 @@ class SensorBuffer:
         missing_count = self.max_samples - len(self.buffer)
         print(f"[WARN] [{self.source_name.upper()}] Faltan {missing_count} muestras, aplicando interpolación con historial completo...")
         
-        # Cargar historial desde CSV
-        history = self.load_history_from_csv(csv_path)
+        # Cargar historial (almacén columnar o CSV antiguo)
+        history = self.load_history(csv_path)
         
         # Combinar historial con buffer actual
         all_data = history + self.buffer
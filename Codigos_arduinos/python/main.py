@@ -101,10 +101,10 @@ async def main():
     print("Configuración del sistema:")
     print("  WIRED: Puerto Serial /dev/ttyACM0")
     print("  WIRELESS: Bluetooth (ArduinoEsclavo)")
-    print("  CSV Local: data/sensor_data.csv")
+    print("  Almacén local: data/samples/ (columnar por día)")
     print("  MongoDB: Promedios horarios (12 muestras/hora)")
     print("  Muestreo: Cada 5 minutos (xx:00, xx:05, xx:10, ..., xx:55)")
-    print("  Interpolación: Con historial completo del CSV")
+    print("  Interpolación: Con historial completo del almacén local")
     print("  Mínimo requerido: 70% de datos (9 de 12 muestras)")
     print("  Auto-reintento: Activado")
     print("="*70)
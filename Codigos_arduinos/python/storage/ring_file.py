@@ -0,0 +1,154 @@
+"""
+Archivo anillo binario de registros fijos para leer la ventana reciente sin parsear.
+
+Lo escribe el pipeline de adquisición (wired/wireless) junto al almacén por día,
+y lo leen predecir_futuro y SensorBuffer con np.memmap, incluso desde otro
+proceso. Formato (little-endian):
+
+    cabecera (64 bytes): magic 'CLIMARNG', version, capacity, cursor
+    registros: 2 * capacity × (epoch int64, source uint32, T, H, P float32)
+
+'cursor' es el total de registros escritos (nunca retrocede). Cada registro se
+escribe en la posición i y en su espejo i + capacity, de modo que cualquier
+ventana de hasta 'capacity' registros es un slice contiguo del memmap: una vista,
+sin copias, aunque la ventana cruce el final del anillo. El writer actualiza
+el cursor después de escribir el registro, así un lector nunca ve uno a medias.
+"""
+import os
+import threading
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.join(SCRIPT_DIR, '..', '..')
+RING_FILENAME = os.path.join(PROJECT_DIR, 'data', 'recent_samples.ring')
+
+MAGIC = b'CLIMARNG'
+VERSION = 1
+# ~14 días con 2 fuentes cada 5 minutos (2 * 12 * 24 * 14 = 8064)
+DEFAULT_CAPACITY = 8192
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('capacity', '<u4'),
+    ('cursor', '<u8'),
+    ('reserved', 'V40'),
+])
+RECORD_DTYPE = np.dtype([
+    ('epoch', '<i8'),
+    ('source', '<u4'),
+    ('temperature', '<f4'),
+    ('humidity', '<f4'),
+    ('pressure', '<f4'),
+])
+SOURCES = ['unknown', 'wired', 'wireless']
+
+
+def source_code(source):
+    return SOURCES.index(source) if source in SOURCES else 0
+
+
+class RingFile:
+    """Acceso por memmap al archivo anillo (lectura o escritura)"""
+
+    def __init__(self, path=RING_FILENAME, writable=False, capacity=DEFAULT_CAPACITY):
+        self.path = path
+        self.writable = writable
+        self.lock = threading.Lock()
+
+        if writable and not os.path.exists(path):
+            self._create(path, capacity)
+        mode = 'r+' if writable else 'r'
+
+        self.header = np.memmap(path, dtype=HEADER_DTYPE, mode=mode, offset=0, shape=(1,))
+        if bytes(self.header['magic'][0]) != MAGIC:
+            raise ValueError(f"{path} no es un archivo anillo válido")
+        self.capacity = int(self.header['capacity'][0])
+        self.records = np.memmap(
+            path, dtype=RECORD_DTYPE, mode=mode,
+            offset=HEADER_DTYPE.itemsize, shape=(2 * self.capacity,)
+        )
+
+    @staticmethod
+    def _create(path, capacity):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header['magic'] = MAGIC
+        header['version'] = VERSION
+        header['capacity'] = capacity
+        with open(tmp_path, 'wb') as f:
+            header.tofile(f)
+            f.truncate(HEADER_DTYPE.itemsize + 2 * capacity * RECORD_DTYPE.itemsize)
+        os.replace(tmp_path, path)
+
+    @property
+    def cursor(self):
+        return int(self.header['cursor'][0])
+
+    def __len__(self):
+        return min(self.cursor, self.capacity)
+
+    def append(self, epoch, source, temperature, humidity, pressure):
+        """Escribe un registro (registro + espejo, luego el cursor)"""
+        if not self.writable:
+            raise IOError("RingFile abierto en modo lectura")
+        record = (int(epoch), source_code(source), temperature, humidity, pressure)
+        with self.lock:
+            cursor = self.cursor
+            i = cursor % self.capacity
+            self.records[i] = record
+            self.records[i + self.capacity] = record
+            self.header['cursor'] = cursor + 1
+
+    def flush(self):
+        if self.writable:
+            self.records.flush()
+            self.header.flush()
+
+    def recent(self, n):
+        """Vista (sin copia) de los últimos n registros en orden cronológico"""
+        cursor = self.cursor
+        count = min(n, cursor, self.capacity)
+        end = cursor % self.capacity
+        if end < count:
+            end += self.capacity
+        return self.records[end - count:end]
+
+    def since(self, epoch_start):
+        """Vista de los registros con epoch >= epoch_start (asume escritura en orden temporal)"""
+        window = self.recent(self.capacity)
+        start = np.searchsorted(window['epoch'], epoch_start, side='left')
+        return window[start:]
+
+    def close(self):
+        self.flush()
+        # np.memmap libera el mmap al perder la última referencia
+        self.header = None
+        self.records = None
+
+
+def open_reader(path=RING_FILENAME):
+    """Abre el anillo solo lectura; None si aún no existe"""
+    if not os.path.exists(path):
+        return None
+    return RingFile(path, writable=False)
+
+
+def filter_source(records, source):
+    """Filtra registros por fuente (esto sí copia: máscara booleana)"""
+    return records[records['source'] == source_code(source)]
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def append_sample(epoch, source, temperature, humidity, pressure, path=RING_FILENAME):
+    """Agrega una muestra usando un writer compartido por el proceso"""
+    global _writer
+    with _writer_lock:
+        if _writer is None or _writer.path != path:
+            _writer = RingFile(path, writable=True)
+    _writer.append(epoch, source, temperature, humidity, pressure)
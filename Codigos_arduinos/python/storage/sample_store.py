@@ -0,0 +1,526 @@
+"""
+Almacén columnar de muestras crudas, particionado por día.
+
+Reemplaza al CSV único data/sensor_data.csv. Estructura en disco:
+
+    data/samples/
+    ├── manifest.json              # esquema, fuentes y resumen de particiones
+    └── 2025-10-17/
+        ├── epoch.bin              # int64   segundos (reloj local, sin zona)
+        ├── source.bin             # uint8   índice en manifest['sources']
+        ├── temperature.bin        # float32 °C
+        ├── humidity.bin           # float32 %
+        └── pressure.bin           # float32 hPa
+
+Cada columna es un arreglo NumPy crudo al que solo se le hace append, así que
+los lectores cargan únicamente las particiones (días) y columnas que necesitan
+con np.fromfile, sin parsear texto.
+
+Uso por línea de comandos:
+    python storage/sample_store.py import [ruta.csv]     # convierte el CSV histórico
+    python storage/sample_store.py export salida.csv     # exporta en formato CSV antiguo
+    python storage/sample_store.py drop 2025-01-01       # retención: borra días anteriores
+    python storage/sample_store.py info
+"""
+import argparse
+import calendar
+import csv
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.join(SCRIPT_DIR, '..', '..')
+STORE_DIR = os.path.join(PROJECT_DIR, 'data', 'samples')
+CSV_FILENAME = os.path.join(PROJECT_DIR, 'data', 'sensor_data.csv')
+
+MANIFEST_NAME = 'manifest.json'
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+SECONDS_PER_DAY = 86400
+
+# Columnas y dtype en disco (orden = orden de la exportación CSV)
+COLUMNS = {
+    'epoch': '<i8',
+    'source': 'u1',
+    'temperature': '<f4',
+    'humidity': '<f4',
+    'pressure': '<f4',
+}
+DEFAULT_SOURCES = ['wired', 'wireless']
+CSV_HEADER = ['timestamp', 'source', 'temperature', 'humidity', 'pressure']
+
+# Nombres alternativos aceptados al importar CSV (los de la app Flask / modelos/)
+CSV_ALIASES = {
+    'source': ['source', 'tipo'],
+    'temperature': ['temperature', 'temperatura'],
+    'humidity': ['humidity', 'humedad'],
+    'pressure': ['pressure', 'presion'],
+}
+
+# wired y wireless escriben desde hilos distintos del mismo proceso
+_write_lock = threading.Lock()
+
+
+def to_epoch(timestamp):
+    """Convierte datetime o texto 'YYYY-mm-dd HH:MM:SS' a segundos (reloj local sin zona)"""
+    if isinstance(timestamp, str):
+        timestamp = datetime.strptime(timestamp[:19], TIMESTAMP_FORMAT)
+    return calendar.timegm(timestamp.timetuple())
+
+
+def from_epoch(epoch):
+    """Inverso de to_epoch: segundos -> datetime naive"""
+    return datetime(1970, 1, 1) + timedelta(seconds=int(epoch))
+
+
+def partition_name(epoch):
+    """Nombre de la partición (día) que contiene el instante dado"""
+    return from_epoch(epoch - epoch % SECONDS_PER_DAY).strftime('%Y-%m-%d')
+
+
+def store_exists(store_dir=STORE_DIR):
+    return os.path.exists(os.path.join(store_dir, MANIFEST_NAME))
+
+
+def load_manifest(store_dir=STORE_DIR):
+    """Lee el manifest; si el almacén no existe devuelve uno vacío"""
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {
+            'version': 1,
+            'columns': dict(COLUMNS),
+            'sources': list(DEFAULT_SOURCES),
+            'partitions': {},
+        }
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest, store_dir):
+    """Escribe el manifest de forma atómica (tmp + replace)"""
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def drop_partitions(before, store_dir=STORE_DIR):
+    """
+    Elimina las particiones (días) completamente anteriores a 'before'.
+    Primero se quitan del manifest (los lectores dejan de verlas) y luego se
+    borran sus archivos. Devuelve los nombres eliminados.
+    """
+    before_epoch = to_epoch(before)
+    with _write_lock:
+        manifest = load_manifest(store_dir)
+        names = [name for name, info in sorted(manifest['partitions'].items())
+                 if info['max_epoch'] < before_epoch]
+        if not names:
+            return []
+        for name in names:
+            del manifest['partitions'][name]
+        _save_manifest(manifest, store_dir)
+    for name in names:
+        part_dir = os.path.join(store_dir, name)
+        for col in COLUMNS:
+            path = os.path.join(part_dir, col + '.bin')
+            if os.path.exists(path):
+                os.remove(path)
+        if os.path.isdir(part_dir) and not os.listdir(part_dir):
+            os.rmdir(part_dir)
+    return names
+
+
+def _partition_rows(part_dir, columns):
+    """Filas completas de una partición = mínimo entre sus columnas"""
+    rows = None
+    for col, dtype in columns.items():
+        path = os.path.join(part_dir, col + '.bin')
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        col_rows = size // np.dtype(dtype).itemsize
+        rows = col_rows if rows is None else min(rows, col_rows)
+    return rows or 0
+
+
+def _repair_partition(part_dir, columns, rows):
+    """Recorta columnas más largas que 'rows' (append interrumpido a medias)"""
+    for col, dtype in columns.items():
+        path = os.path.join(part_dir, col + '.bin')
+        expected = rows * np.dtype(dtype).itemsize
+        if os.path.exists(path) and os.path.getsize(path) > expected:
+            with open(path, 'r+b') as f:
+                f.truncate(expected)
+
+
+def _source_code(manifest, source):
+    sources = manifest['sources']
+    if source not in sources:
+        sources.append(source)
+    return sources.index(source)
+
+
+def append_samples(timestamps, sources, temperatures, humidities, pressures, store_dir=STORE_DIR):
+    """
+    Agrega un lote de muestras al almacén.
+
+    Args:
+        timestamps: datetimes, textos 'YYYY-mm-dd HH:MM:SS' o epochs (int)
+        sources: nombre de la fuente de cada muestra ('wired', 'wireless', ...)
+        temperatures, humidities, pressures: valores numéricos (None -> NaN)
+
+    Returns:
+        Número de muestras escritas
+    """
+    epochs = np.array(
+        [t if isinstance(t, (int, np.integer)) else to_epoch(t) for t in timestamps],
+        dtype=np.int64
+    )
+    if len(epochs) == 0:
+        return 0
+
+    with _write_lock:
+        os.makedirs(store_dir, exist_ok=True)
+        manifest = load_manifest(store_dir)
+        columns = manifest['columns']
+        values = {
+            'epoch': epochs,
+            'source': np.array([_source_code(manifest, s) for s in sources], dtype=np.uint8),
+            'temperature': np.array(temperatures, dtype=np.float64),
+            'humidity': np.array(humidities, dtype=np.float64),
+            'pressure': np.array(pressures, dtype=np.float64),
+        }
+
+        days = epochs // SECONDS_PER_DAY
+        for day in np.unique(days):
+            mask = days == day
+            name = partition_name(int(day) * SECONDS_PER_DAY)
+            part_dir = os.path.join(store_dir, name)
+            os.makedirs(part_dir, exist_ok=True)
+
+            rows = _partition_rows(part_dir, columns)
+            _repair_partition(part_dir, columns, rows)
+            for col, dtype in columns.items():
+                with open(os.path.join(part_dir, col + '.bin'), 'ab') as f:
+                    values[col][mask].astype(dtype).tofile(f)
+
+            day_epochs = epochs[mask]
+            info = manifest['partitions'].get(name)
+            if info is None:
+                info = {'min_epoch': int(day_epochs.min()), 'max_epoch': int(day_epochs.max())}
+            info['rows'] = rows + int(mask.sum())
+            info['min_epoch'] = min(info['min_epoch'], int(day_epochs.min()))
+            info['max_epoch'] = max(info['max_epoch'], int(day_epochs.max()))
+            manifest['partitions'][name] = info
+
+        # drop_partitions puede correr en otro proceso (retención de la app):
+        # no resucitar en el manifest particiones cuyo directorio ya no existe
+        manifest['partitions'] = {
+            name: info for name, info in manifest['partitions'].items()
+            if os.path.isdir(os.path.join(store_dir, name))
+        }
+        _save_manifest(manifest, store_dir)
+
+    return len(epochs)
+
+
+def append_sample(timestamp, source, temperature, humidity, pressure, store_dir=STORE_DIR):
+    """Agrega una sola muestra (usado por wired/wireless)"""
+    return append_samples([timestamp], [source], [temperature], [humidity], [pressure], store_dir=store_dir)
+
+
+def list_partitions(start=None, end=None, store_dir=STORE_DIR):
+    """Particiones (días) que pueden contener datos en [start, end], en orden cronológico"""
+    manifest = load_manifest(store_dir)
+    start_epoch = to_epoch(start) if start is not None else None
+    end_epoch = to_epoch(end) if end is not None else None
+    names = []
+    for name in sorted(manifest['partitions']):
+        info = manifest['partitions'][name]
+        if start_epoch is not None and info['max_epoch'] < start_epoch:
+            continue
+        if end_epoch is not None and info['min_epoch'] > end_epoch:
+            continue
+        names.append(name)
+    return names
+
+
+def _empty(columns, dtypes):
+    return {col: np.empty(0, dtype=dtypes[col]) for col in columns}
+
+
+def _read_partition(part_dir, columns, dtypes):
+    """Columnas de una partición; vacía si drop_partitions la borró después de leer el manifiesto"""
+    rows = _partition_rows(part_dir, dtypes)
+    if rows == 0:
+        return _empty(columns, dtypes)
+    try:
+        return {
+            col: np.fromfile(os.path.join(part_dir, col + '.bin'), dtype=dtypes[col], count=rows)
+            for col in columns
+        }
+    except FileNotFoundError:
+        return _empty(columns, dtypes)
+
+
+def read_partition_rows(name, start_row=0, stop_row=None, columns=None, store_dir=STORE_DIR):
+    """
+    Filas [start_row, stop_row) de una partición, en orden de llegada.
+    Como las columnas solo crecen por append, un lector que recuerda cuántas
+    filas ya procesó (p. ej. la sincronización a la DB) lee solo lo nuevo,
+    incluidas muestras con epoch anterior a las ya vistas.
+    """
+    dtypes = load_manifest(store_dir)['columns']
+    columns = list(columns or dtypes.keys())
+    part_dir = os.path.join(store_dir, name)
+    rows = _partition_rows(part_dir, dtypes)
+    stop_row = rows if stop_row is None else min(stop_row, rows)
+    count = max(stop_row - start_row, 0)
+    if count == 0:
+        return _empty(columns, dtypes)
+    data = {}
+    try:
+        for col in columns:
+            dtype = np.dtype(dtypes[col])
+            data[col] = np.fromfile(os.path.join(part_dir, col + '.bin'), dtype=dtype,
+                                    count=count, offset=start_row * dtype.itemsize)
+    except FileNotFoundError:
+        return _empty(columns, dtypes)  # borrada por drop_partitions mientras se leía
+    return data
+
+
+def _filter(data, start_epoch=None, end_epoch=None, source_codes=None):
+    mask = None
+    if start_epoch is not None:
+        mask = data['epoch'] >= start_epoch
+    if end_epoch is not None:
+        cond = data['epoch'] <= end_epoch
+        mask = cond if mask is None else mask & cond
+    if source_codes is not None:
+        cond = np.isin(data['source'], source_codes)
+        mask = cond if mask is None else mask & cond
+    if mask is None:
+        return data
+    return {col: arr[mask] for col, arr in data.items()}
+
+
+def iter_partitions(start=None, end=None, columns=None, sources=None, store_dir=STORE_DIR):
+    """
+    Recorre las particiones en [start, end] cargando solo las columnas pedidas.
+    Genera un dict columna -> np.ndarray por día (memoria acotada a un día).
+    """
+    manifest = load_manifest(store_dir)
+    dtypes = manifest['columns']
+    columns = list(columns or dtypes.keys())
+    start_epoch = to_epoch(start) if start is not None else None
+    end_epoch = to_epoch(end) if end is not None else None
+    source_codes = None
+    if sources is not None:
+        source_codes = [manifest['sources'].index(s) for s in sources if s in manifest['sources']]
+
+    needed = list(columns)
+    if (start_epoch is not None or end_epoch is not None) and 'epoch' not in needed:
+        needed.append('epoch')
+    if source_codes is not None and 'source' not in needed:
+        needed.append('source')
+
+    for name in list_partitions(start, end, store_dir=store_dir):
+        data = _read_partition(os.path.join(store_dir, name), needed, dtypes)
+        data = _filter(data, start_epoch, end_epoch, source_codes)
+        yield {col: data[col] for col in columns}
+
+
+def read_samples(start=None, end=None, columns=None, sources=None, store_dir=STORE_DIR):
+    """
+    Lee muestras del almacén cargando solo las particiones y columnas necesarias.
+
+    Args:
+        start, end: límites inclusivos (datetime o texto); None = sin límite
+        columns: columnas a devolver (default: todas)
+        sources: lista de fuentes a incluir (default: todas)
+
+    Returns:
+        dict columna -> np.ndarray ('source' como código, ver load_manifest()['sources'])
+    """
+    dtypes = load_manifest(store_dir)['columns']
+    columns = list(columns or dtypes.keys())
+    chunks = list(iter_partitions(start, end, columns, sources, store_dir=store_dir))
+    if not chunks:
+        return _empty(columns, dtypes)
+    return {col: np.concatenate([c[col] for c in chunks]) for col in columns}
+
+
+def read_tail(n, columns=None, sources=None, store_dir=STORE_DIR):
+    """Últimas n muestras, leyendo particiones desde la más reciente hacia atrás"""
+    manifest = load_manifest(store_dir)
+    dtypes = manifest['columns']
+    columns = list(columns or dtypes.keys())
+    source_codes = None
+    needed = list(columns)
+    if sources is not None:
+        source_codes = [manifest['sources'].index(s) for s in sources if s in manifest['sources']]
+        if 'source' not in needed:
+            needed.append('source')
+
+    chunks = []
+    total = 0
+    for name in sorted(manifest['partitions'], reverse=True):
+        data = _filter(_read_partition(os.path.join(store_dir, name), needed, dtypes),
+                       source_codes=source_codes)
+        chunks.insert(0, data)
+        total += len(data[needed[0]])
+        if total >= n:
+            break
+
+    if not chunks:
+        return _empty(columns, dtypes)
+    return {col: np.concatenate([c[col] for c in chunks])[-n:] for col in columns}
+
+
+def to_dataframe(data, store_dir=STORE_DIR):
+    """Convierte el dict de read_samples/read_tail a DataFrame (requiere pandas)"""
+    import pandas as pd
+
+    df = pd.DataFrame({col: arr for col, arr in data.items() if col not in ('epoch', 'source')})
+    if 'epoch' in data:
+        df.insert(0, 'timestamp', pd.to_datetime(data['epoch'], unit='s'))
+    if 'source' in data:
+        sources = load_manifest(store_dir)['sources']
+        df.insert(1 if 'epoch' in data else 0, 'source',
+                  pd.Categorical.from_codes(data['source'].astype(np.int64), categories=sources))
+    return df
+
+
+def read_dataframe(start=None, end=None, columns=None, sources=None, store_dir=STORE_DIR):
+    """read_samples() como DataFrame con 'timestamp' datetime y 'source' categórico"""
+    return to_dataframe(read_samples(start, end, columns, sources, store_dir=store_dir), store_dir=store_dir)
+
+
+def _pick_column(fieldnames, key):
+    for alias in CSV_ALIASES.get(key, [key]):
+        if alias in fieldnames:
+            return alias
+    return None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+def import_csv(csv_path=CSV_FILENAME, store_dir=STORE_DIR, batch_size=10000, default_source='unknown'):
+    """
+    Convierte un CSV de muestras (formato wired/wireless o de modelos/) al almacén.
+    Lee en streaming y escribe por lotes, sin cargar el archivo completo.
+
+    Returns:
+        Número de muestras importadas
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"CSV no encontrado en {csv_path}")
+
+    total = 0
+    with open(csv_path, 'r', newline='') as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames or []
+        if 'timestamp' not in fieldnames:
+            raise ValueError("CSV debe contener columna 'timestamp'")
+        cols = {key: _pick_column(fieldnames, key) for key in CSV_ALIASES}
+        missing = [key for key in ('temperature', 'humidity') if cols[key] is None]
+        if missing:
+            raise ValueError(f"Columnas requeridas no encontradas en CSV: {missing}")
+
+        batch = ([], [], [], [], [])
+        for row in reader:
+            try:
+                epoch = to_epoch(row['timestamp'])
+            except (TypeError, ValueError):
+                continue  # fila corrupta / timestamp inválido
+            batch[0].append(epoch)
+            batch[1].append((row.get(cols['source']) if cols['source'] else None) or default_source)
+            batch[2].append(_to_float(row.get(cols['temperature'])))
+            batch[3].append(_to_float(row.get(cols['humidity'])))
+            batch[4].append(_to_float(row.get(cols['pressure'])) if cols['pressure'] else float('nan'))
+            if len(batch[0]) >= batch_size:
+                total += append_samples(*batch, store_dir=store_dir)
+                batch = ([], [], [], [], [])
+        if batch[0]:
+            total += append_samples(*batch, store_dir=store_dir)
+
+    return total
+
+
+def export_csv(output_path, start=None, end=None, sources=None, store_dir=STORE_DIR):
+    """
+    Exporta el almacén con el formato del CSV antiguo
+    (timestamp,source,temperature,humidity,pressure) para compatibilidad.
+
+    Returns:
+        Número de filas exportadas
+    """
+    manifest = load_manifest(store_dir)
+    names = manifest['sources']
+    total = 0
+    with open(output_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        # Una partición a la vez para mantener la memoria acotada
+        for data in iter_partitions(start, end, sources=sources, store_dir=store_dir):
+            for i in range(len(data['epoch'])):
+                writer.writerow([
+                    from_epoch(data['epoch'][i]).strftime(TIMESTAMP_FORMAT),
+                    names[data['source'][i]],
+                    str(data['temperature'][i]),
+                    str(data['humidity'][i]),
+                    str(data['pressure'][i]),
+                ])
+            total += len(data['epoch'])
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Almacén columnar de muestras por día")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_import = sub.add_parser('import', help='Convierte un CSV existente al almacén')
+    p_import.add_argument('csv_path', nargs='?', default=CSV_FILENAME)
+    p_import.add_argument('--source', default='unknown', help="Fuente si el CSV no trae columna 'source'")
+
+    p_export = sub.add_parser('export', help='Exporta a CSV (formato antiguo)')
+    p_export.add_argument('output_path')
+    p_export.add_argument('--desde', default=None, help="'YYYY-mm-dd HH:MM:SS'")
+    p_export.add_argument('--hasta', default=None, help="'YYYY-mm-dd HH:MM:SS'")
+    p_export.add_argument('--fuente', action='append', default=None)
+
+    p_drop = sub.add_parser('drop', help='Elimina particiones anteriores a una fecha')
+    p_drop.add_argument('antes', help="'YYYY-mm-dd' (se conservan ese día y los posteriores)")
+
+    sub.add_parser('info', help='Resumen de particiones')
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        total = import_csv(args.csv_path, store_dir=args.store_dir, default_source=args.source)
+        print(f"[SUCCESS] {total} muestras importadas desde {args.csv_path}")
+    elif args.command == 'export':
+        total = export_csv(args.output_path, start=args.desde, end=args.hasta,
+                           sources=args.fuente, store_dir=args.store_dir)
+        print(f"[SUCCESS] {total} muestras exportadas a {args.output_path}")
+    elif args.command == 'drop':
+        names = drop_partitions(args.antes + ' 00:00:00' if len(args.antes) == 10 else args.antes,
+                                store_dir=args.store_dir)
+        print(f"[SUCCESS] {len(names)} particiones eliminadas: {', '.join(names) or '-'}")
+    else:
+        manifest = load_manifest(args.store_dir)
+        print(f"Fuentes: {manifest['sources']}")
+        for name in sorted(manifest['partitions']):
+            print(f"  {name}: {manifest['partitions'][name]['rows']} muestras")
+
+
+if __name__ == '__main__':
+    main()
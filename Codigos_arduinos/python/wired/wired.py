@@ -1,16 +1,16 @@
 import serial
-import csv
 import os
+import sys
 from datetime import datetime
 
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..'))
+from storage import sample_store, ring_file
+
 # Configuración del puerto serial
 SERIAL_PORT = "/dev/ttyACM0"  # Puerto para Raspberry Pi (cambiar a COM5 en Windows)
 BAUD_RATE = 9600
 
-# Ruta al archivo CSV (relativa al directorio del proyecto)
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-PROJECT_DIR = os.path.join(SCRIPT_DIR, '..', '..')
-CSV_FILENAME = os.path.join(PROJECT_DIR, 'data', 'sensor_data.csv')
 
 def parse_sensor_data(line):
     """
@@ -33,28 +33,25 @@ def parse_sensor_data(line):
         print(f"ERROR: Error parseando datos: {e}")
         return None
 
-def save_to_csv(data, source, timestamp):
-    """Guarda los datos en CSV local"""
+def save_sample(data, source, timestamp):
+    """Guarda la muestra en el almacén columnar local (data/samples) y en el anillo reciente"""
     try:
-        # Crear carpeta data si no existe
-        os.makedirs(os.path.dirname(CSV_FILENAME), exist_ok=True)
-        
-        file_exists = os.path.isfile(CSV_FILENAME)
-        
-        with open(CSV_FILENAME, 'a', newline='') as f:
-            writer = csv.writer(f)
-            if not file_exists:
-                writer.writerow(['timestamp', 'source', 'temperature', 'humidity', 'pressure'])
-            
-            writer.writerow([
-                timestamp,
-                source,
-                data['temperature'],
-                data['humidity'],
-                data['pressure']
-            ])
+        sample_store.append_sample(
+            timestamp,
+            source,
+            data['temperature'],
+            data['humidity'],
+            data['pressure']
+        )
+        ring_file.append_sample(
+            sample_store.to_epoch(timestamp),
+            source,
+            data['temperature'],
+            data['humidity'],
+            data['pressure']
+        )
     except Exception as e:
-        print(f"ERROR: Error guardando en CSV: {e}")
+        print(f"ERROR: Error guardando muestra local: {e}")
 
 def should_accept_sample():
     """Verifica si estamos en un minuto válido para tomar muestras (cada 5 minutos)"""
@@ -99,8 +96,8 @@ def main(db_handler=None):
                                     pressure=data['pressure']
                                 )
                             
-                            # Guardar en CSV local (opcional)
-                            save_to_csv(data, 'wired', timestamp)
+                            # Guardar en almacén local
+                            save_sample(data, 'wired', timestamp)
                             
                             last_accepted_minute = current_minute
                     # Datos en minutos no válidos se ignoran silenciosamente
@@ -1,17 +1,24 @@
 ﻿import asyncio
-import csv
 import os
+import sys
 from datetime import datetime
 from bleak import BleakClient, BleakScanner
 from bleak.exc import BleakError
 
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, ".."))
+from storage import sample_store, ring_file
+
 DEVICE_NAME = "ArduinoEsclavo"
 CHARACTERISTIC_UUID = "19B10001-E8F2-537E-4F6C-D104768A1214"
 EXPECTED_MAC = None  # Se guardará la primera MAC encontrada
 
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-PROJECT_DIR = os.path.join(SCRIPT_DIR, "..", "..")
-CSV_FILENAME = os.path.join(PROJECT_DIR, "data", "sensor_data.csv")
+# Cola entre el callback BLE y el consumidor que guarda (almacén local + buffer MongoDB)
+SAMPLE_QUEUE_SIZE = 100
+# Monitor de latencia del event loop
+LOOP_LAG_INTERVAL = 0.5  # segundos entre mediciones
+LOOP_LAG_WARN_MS = 20  # avisar si el loop estuvo bloqueado más que esto
+LOOP_LAG_REPORT_EVERY = 600  # reportar el máximo observado cada N segundos
 
 def parse_sensor_data(line):
     try:
@@ -25,17 +32,12 @@ def parse_sensor_data(line):
         print(f"Error parseando datos: {e}")
         return None
 
-def save_to_csv(data, source, timestamp):
+def save_sample(data, source, timestamp):
     try:
-        os.makedirs(os.path.dirname(CSV_FILENAME), exist_ok=True)
-        file_exists = os.path.isfile(CSV_FILENAME)
-        with open(CSV_FILENAME, "a", newline="") as f:
-            writer = csv.writer(f)
-            if not file_exists:
-                writer.writerow(["timestamp", "source", "temperature", "humidity", "pressure"])
-            writer.writerow([timestamp, source, data["temperature"], data["humidity"], data["pressure"]])
+        sample_store.append_sample(timestamp, source, data["temperature"], data["humidity"], data["pressure"])
+        ring_file.append_sample(sample_store.to_epoch(timestamp), source, data["temperature"], data["humidity"], data["pressure"])
     except Exception as e:
-        print(f"Error guardando en CSV: {e}")
+        print(f"Error guardando muestra local: {e}")
 
 def should_accept_sample():
     """Verifica si estamos en un minuto válido para tomar muestras (cada 5 minutos)"""
@@ -43,6 +45,41 @@ def should_accept_sample():
     minute = now.minute
     return minute % 5 == 0
 
+def store_sample(data, timestamp, db_handler=None):
+    """Guarda una muestra (buffer MongoDB + almacén local). Bloqueante: ejecutar fuera del event loop"""
+    if db_handler:
+        db_handler.add_sample_to_buffer(source="wireless", temperature=data["temperature"], humidity=data["humidity"], pressure=data["pressure"])
+    save_sample(data, "wireless", timestamp)
+
+async def consume_samples(queue, db_handler=None):
+    """Consume la cola de muestras y las guarda en un executor para no bloquear el loop"""
+    loop = asyncio.get_running_loop()
+    while True:
+        data, timestamp = await queue.get()
+        try:
+            await loop.run_in_executor(None, store_sample, data, timestamp, db_handler)
+        except Exception as e:
+            print(f"ERROR: ERROR guardando muestra: {e}")
+        finally:
+            queue.task_done()
+
+async def monitor_loop_lag(interval=LOOP_LAG_INTERVAL):
+    """Mide cuánto se atrasa el event loop respecto de lo esperado (loop lag)"""
+    loop = asyncio.get_running_loop()
+    max_lag_ms = 0.0
+    last_report = loop.time()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag_ms = (loop.time() - start - interval) * 1000
+        max_lag_ms = max(max_lag_ms, lag_ms)
+        if lag_ms > LOOP_LAG_WARN_MS:
+            print(f"WARNING: Event loop BLE bloqueado {lag_ms:.1f} ms")
+        if loop.time() - last_report >= LOOP_LAG_REPORT_EVERY:
+            print(f"WIRELESS: Latencia máxima del event loop en los últimos {LOOP_LAG_REPORT_EVERY}s: {max_lag_ms:.1f} ms")
+            max_lag_ms = 0.0
+            last_report = loop.time()
+
 async def main(db_handler=None):
     global EXPECTED_MAC
     
@@ -67,7 +104,12 @@ async def main(db_handler=None):
         nonlocal connection_lost
         connection_lost = True
         print(f"ERROR: Conexión BLE perdida inesperadamente")
-    
+
+    # El callback solo parsea y encola; el guardado corre en consume_samples
+    sample_queue = asyncio.Queue(maxsize=SAMPLE_QUEUE_SIZE)
+    consumer_task = asyncio.create_task(consume_samples(sample_queue, db_handler))
+    lag_task = asyncio.create_task(monitor_loop_lag())
+
     try:
         async with BleakClient(device, timeout=30.0, disconnected_callback=disconnected_callback) as client:
             # Verificar que la conexión está realmente activa
@@ -92,9 +134,10 @@ async def main(db_handler=None):
                             print(f"WIRELESS [{timestamp}]: {line}")
                             parsed_data = parse_sensor_data(line)
                             if parsed_data:
-                                if db_handler:
-                                    db_handler.add_sample_to_buffer(source="wireless", temperature=parsed_data["temperature"], humidity=parsed_data["humidity"], pressure=parsed_data["pressure"])
-                                save_to_csv(parsed_data, "wireless", timestamp)
+                                try:
+                                    sample_queue.put_nowait((parsed_data, timestamp))
+                                except asyncio.QueueFull:
+                                    print(f"ERROR: Cola de muestras llena, descartando muestra {timestamp}")
                                 last_accepted_minute = current_minute
                         # Datos en minutos no válidos se ignoran silenciosamente
                 except Exception as e:
@@ -124,6 +167,14 @@ async def main(db_handler=None):
     except Exception as e:
         print(f"ERROR BLE: {e}")
         raise
+    finally:
+        # Guardar lo que quede en cola antes de salir (o reintentar la conexión)
+        try:
+            await asyncio.wait_for(sample_queue.join(), timeout=10)
+        except asyncio.TimeoutError:
+            print(f"WARNING: {sample_queue.qsize()} muestras sin guardar al cerrar WIRELESS")
+        consumer_task.cancel()
+        lag_task.cancel()
 
 if __name__ == "__main__":
     asyncio.run(main())
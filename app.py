@@ -1,4 +1,4 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, send_file
 import threading
 import os
 import time
@@ -9,11 +9,15 @@ import glob
 from datetime import datetime
 from pathlib import Path
 
-# Importa las funciones de database y predicción (ver abajo)
+# database es liviano (pandas se importa solo al sincronizar); predecir_futuro
+# (pandas/NumPy/TF) corre en el proceso aparte de inference_worker
 import database
-import predecir_futuro as predecir  # archivo modificado (ver sección abajo)
+import forecast_chart
+import http_compression
+import sync_worker
 
 app = Flask(__name__)
+http_compression.init_app(app)  # gzip/brotli de las respuestas JSON de /api/*
 
 # Función para remover emojis (solo en Windows)
 def remove_emojis(text):
@@ -57,84 +61,131 @@ logger.setLevel(logging.INFO)
 logger.addHandler(file_handler)
 logger.addHandler(console_handler)
 
+# Los hilos de sincronización (sync_worker) escriben en el mismo log
+sync_logger = logging.getLogger('sync_worker')
+sync_logger.setLevel(logging.INFO)
+sync_logger.addHandler(file_handler)
+sync_logger.addHandler(console_handler)
+
 # Variables globales para el hilo de sincronización
 sync_thread = None
 sync_running = False
+# Cada start_auto_sync abre una generación nueva: un hilo detenido que aún
+# duerme su intervalo no vuelve a correr si se reinicia la sincronización,
+# y solo el hilo de la generación vigente suelta el lock
+sync_generation = 0
+_sync_control = threading.Lock()
 
-# Configuración de sincronización (sin variables de entorno)
+# Configuración de sincronización: vive en sync_worker.py (compartida con el
+# sincronizador aparte); acá solo se reexportan las rutas
 # Usar Path para compatibilidad multiplataforma
 BASE_DIR = Path(__file__).resolve().parent
-CSV_PATH = BASE_DIR / 'Codigos_arduinos' / 'data' / 'sensor_data.csv'
-SYNC_INTERVAL = 60  # Sincronizar cada 60 segundos
+CSV_PATH = sync_worker.CSV_PATH
+SAMPLES_DIR = sync_worker.SAMPLES_DIR
+
+def _sync_vigente(generation):
+    """should_run de los hilos de una generación: sincronización activa y no reemplazada"""
+    return lambda: sync_running and sync_generation == generation
+
+def _sync_thread_main(generation):
+    try:
+        sync_worker.sync_loop(should_run=_sync_vigente(generation))
+    finally:
+        with _sync_control:
+            # Reemplazado por un start posterior: el lock ya es del hilo nuevo
+            if sync_generation == generation:
+                sync_worker.sync_lock.release()
 
-def sync_csv_to_database():
+def start_auto_sync():
     """
-    Función que se ejecuta en segundo plano y sincroniza el CSV con la DB.
-    Verifica cada SYNC_INTERVAL segundos si hay datos nuevos en el CSV.
+    Inicia el hilo de sincronización automática (si está detenida). Solo un
+    proceso sincroniza: si otro tiene el lock (python sync_worker.py u otra
+    instancia de la app) este proceso se limita a servir la API.
+    Devuelve True si la sincronización corre en este proceso.
     """
-    global sync_running
-    logger.info(f"🔄 Iniciando sincronización automática de {CSV_PATH} cada {SYNC_INTERVAL}s")
-    
-    while sync_running:
+    global sync_thread, sync_running, sync_generation
+
+    with _sync_control:
+        if sync_running:
+            logger.warning("⚠️  La sincronización automática ya está corriendo")
+            return True
+
+        if not sync_worker.sync_lock.acquire():
+            logger.info(f"ℹ️  La sincronización está a cargo de otro proceso (pid {sync_worker.sync_lock.holder()})")
+            return False
+
         try:
-            if CSV_PATH.exists():
-                logger.info(f"📥 Sincronizando {CSV_PATH} a la base de datos...")
-                rows_added = database.load_csv_and_aggregate_to_db(csv_path=str(CSV_PATH))
-                if rows_added > 0:
-                    logger.info(f"✅ Sincronización completada: {rows_added} registros nuevos agregados")
-                else:
-                    logger.debug(f"ℹ️  Sin datos nuevos para sincronizar")
-            else:
-                logger.warning(f"⚠️  Archivo {CSV_PATH} no encontrado en ruta absoluta: {CSV_PATH.absolute()}")
-        except FileNotFoundError as e:
-            logger.error(f"❌ Error: Archivo no encontrado - {e}")
-        except ValueError as e:
-            logger.error(f"❌ Error de valor en CSV: {e}")
+            sync_generation += 1
+            sync_running = True
+            sync_thread = threading.Thread(
+                target=_sync_thread_main,
+                args=(sync_generation,),
+                daemon=True  # El hilo se cierra cuando se cierra la app
+            )
+            sync_thread.start()
+            logger.info("🚀 Sincronización automática iniciada exitosamente")
+            if sync_worker.DB_MAINTENANCE:
+                # Mismo ciclo de vida que la sincronización (y el lock)
+                threading.Thread(
+                    target=sync_worker.maintenance_loop,
+                    args=(_sync_vigente(sync_generation),),
+                    daemon=True
+                ).start()
+                logger.info("🧹 Mantenimiento periódico de la DB iniciado")
+            return True
         except Exception as e:
-            logger.error(f"❌ Error inesperado en sincronización automática: {type(e).__name__}: {e}", exc_info=True)
-        
-        # Esperar antes de la próxima sincronización
-        time.sleep(SYNC_INTERVAL)
+            logger.error(f"❌ Error al iniciar sincronización automática: {e}", exc_info=True)
+            sync_running = False
+            sync_worker.sync_lock.release()
+            return False
 
-def start_auto_sync():
-    """Inicia el hilo de sincronización automática"""
-    global sync_thread, sync_running
-    
-    if sync_running:
-        logger.warning("⚠️  La sincronización automática ya está corriendo")
+def stop_auto_sync():
+    """Detiene el hilo de sincronización automática (el lock se libera al terminar el hilo)"""
+    global sync_running
+    with _sync_control:
+        sync_running = False
+    logger.info("🛑 Sincronización automática detenida")
+
+_app_initialized = False
+
+def init_app(sync=True):
+    """
+    Inicialización explícita de la app: crea la DB y, con sync=True, arranca
+    en este proceso la sincronización y el mantenimiento (si ningún otro
+    proceso tiene el lock). Se llama desde __main__ o create_app (no al
+    importar el módulo), así importar app.py es barato y no tiene efectos
+    secundarios.
+    """
+    global _app_initialized
+    if _app_initialized:
         return
-    
+    _app_initialized = True
+
+    # Inicializa DB al arrancar
     try:
-        sync_running = True
-        sync_thread = threading.Thread(
-            target=sync_csv_to_database,
-            daemon=True  # El hilo se cierra cuando se cierra la app
-        )
-        sync_thread.start()
-        logger.info("🚀 Sincronización automática iniciada exitosamente")
+        logger.info("🗄️  Inicializando base de datos...")
+        database.init_database()
+        logger.info("✅ Base de datos inicializada correctamente")
     except Exception as e:
-        logger.error(f"❌ Error al iniciar sincronización automática: {e}", exc_info=True)
-        sync_running = False
+        logger.error(f"❌ Error al inicializar base de datos: {e}", exc_info=True)
 
-def stop_auto_sync():
-    """Detiene el hilo de sincronización automática"""
-    global sync_running
-    sync_running = False
-    logger.info("🛑 Sincronización automática detenida")
+    if not sync:
+        return
 
-# Inicializa DB al arrancar
-try:
-    logger.info("🗄️  Inicializando base de datos...")
-    database.init_database()
-    logger.info("✅ Base de datos inicializada correctamente")
-except Exception as e:
-    logger.error(f"❌ Error al inicializar base de datos: {e}", exc_info=True)
+    # Inicia sincronización automática (y el mantenimiento) al arrancar la app
+    try:
+        start_auto_sync()
+    except Exception as e:
+        logger.error(f"❌ Error crítico al iniciar la aplicación: {e}", exc_info=True)
 
-# Inicia sincronización automática al arrancar la app
-try:
-    start_auto_sync()
-except Exception as e:
-    logger.error(f"❌ Error crítico al iniciar la aplicación: {e}", exc_info=True)
+def create_app(sync=False):
+    """
+    Fábrica para servidores WSGI con varios workers (ver wsgi.py): inicializa
+    la DB y devuelve la app sin sincronizar, porque la ingesta la hace un
+    único 'python sync_worker.py'. python app.py (desarrollo) usa sync=True.
+    """
+    init_app(sync=sync)
+    return app
 
 @app.route('/')
 def index():
@@ -150,8 +201,9 @@ def index():
 def api_latest_sensor():
     try:
         limit = int(request.args.get('limit', 10))
-        logger.debug(f"📊 Consultando últimos {limit} registros del sensor")
-        data = database.get_latest_sensor_data(limit=limit)
+        source = request.args.get('source') or None  # sin fuente: todas combinadas
+        logger.debug(f"📊 Consultando últimos {limit} registros del sensor ({source or 'todas las fuentes'})")
+        data = database.get_latest_sensor_data(limit=limit, source=source)
         logger.debug(f"✅ Retornando {len(data)} registros")
         return jsonify(data)
     except ValueError as e:
@@ -161,24 +213,72 @@ def api_latest_sensor():
         logger.error(f"❌ Error al obtener datos del sensor: {e}", exc_info=True)
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# Endpoint con las fuentes (sensores) que tienen datos en sensor_data
+@app.route('/api/sensor/sources', methods=['GET'])
+def api_sensor_sources():
+    try:
+        return jsonify(database.get_sensor_sources())
+    except Exception as e:
+        logger.error(f"❌ Error al obtener las fuentes del sensor: {e}", exc_info=True)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 # Endpoint para obtener predicciones futuras (todas o limitadas)
 @app.route('/api/predictions/future', methods=['GET'])
 def api_future_predictions():
     try:
         limit = int(request.args.get('limit', 0))
-        logger.debug(f"🔮 Consultando predicciones futuras (limit={limit})")
-        preds = database.get_future_predictions()
-        if limit and isinstance(limit, int):
-            preds = preds[:limit]
+        offset = int(request.args.get('offset', 0))
+        formato = request.args.get('format', 'rows')
+        logger.debug(f"🔮 Consultando predicciones futuras (limit={limit}, offset={offset}, format={formato})")
+        if formato == 'columnar':
+            # Arrays por variable + start/step_seconds: sin repetir claves por minuto
+            preds = database.get_future_predictions_columnar(limit=limit or None, offset=max(offset, 0))
+            if preds is None:
+                return jsonify({"status": "no_data"}), 200
+            return jsonify(preds)
+        if formato != 'rows':
+            return jsonify({"status": "error", "message": f"Formato no soportado: {formato}"}), 400
+        # Solo se expande el tramo pedido de la corrida empaquetada
+        preds = database.get_future_predictions(limit=limit or None, offset=max(offset, 0))
         logger.debug(f"✅ Retornando {len(preds)} predicciones")
         return jsonify(preds)
     except ValueError as e:
-        logger.error(f"❌ Error de valor en parámetro limit: {e}")
-        return jsonify({"status": "error", "message": "Parámetro 'limit' inválido"}), 400
+        logger.error(f"❌ Error de valor en parámetros limit/offset: {e}")
+        return jsonify({"status": "error", "message": "Parámetros 'limit'/'offset' inválidos"}), 400
     except Exception as e:
         logger.error(f"❌ Error al obtener predicciones: {e}", exc_info=True)
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# Endpoint con los metadatos de la corrida de pronóstico vigente
+@app.route('/api/predictions/run', methods=['GET'])
+def api_current_run():
+    try:
+        run = database.get_current_run()
+        if run is None:
+            return jsonify({"status": "no_data"}), 200
+        return jsonify(run), 200
+    except Exception as e:
+        logger.error(f"❌ Error al obtener la corrida vigente: {e}", exc_info=True)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+# Gráfica del pronóstico vigente (renderizada una vez por corrida, ver forecast_chart.py)
+@app.route('/api/predictions/chart.<formato>', methods=['GET'])
+def api_forecast_chart(formato):
+    try:
+        if formato not in forecast_chart.FORMATOS:
+            return jsonify({"status": "error", "message": f"Formato no soportado: {formato}"}), 404
+        run = database.get_current_run()
+        if run is None:
+            return jsonify({"status": "no_data"}), 404
+        path = forecast_chart.get_chart(run['id'], formato, database.get_forecast_arrays)
+        if path is None:
+            return jsonify({"status": "no_data"}), 404
+        # ETag/Last-Modified del archivo: el navegador revalida con 304 hasta la próxima corrida
+        return send_file(path, mimetype=forecast_chart.FORMATOS[formato], conditional=True, max_age=0)
+    except Exception as e:
+        logger.error(f"❌ Error al generar la gráfica del pronóstico: {e}", exc_info=True)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 # Endpoint para forzar carga del CSV y agregación por minuto
 @app.route('/api/load_csv', methods=['POST'])
 def api_load_csv():
@@ -190,13 +290,16 @@ def api_load_csv():
         payload = request.get_json(silent=True) or {}
         csv_path = payload.get('csv_path')
         logger.info(f"📥 Carga manual de CSV solicitada: {csv_path or CSV_PATH}")
-        rows_added = database.load_csv_and_aggregate_to_db(csv_path=csv_path)
-        logger.info(f"✅ CSV cargado exitosamente: {rows_added} registros agregados")
+        rows_added = sync_worker.run_exclusive(lambda: database.load_csv_and_aggregate_to_db(csv_path=csv_path))
+        logger.info(f"✅ CSV cargado exitosamente: {rows_added} minutos nuevos o actualizados")
         return jsonify({
             "status": "ok", 
             "message": "CSV cargado y agregado por minuto a la DB",
             "rows_added": rows_added
         }), 200
+    except sync_worker.SyncBusy as e:
+        logger.warning(f"⚠️  Carga de CSV rechazada: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 409
     except FileNotFoundError as e:
         logger.error(f"❌ Error: Archivo CSV no encontrado - {e}")
         return jsonify({"status": "error", "message": f"Archivo no encontrado: {e}"}), 404
@@ -217,6 +320,8 @@ def api_predict():
     try:
         payload = request.get_json(silent=True) or {}
         horas = int(payload.get('horas_futuro', 6))
+        if horas <= 0:
+            return jsonify({"status": "error", "message": "'horas_futuro' debe ser mayor que 0"}), 400
         logger.info(f"🔮 Predicción solicitada para {horas} horas futuras")
 
         # Variable compartida para capturar errores
@@ -227,11 +332,8 @@ def api_predict():
             try:
                 logger.info(f"🚀 Iniciando proceso de predicción...")
                 
-                # 1. Limpiar predicciones antiguas de la base de datos
-                deleted = database.clear_predictions()
-                logger.info(f"🗑️  Predicciones antiguas eliminadas de BD: {deleted} registros")
-                
-                # 2. Eliminar CSVs antiguos de predicciones
+                # 1. Eliminar CSVs antiguos de predicciones
+                # (la tabla no se vacía: la corrida nueva reemplaza a la vigente al terminar)
                 old_csvs = glob.glob('predicciones_*_horas_por_minuto.csv')
                 for old_csv in old_csvs:
                     try:
@@ -240,11 +342,18 @@ def api_predict():
                     except Exception as e:
                         logger.warning(f"⚠️  No se pudo eliminar {old_csv}: {e}")
                 
-                # 3. Generar nuevas predicciones
-                output_csv = predecir.run_prediction(horas_futuro=horas)
+                # 2. Generar nuevas predicciones en el proceso de inferencia
+                # (TF/pandas fuera del proceso de Flask, modelo residente, prioridad baja)
+                import inference_worker
+                inicio = time.perf_counter()
+                output_csv, modelo = inference_worker.get_worker().predecir(horas)
+                duracion_ms = (time.perf_counter() - inicio) * 1000
                 logger.info(f"📊 Predicción completada, guardando en DB desde {output_csv}")
-                # leer CSV y guardar en DB
-                database.insert_predictions_from_csv(output_csv)
+                # 3. Guardar como corrida nueva y cambiar el puntero a ella
+                run_id = database.insert_predictions_from_csv(
+                    output_csv, model_version=modelo, source='manual', duration_ms=duracion_ms
+                )
+                logger.info(f"🔀 Corrida de pronóstico vigente: #{run_id}")
                 prediction_result["status"] = "success"
                 logger.info(f"✅ Predicciones guardadas exitosamente en la base de datos")
             except FileNotFoundError as e:
@@ -275,9 +384,9 @@ def api_predict_status():
     Devuelve si hay predicciones en la base de datos
     """
     try:
-        preds = database.get_future_predictions()
-        if preds and len(preds) > 0:
-            return jsonify({"status": "success", "count": len(preds)}), 200
+        run = database.get_current_run()
+        if run and run['horizon_minutes'] > 0:
+            return jsonify({"status": "success", "count": run['horizon_minutes'], "run_id": run['id']}), 200
         else:
             return jsonify({"status": "no_data", "count": 0}), 200
     except Exception as e:
@@ -294,11 +403,20 @@ def api_sync_status():
         logger.debug("🔍 Consultando estado de sincronización")
         status = {
             "running": sync_running,
+            "sync_in_this_process": sync_worker.sync_lock.held,
+            "sync_lock_pid": sync_worker.sync_lock.holder(),  # último proceso que tomó data/sync.lock
             "csv_path": str(CSV_PATH),
             "csv_path_absolute": str(CSV_PATH.absolute()),
             "csv_exists": CSV_PATH.exists(),
-            "interval_seconds": SYNC_INTERVAL
+            "samples_path": str(SAMPLES_DIR),
+            "samples_exists": (SAMPLES_DIR / 'manifest.json').exists(),
+            "interval_seconds": sync_worker.SYNC_INTERVAL,
+            "rolling_forecast": sync_worker.ROLLING_FORECAST
         }
+        if sync_worker.ROLLING_FORECAST and 'rolling_forecast' in sys.modules:
+            status["rolling"] = sys.modules['rolling_forecast'].get_service().status()
+        if 'inference_worker' in sys.modules:
+            status["inferencia"] = sys.modules['inference_worker'].get_worker().status()
         return jsonify(status), 200
     except Exception as e:
         logger.error(f"❌ Error al consultar estado de sincronización: {e}", exc_info=True)
@@ -312,7 +430,11 @@ def api_start_sync():
     """
     try:
         logger.info("▶️  Solicitud de iniciar sincronización automática")
-        start_auto_sync()
+        if not start_auto_sync():
+            return jsonify({
+                "status": "error",
+                "message": f"La sincronización está a cargo de otro proceso (pid {sync_worker.sync_lock.holder()})"
+            }), 409
         return jsonify({"status": "ok", "message": "Sincronización iniciada"}), 200
     except Exception as e:
         logger.error(f"❌ Error al iniciar sincronización: {e}", exc_info=True)
@@ -339,22 +461,25 @@ def api_force_sync():
     Fuerza una sincronización inmediata (sin esperar el intervalo)
     """
     try:
-        logger.info(f"⚡ Sincronización forzada solicitada para {CSV_PATH}")
-        if CSV_PATH.exists():
-            rows_added = database.load_csv_and_aggregate_to_db(csv_path=str(CSV_PATH))
-            logger.info(f"✅ Sincronización forzada completada: {rows_added} registros agregados")
+        logger.info(f"⚡ Sincronización forzada solicitada para {SAMPLES_DIR}")
+        if sync_worker.samples_available():
+            rows_added = sync_worker.sync_samples_once()
+            logger.info(f"✅ Sincronización forzada completada: {rows_added} minutos nuevos o actualizados")
             return jsonify({
                 "status": "ok", 
                 "message": f"Sincronización forzada completada", 
                 "rows_added": rows_added
             }), 200
         else:
-            logger.warning(f"⚠️  CSV no encontrado en: {CSV_PATH.absolute()}")
+            logger.warning(f"⚠️  Muestras no encontradas en: {SAMPLES_DIR.absolute()}")
             return jsonify({
                 "status": "error", 
-                "message": f"CSV no encontrado en {CSV_PATH}",
+                "message": f"Muestras no encontradas en {SAMPLES_DIR} ni {CSV_PATH}",
                 "absolute_path": str(CSV_PATH.absolute())
             }), 404
+    except sync_worker.SyncBusy as e:
+        logger.info(f"ℹ️  Sincronización forzada rechazada: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 409
     except FileNotFoundError as e:
         logger.error(f"❌ Error: Archivo no encontrado - {e}")
         return jsonify({"status": "error", "message": f"Archivo no encontrado: {e}"}), 404
@@ -403,8 +528,12 @@ if __name__ == '__main__':
         logger.info("🚀 Iniciando aplicación Flask - Sistema de Clima")
         logger.info(f"📁 Directorio de trabajo: {os.getcwd()}")
         logger.info(f"📄 CSV Path: {CSV_PATH.absolute()}")
-        logger.info(f"⏱️  Intervalo de sincronización: {SYNC_INTERVAL} segundos")
+        logger.info(f"⏱️  Intervalo de sincronización: {sync_worker.SYNC_INTERVAL} segundos")
         logger.info("="*60)
+        # Con debug=True el reloader ejecuta este bloque en dos procesos; solo
+        # el hijo que sirve (WERKZEUG_RUN_MAIN) inicializa y sincroniza
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            create_app(sync=True)
         app.run(debug=True, host='0.0.0.0', port=5000)
     except KeyboardInterrupt:
         logger.info("⚠️  Aplicación interrumpida por el usuario (Ctrl+C)")
@@ -0,0 +1,240 @@
+"""
+Carga masiva (backfill) de CSVs históricos a sensor_data.
+
+A diferencia de database.load_csv_and_aggregate_to_db (pensada para la
+sincronización continua: lee lo agregado desde la última vez, en un proceso):
+
+    - Lee cada CSV por bloques de bytes cortados en fin de línea: la memoria
+      queda acotada por --bloque-mb × trabajos en vuelo, no por el archivo.
+    - Un pool de procesos parsea cada bloque y lo reduce a sumas/conteos por
+      fuente (columna source/tipo) y minuto (NumPy), así un minuto partido
+      entre bloques o archivos se promedia bien.
+    - Las sumas parciales se agregan a una tabla de staging sin índices; al
+      final un solo INSERT ... SELECT ... GROUP BY source, epoch las combina y las
+      escribe en orden de clave en sensor_data, en una transacción grande, con
+      los índices secundarios de sensor_data desactivados y recreados después.
+    - Acepta datos desordenados y anteriores a lo ya cargado. Los minutos que
+      ya existen se conservan salvo con --reemplazar.
+
+Uso:
+    python backfill.py modelos/sensor_data_1min.csv
+    python backfill.py archivo/2024-*.csv --procesos 4 --reemplazar
+"""
+import argparse
+import io
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import database
+import sync_worker
+
+logger = logging.getLogger(__name__)
+
+BLOCK_MB = 16            # tamaño de cada bloque leído del CSV
+STAGING_BATCH = 50000    # filas de staging por executemany
+
+# Nombres de columna aceptados (app Flask / modelos/ y wired/wireless)
+COLUMN_ALIASES = {
+    'timestamp': ['timestamp', 'time'],
+    'temperatura': ['temperatura', 'temperature'],
+    'humedad': ['humedad', 'humidity'],
+    'presion': ['presion', 'pressure'],
+    'source': ['source', 'tipo'],
+}
+
+
+def iter_blocks(path, block_size):
+    """(cabecera, bloque) con bloques que terminan en fin de línea"""
+    with open(path, 'rb') as f:
+        header = f.readline()
+        resto = b''
+        while True:
+            data = f.read(block_size)
+            if not data:
+                break
+            data = resto + data
+            corte = data.rfind(b'\n')
+            if corte < 0:
+                resto = data
+                continue
+            resto = data[corte + 1:]
+            yield header, data[:corte + 1]
+        if resto.strip():
+            yield header, resto
+
+
+def parse_block(header, block):
+    """
+    Parsea un bloque (en un proceso del pool) y lo reduce por fuente y minuto.
+    Devuelve (filas_leidas, [(source, epoch, sum_t, sum_h, sum_p, n, n_p), ...]).
+    """
+    import numpy as np
+    import pandas as pd
+
+    df = pd.read_csv(io.BytesIO(header + block))
+    cols = {}
+    for key, aliases in COLUMN_ALIASES.items():
+        cols[key] = next((a for a in aliases if a in df.columns), None)
+    missing = [k for k in ('timestamp', 'temperatura', 'humedad') if cols[k] is None]
+    if missing:
+        raise ValueError(f"Columnas requeridas no encontradas en CSV: {missing}")
+
+    ts = pd.to_datetime(df[cols['timestamp']], errors='coerce')
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_localize(None)
+    t = pd.to_numeric(df[cols['temperatura']], errors='coerce').to_numpy(dtype=np.float64)
+    h = pd.to_numeric(df[cols['humedad']], errors='coerce').to_numpy(dtype=np.float64)
+    if cols['presion'] is not None:
+        p = pd.to_numeric(df[cols['presion']], errors='coerce').to_numpy(dtype=np.float64)
+    else:
+        p = np.full(len(df), np.nan)
+    if cols['source'] is not None:
+        source = df[cols['source']].astype(str).where(df[cols['source']].notna(), database.DEFAULT_SOURCE)
+    else:
+        source = pd.Series(database.DEFAULT_SOURCE, index=df.index)
+
+    valid = ts.notna().to_numpy() & ~np.isnan(t) & ~np.isnan(h)
+    epoch = (ts[valid] - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+    minute = epoch.to_numpy(dtype=np.int64)
+    minute = minute - minute % 60
+    t, h, p = t[valid], h[valid], p[valid]
+    if len(minute) == 0:
+        return len(df), []
+
+    # Clave (fuente, minuto) en un solo entero: código de fuente en los bits altos
+    codes, fuentes = pd.factorize(source[valid])
+    keys, inverse = np.unique(codes.astype(np.int64) << 40 | minute, return_inverse=True)
+    p_ok = ~np.isnan(p)
+    sums_t = np.bincount(inverse, weights=t)
+    sums_h = np.bincount(inverse, weights=h)
+    sums_p = np.bincount(inverse, weights=np.where(p_ok, p, 0.0))
+    n = np.bincount(inverse)
+    n_p = np.bincount(inverse, weights=p_ok.astype(np.float64)).astype(np.int64)
+    key_sources = np.asarray(fuentes, dtype=object)[keys >> 40]
+    key_minutes = keys & ((1 << 40) - 1)
+    filas = list(zip(key_sources.tolist(), key_minutes.tolist(), sums_t.tolist(), sums_h.tolist(),
+                     sums_p.tolist(), n.tolist(), n_p.tolist()))
+    return len(df), filas
+
+
+def _secondary_indexes(conn, table):
+    """(nombre, sql) de los índices explícitos de una tabla (no los de PK/UNIQUE)"""
+    return [(row['name'], row['sql']) for row in conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)
+    )]
+
+
+def backfill(paths, procesos=None, block_mb=BLOCK_MB, reemplazar=False):
+    """
+    Carga los CSV en sensor_data; devuelve dict con filas leídas, minutos
+    escritos y tasas. Escribe como sincronizador (sync_worker.run_exclusive):
+    si otro proceso tiene el lock lanza sync_worker.SyncBusy.
+    """
+    return sync_worker.run_exclusive(lambda: _backfill(paths, procesos, block_mb, reemplazar))
+
+
+def _backfill(paths, procesos, block_mb, reemplazar):
+    procesos = procesos or os.cpu_count() or 1
+    block_size = int(block_mb * 1024 * 1024)
+    inicio = time.perf_counter()
+
+    database.init_database()
+    conn = database.get_db_connection()
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute('DROP TABLE IF EXISTS temp.backfill_staging')
+    # Sin clave ni índices: los appends son secuenciales; se agrupa una sola vez al final
+    conn.execute('''
+        CREATE TEMP TABLE backfill_staging (
+            source TEXT, epoch INTEGER, sum_t REAL, sum_h REAL, sum_p REAL, n INTEGER, n_p INTEGER
+        )
+    ''')
+
+    filas_leidas = 0
+    pendientes = []
+
+    def _volcar(resultado):
+        nonlocal filas_leidas
+        leidas, filas = resultado
+        filas_leidas += leidas
+        for i in range(0, len(filas), STAGING_BATCH):
+            conn.executemany('INSERT INTO backfill_staging VALUES (?, ?, ?, ?, ?, ?, ?)', filas[i:i + STAGING_BATCH])
+
+    executor = ProcessPoolExecutor(max_workers=procesos) if procesos > 1 else None
+    try:
+        for path in paths:
+            logger.info(f"📥 Leyendo {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+            for header, block in iter_blocks(path, block_size):
+                if executor is None:
+                    _volcar(parse_block(header, block))
+                    continue
+                pendientes.append(executor.submit(parse_block, header, block))
+                # Memoria acotada: como mucho 2 bloques en vuelo por proceso
+                while len(pendientes) >= 2 * procesos:
+                    _volcar(pendientes.pop(0).result())
+        for futuro in pendientes:
+            _volcar(futuro.result())
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    conn.commit()
+    t_parse = time.perf_counter() - inicio
+
+    # Combinar y escribir en una sola transacción, índices secundarios desactivados
+    indices = _secondary_indexes(conn, 'sensor_data')
+    verbo = 'INSERT OR REPLACE' if reemplazar else 'INSERT OR IGNORE'
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    for name, _ in indices:
+        cursor.execute(f'DROP INDEX IF EXISTS {name}')
+    cursor.execute(f'''
+        {verbo} INTO sensor_data (source, epoch, temperatura, humedad, presion, n, n_presion)
+        SELECT source, epoch, SUM(sum_t) / SUM(n), SUM(sum_h) / SUM(n),
+               CASE WHEN SUM(n_p) > 0 THEN SUM(sum_p) / SUM(n_p) END,
+               SUM(n), SUM(n_p)
+        FROM backfill_staging
+        GROUP BY source, epoch
+        ORDER BY source, epoch
+    ''')
+    minutos = cursor.rowcount
+    for _, sql in indices:
+        cursor.execute(sql)
+    conn.commit()
+    conn.execute('DROP TABLE temp.backfill_staging')
+    conn.close()
+
+    total = time.perf_counter() - inicio
+    return {
+        'filas_leidas': filas_leidas,
+        'minutos_escritos': minutos,
+        'segundos': round(total, 2),
+        'filas_s': round(filas_leidas / total) if total > 0 else None,
+        'filas_s_parseo': round(filas_leidas / t_parse) if t_parse > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill de CSVs históricos a sensor_data")
+    parser.add_argument('csv', nargs='+', help='Archivos CSV (timestamp, temperatura/temperature, ...)')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos de parseo (default: núcleos)')
+    parser.add_argument('--bloque-mb', type=float, default=BLOCK_MB, help='Tamaño de bloque de lectura')
+    parser.add_argument('--reemplazar', action='store_true', help='Sobrescribir minutos ya existentes')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    for path in args.csv:
+        if not os.path.exists(path):
+            raise SystemExit(f"❌ CSV no encontrado: {path}")
+
+    try:
+        r = backfill(args.csv, procesos=args.procesos, block_mb=args.bloque_mb, reemplazar=args.reemplazar)
+    except sync_worker.SyncBusy as e:
+        raise SystemExit(f"❌ {e}; detén la sincronización (/api/sync/stop o sync_worker.py) y reintenta")
+    print(f"✅ {r['filas_leidas']:,} filas leídas -> {r['minutos_escritos']:,} minutos escritos "
+          f"en {r['segundos']} s ({r['filas_s']:,} filas/s; parseo {r['filas_s_parseo']:,} filas/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""
+Backtesting walk-forward de los modelos de pronóstico.
+
+Recorre el historial por minuto (por defecto modelos/sensor_data_1min.csv) y,
+desde cada minuto con N_PASOS minutos previos completos, pronostica los
+siguientes --horizonte minutos igual que predecir_futuro.pronosticar
+(autoregresivo), pero para todas las ventanas a la vez:
+
+    - Las ventanas (n, 24, 4) son una vista con stride tricks sobre la serie
+      escalada: no se copia el historial por ventana.
+    - Cada paso del horizonte es una inferencia por lotes sobre todas las
+      ventanas (miles por invoke/predict), no una por ventana y paso.
+    - Se reporta MAE y RMSE (°C) por horizonte y el throughput de inferencia.
+
+Cada backend disponible (TFLite simple/multi; LSTM .h5 si hay TensorFlow) se
+compara contra la persistencia (repetir la última temperatura observada).
+
+Uso:
+    python backtest.py
+    python backtest.py modelos/sensor_data_1min.csv --horizonte 120 --lote 4096
+    python backtest.py --backend tflite_simple --paso 5 --salida backtest.csv
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import features
+import predecir_futuro as predecir
+
+logger = logging.getLogger(__name__)
+
+HISTORIAL_CSV = predecir.BASE_DIR / 'modelos' / 'sensor_data_1min.csv'
+MODELOS_DIR = predecir.BASE_DIR / 'modelos' / 'modelo stefano'
+HORIZONTE = 60                                   # minutos pronosticados por ventana
+HORIZONTES_REPORTE = (1, 5, 15, 30, 60, 120, 180, 360)
+LOTE = 4096                                      # ventanas por invoke/predict
+
+# backend -> (modelo, scaler) en MODELOS_DIR; se usan los que existan y puedan cargarse
+BACKENDS = {
+    'tflite_simple': ('modelo_simple_tflite.tflite', 'scaler_4_features_tflite.json'),
+    'tflite_multi': ('modelo_multi_tflite.tflite', 'scaler_4_features_tflite.json'),
+    'keras_lstm': ('modelo_lstm_3_features (1).h5', 'scaler_4_features.json'),
+}
+
+
+def cargar_historial(csv_path=HISTORIAL_CSV):
+    """
+    Serie regular por minuto (índice = minuto) con temperatura, humedad y
+    presión. Los minutos faltantes quedan como NaN: las ventanas que los tocan
+    se descartan en evaluar().
+    """
+    df = pd.read_csv(csv_path).rename(columns={
+        'time': 'timestamp', 'temperature': 'temperatura', 'humidity': 'humedad', 'pressure': 'presion',
+    })
+    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+    df = df.dropna(subset=['timestamp'])
+    cols = ['temperatura', 'humedad', 'presion']
+    df[cols] = df[cols].apply(pd.to_numeric, errors='coerce')
+    serie = df.groupby(df['timestamp'].dt.floor('min'))[cols].mean()
+    return serie.reindex(pd.date_range(serie.index.min(), serie.index.max(), freq='min'))
+
+
+def cargar_backend(nombre, lote=LOTE, num_threads=predecir.TFLITE_NUM_THREADS):
+    """{'nombre', 'predict', 'scaler'}; predict recibe (n, N_PASOS, N_FEATURES) float32"""
+    modelo_archivo, scaler_archivo = BACKENDS[nombre]
+    ruta_modelo = MODELOS_DIR / modelo_archivo
+    ruta_scaler = MODELOS_DIR / scaler_archivo
+    if not ruta_modelo.exists() or not ruta_scaler.exists():
+        raise FileNotFoundError(f"{ruta_modelo.name} o {ruta_scaler.name} no existe")
+    scaler = features.cargar_scaler(ruta_scaler)
+
+    if ruta_modelo.suffix == '.tflite':
+        import interpreter_pool
+        interp = interpreter_pool.PooledInterpreter(
+            interpreter_pool.load_tflite(), ruta_modelo.read_bytes(), num_threads
+        )
+        aplanar = len(interp.input_details[0]['shape']) == 2
+
+        def predict(X):
+            X = X.reshape(len(X), -1) if aplanar else X
+            tam = min(lote, len(X))
+            interp.resize_batch(tam)  # una sola vez: el último bloque se rellena hasta 'tam'
+            salidas = []
+            for i in range(0, len(X), tam):
+                bloque = X[i:i + tam]
+                n = len(bloque)
+                if n < tam:
+                    bloque = np.concatenate([bloque, np.zeros((tam - n,) + bloque.shape[1:], dtype=bloque.dtype)])
+                salidas.append(np.asarray(interp.predict(bloque)).reshape(tam, -1)[:n])
+            return np.concatenate(salidas)
+    else:
+        from tensorflow import keras
+        model = keras.models.load_model(ruta_modelo, compile=False)
+
+        def predict(X):
+            return np.asarray(model.predict(X, batch_size=lote, verbose=0)).reshape(len(X), -1)
+
+    return {'nombre': nombre, 'predict': predict, 'scaler': scaler}
+
+
+def seleccionar_ventanas(serie, horizonte=HORIZONTE, paso=1, max_ventanas=None):
+    """
+    Índices de inicio de las ventanas evaluables: N_PASOS minutos completos de
+    entrada y 'horizonte' minutos de temperatura real a continuación.
+    """
+    n_pasos = predecir.N_PASOS
+    datos_nan = serie[['temperatura', 'humedad', 'presion']].isna().to_numpy().any(axis=1)
+    temp_nan = serie['temperatura'].isna().to_numpy()
+    n_ventanas = len(serie) - n_pasos - horizonte + 1
+    if n_ventanas <= 0:
+        return np.empty(0, dtype=np.int64)
+    entrada_ok = ~sliding_window_view(datos_nan, n_pasos).any(axis=1)[:n_ventanas]
+    objetivo_ok = ~sliding_window_view(temp_nan, horizonte).any(axis=1)[n_pasos:n_pasos + n_ventanas]
+    idx = np.flatnonzero(entrada_ok & objetivo_ok)[::paso]
+    return idx[:max_ventanas] if max_ventanas else idx
+
+
+def evaluar(backend, serie, idx, horizonte=HORIZONTE):
+    """
+    Pronóstico autoregresivo de 'horizonte' pasos para todas las ventanas 'idx'
+    (backend=None: persistencia). Devuelve (pred °C (n, horizonte), segundos de inferencia).
+    """
+    n_pasos = predecir.N_PASOS
+    temp = serie['temperatura'].to_numpy()
+    if backend is None:
+        ultima = temp[idx + n_pasos - 1]
+        return np.repeat(ultima[:, None], horizonte, axis=1), 0.0
+
+    # Mismas features que el predictor (presión en hPa, hora escalada), en float32
+    X, _ = features.matriz_features(serie, timestamp=None)
+    X_scaled = features.escalar(X, backend['scaler'])
+
+    # Vistas sin copia: ventanas (n, N_PASOS, 4) y hora escalada de los minutos futuros
+    ventanas = features.ventanas(X_scaled, n_pasos)
+    hora_futura = sliding_window_view(X_scaled[:, features.COLUMNA_HORA], horizonte)[idx + n_pasos]
+
+    actual = ventanas[idx]  # única copia: el estado que avanza paso a paso
+    pred = np.empty((len(idx), horizonte), dtype=np.float32)
+    t_inferencia = 0.0
+    for h in range(horizonte):
+        inicio = time.perf_counter()
+        salida = backend['predict'](actual)
+        t_inferencia += time.perf_counter() - inicio
+        pred[:, h] = salida[:, 0]
+        if salida.shape[1] >= 3:
+            nuevo = salida[:, :3]  # multi-salida: ts, hr, p0
+        else:
+            nuevo = np.column_stack([salida[:, 0], actual[:, -1, 1], actual[:, -1, 2]])
+        fila = np.column_stack([nuevo, hora_futura[:, h]]).astype(np.float32)
+        actual = np.concatenate([actual[:, 1:], fila[:, None, :]], axis=1)
+
+    return features.desescalar_columna(pred, backend['scaler'], 0), t_inferencia
+
+
+def metricas(pred, real):
+    """MAE y RMSE por horizonte (arrays de largo horizonte)"""
+    err = pred - real
+    return np.mean(np.abs(err), axis=0), np.sqrt(np.mean(err ** 2, axis=0))
+
+
+def backtest(csv_path=HISTORIAL_CSV, backends=None, horizonte=HORIZONTE, lote=LOTE, paso=1, max_ventanas=None):
+    """Evalúa cada backend; devuelve lista de dicts (uno por backend)"""
+    serie = cargar_historial(csv_path)
+    idx = seleccionar_ventanas(serie, horizonte, paso, max_ventanas)
+    if len(idx) == 0:
+        raise ValueError(f"Historial insuficiente: se necesitan {predecir.N_PASOS + horizonte} minutos seguidos")
+    real = sliding_window_view(serie['temperatura'].to_numpy(), horizonte)[idx + predecir.N_PASOS]
+
+    resultados = []
+    for nombre in ['persistencia'] + list(backends or BACKENDS):
+        if nombre == 'persistencia':
+            backend = None
+        else:
+            try:
+                backend = cargar_backend(nombre, lote)
+            except Exception as e:
+                logger.warning(f"⚠️  Backend '{nombre}' no disponible: {type(e).__name__}: {e}")
+                continue
+        pred, segundos = evaluar(backend, serie, idx, horizonte)
+        mae, rmse = metricas(pred, real)
+        inferencias = len(idx) * horizonte
+        resultados.append({
+            'backend': nombre,
+            'ventanas': len(idx),
+            'mae': mae,
+            'rmse': rmse,
+            'segundos_inferencia': segundos,
+            'ventanas_s': inferencias / segundos if segundos > 0 else None,
+        })
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtesting walk-forward vectorizado de los modelos")
+    parser.add_argument('csv', nargs='?', default=str(HISTORIAL_CSV), help='Historial por minuto')
+    parser.add_argument('--backend', action='append', choices=list(BACKENDS), help='Default: todos los disponibles')
+    parser.add_argument('--horizonte', type=int, default=HORIZONTE, help='Minutos pronosticados por ventana')
+    parser.add_argument('--lote', type=int, default=LOTE, help='Ventanas por invoke/predict')
+    parser.add_argument('--paso', type=int, default=1, help='Evaluar una de cada N ventanas')
+    parser.add_argument('--max-ventanas', type=int, default=None)
+    parser.add_argument('--salida', default=None, help='CSV con MAE/RMSE por backend y horizonte')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    resultados = backtest(args.csv, args.backend, args.horizonte, args.lote, args.paso, args.max_ventanas)
+    horizontes = [h for h in HORIZONTES_REPORTE if h <= args.horizonte]
+
+    print(f"\n{resultados[0]['ventanas']:,} ventanas × {args.horizonte} minutos ({args.csv})\n")
+    print(f"{'backend':<15}" + ''.join(f"{'h=' + str(h):>14}" for h in horizontes) + f"{'ventanas/s':>14}")
+    print(' ' * 15 + ''.join(f"{'MAE / RMSE':>14}" for _ in horizontes))
+    print("-" * (29 + 14 * len(horizontes)))
+    for r in resultados:
+        celdas = ''.join(
+            f"{'%.2f / %.2f' % (r['mae'][h - 1], r['rmse'][h - 1]):>14}" for h in horizontes
+        )
+        throughput = f"{r['ventanas_s']:>14,.0f}" if r['ventanas_s'] else f"{'-':>14}"
+        print(f"{r['backend']:<15}{celdas}{throughput}")
+
+    if args.salida:
+        filas = [
+            {'backend': r['backend'], 'horizonte_min': h + 1, 'mae': r['mae'][h], 'rmse': r['rmse'][h]}
+            for r in resultados for h in range(args.horizonte)
+        ]
+        pd.DataFrame(filas).to_csv(args.salida, index=False)
+        print(f"\n✅ Métricas por horizonte guardadas en {args.salida}")
+
+
+if __name__ == '__main__':
+    main()
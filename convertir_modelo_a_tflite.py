@@ -1,71 +1,224 @@
 """
 Script para convertir modelo Keras (.h5) a TensorFlow Lite (.tflite)
 Con máxima compatibilidad para tflite-runtime antiguo en Raspberry Pi
-"""
-
-import tensorflow as tf
-import numpy as np
-from pathlib import Path
-
-# Rutas
-base_dir = Path(__file__).resolve().parent
-modelo_h5 = base_dir / "modelos" / "modelo stefano" / "modelo_simple_tflite.h5"
-modelo_tflite = base_dir / "modelos" / "modelo stefano" / "modelo_simple_tflite.tflite"
-
-print(f"TensorFlow version: {tf.__version__}")
-print(f"🔄 Cargando modelo desde: {modelo_h5}")
-
-# Cargar el modelo Keras
-model = tf.keras.models.load_model(modelo_h5, compile=False)
-
-print(f"✅ Modelo cargado")
-print(f"   Input shape: {model.input_shape}")
-print(f"   Output shape: {model.output_shape}")
 
-# Convertir a TensorFlow Lite con compatibilidad máxima
-print(f"\n🔧 Convirtiendo a TFLite (modo compatibilidad)...")
+Genera una variante por modo de cuantización y un reporte comparando tamaño,
+latencia por invoke y MAE (°C) contra el modelo float de Keras:
 
-converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    float32  sin optimización (el .tflite de siempre)
+    dynamic  pesos int8, activaciones float (rango dinámico)
+    float16  pesos float16
+    int8     entero completo (pesos + activaciones + entrada/salida int8),
+             calibrado con ventanas reales de modelos/sensor_data_1min.csv
 
-# CONFIGURACIÓN PARA MÁXIMA COMPATIBILIDAD CON TFLITE-RUNTIME ANTIGUO
-converter.target_spec.supported_ops = [
-    tf.lite.OpsSet.TFLITE_BUILTINS  # Solo operadores builtin básicos
-]
-# Forzar uso de operadores antiguos (opcode version 11 o menor)
-converter._experimental_new_quantizer = False
+Uso:
+    python convertir_modelo_a_tflite.py                       # todos los modos
+    python convertir_modelo_a_tflite.py --modos float32 int8
+    python convertir_modelo_a_tflite.py --modelo "modelos/modelo stefano/modelo_multi_tflite.h5"
 
-print(f"   • Solo operadores TFLITE_BUILTINS")
-print(f"   • Forzando opcode versions antiguas")
-
-# Convertir
-tflite_model = converter.convert()
-
-# Guardar
-print(f"\n💾 Guardando modelo: {modelo_tflite}")
-with open(modelo_tflite, 'wb') as f:
-    f.write(tflite_model)
-
-print(f"✅ Conversión exitosa!")
-print(f"   • Tamaño: {len(tflite_model):,} bytes ({len(tflite_model)/1024:.1f} KB)")
-
-# Verificar
-print(f"\n🧪 Verificando modelo...")
-interpreter = tf.lite.Interpreter(model_path=str(modelo_tflite))
-interpreter.allocate_tensors()
-
-input_details = interpreter.get_input_details()
-output_details = interpreter.get_output_details()
+Los modelos multi-salida (Dense(3): ts, hr, p0) se convierten igual; el MAE del
+reporte se mide sobre la temperatura (primera salida).
+"""
 
-print(f"   • Input shape: {input_details[0]['shape']}")
-print(f"   • Input dtype: {input_details[0]['dtype']}")
-print(f"   • Output shape: {output_details[0]['shape']}")
+import argparse
+import csv
+import time
+from pathlib import Path
 
-# Test
-test_input = np.random.randn(1, 96).astype(np.float32)
-interpreter.set_tensor(input_details[0]['index'], test_input)
-interpreter.invoke()
-test_output = interpreter.get_tensor(output_details[0]['index'])
+import numpy as np
+import pandas as pd
+import tensorflow as tf
 
+import features
 
-print(f"   • Test output: {test_output[0][0]:.4f}")
-print(f"\n🚀 Listo! Ahora commitea y pushea a Raspberry Pi")
+# Rutas
+base_dir = Path(__file__).resolve().parent
+modelos_dir = base_dir / "modelos" / "modelo stefano"
+modelo_h5 = modelos_dir / "modelo_simple_tflite.h5"
+modelo_tflite = modelos_dir / "modelo_simple_tflite.tflite"
+scaler_path = modelos_dir / "scaler_4_features_tflite.json"
+csv_calibracion = base_dir / "modelos" / "sensor_data_1min.csv"
+
+MODOS = ["float32", "dynamic", "float16", "int8"]
+N_PASOS = features.N_PASOS
+N_CALIBRACION = 500  # ventanas usadas por el representative_dataset
+KERAS_VENTANAS_LATENCIA = 200  # ventanas cronometradas de a una en Keras (model.__call__ es lento)
+
+
+def ruta_salida(modo, salida_dir, stem=modelo_tflite.stem):
+    """float32 conserva el nombre del .h5; el resto agrega sufijo"""
+    if modo == "float32":
+        return salida_dir / f"{stem}.tflite"
+    return salida_dir / f"{stem}_{modo}.tflite"
+
+
+def cargar_ventanas(csv_path, scaler, n_pasos=N_PASOS):
+    """
+    Ventanas reales (aplanadas, escaladas) y objetivo (temperatura escalada del
+    minuto siguiente), igual que el notebook (features.secuencias).
+    """
+    df = pd.read_csv(csv_path)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    df = df.dropna(subset=["timestamp", "temperatura", "humedad", "presion"])
+
+    # Presión a hPa (unidad del scaler) y hora_decimal escalada: ver features.py
+    datos = features.escalar(features.matriz_features(df)[0], scaler)
+
+    if len(datos) <= n_pasos:
+        raise ValueError(f"Datos insuficientes en {csv_path} para ventanas de {n_pasos}")
+    X, y = features.secuencias(datos, n_pasos, aplanar=True)
+    X = np.ascontiguousarray(X)  # el conversor y set_tensor necesitan memoria contigua
+    return X, y
+
+
+def convertir(model, modo, X_calibracion):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    # CONFIGURACIÓN PARA MÁXIMA COMPATIBILIDAD CON TFLITE-RUNTIME ANTIGUO
+    converter.target_spec.supported_ops = [
+        tf.lite.OpsSet.TFLITE_BUILTINS  # Solo operadores builtin básicos
+    ]
+
+    if modo == "float32":
+        # Forzar uso de operadores antiguos (opcode version 11 o menor)
+        converter._experimental_new_quantizer = False
+    elif modo == "dynamic":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif modo == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif modo == "int8":
+        def representative_dataset():
+            idx = np.linspace(0, len(X_calibracion) - 1, min(N_CALIBRACION, len(X_calibracion))).astype(int)
+            for i in idx:
+                yield [X_calibracion[i:i + 1]]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    else:
+        raise ValueError(f"Modo de cuantización desconocido: {modo}")
+
+    return converter.convert()
+
+
+def evaluar_tflite(tflite_path, X, y, scaler, repeticiones=3):
+    """Devuelve (MAE °C, latencia media por invoke en ms) invocando ventana por ventana"""
+    interpreter = tf.lite.Interpreter(model_path=str(tflite_path))
+    interpreter.allocate_tensors()
+    entrada = interpreter.get_input_details()[0]
+    salida = interpreter.get_output_details()[0]
+    in_scale, in_zero = entrada["quantization"]
+    out_scale, out_zero = salida["quantization"]
+
+    X_in = X
+    if entrada["dtype"] == np.int8:
+        X_in = np.clip(np.round(X / in_scale + in_zero), -128, 127).astype(np.int8)
+
+    preds = np.empty(len(X), dtype=np.float32)
+    tiempos = []
+    for rep in range(repeticiones):
+        inicio = time.perf_counter()
+        for i in range(len(X_in)):
+            interpreter.set_tensor(entrada["index"], X_in[i:i + 1])
+            interpreter.invoke()
+            if rep == 0:
+                preds[i] = interpreter.get_tensor(salida["index"])[0][0]
+        tiempos.append((time.perf_counter() - inicio) / len(X_in))
+
+    if salida["dtype"] == np.int8:
+        preds = (preds - out_zero) * out_scale
+
+    mae = float(np.mean(np.abs(preds - y)) * scaler.scale_[0])
+    return mae, float(np.median(tiempos) * 1000)
+
+
+def latencia_keras(model, X, ventanas=KERAS_VENTANAS_LATENCIA, repeticiones=3):
+    """Latencia media en ms de una llamada con batch 1 (comparable con ms/invoke de TFLite)"""
+    muestra = X[:ventanas]
+    model(muestra[:1], training=False)  # primera llamada: traza la función
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for i in range(len(muestra)):
+            model(muestra[i:i + 1], training=False)
+        tiempos.append((time.perf_counter() - inicio) / len(muestra))
+    return float(np.median(tiempos) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversión y cuantización del modelo a TFLite")
+    parser.add_argument("--modelo", type=Path, default=modelo_h5)
+    parser.add_argument("--scaler", type=Path, default=scaler_path)
+    parser.add_argument("--csv", type=Path, default=csv_calibracion, help="Datos por minuto para calibrar/evaluar")
+    parser.add_argument("--modos", nargs="+", choices=MODOS, default=MODOS)
+    parser.add_argument("--salida", type=Path, default=modelos_dir)
+    args = parser.parse_args()
+
+    print(f"TensorFlow version: {tf.__version__}")
+    print(f"🔄 Cargando modelo desde: {args.modelo}")
+
+    # Cargar el modelo Keras
+    model = tf.keras.models.load_model(args.modelo, compile=False)
+    scaler = features.cargar_scaler(args.scaler)
+
+    print(f"✅ Modelo cargado")
+    print(f"   Input shape: {model.input_shape}")
+    print(f"   Output shape: {model.output_shape}")
+
+    X, y = cargar_ventanas(args.csv, scaler)
+    print(f"📊 {len(X):,} ventanas reales de {args.csv.name} para calibración y evaluación")
+
+    # Referencia: modelo float de Keras. El MAE se calcula en batch completo;
+    # la latencia, ventana por ventana (batch 1) como en evaluar_tflite
+    keras_pred = model.predict(X, verbose=0)[:, 0]
+    keras_mae = float(np.mean(np.abs(keras_pred - y)) * scaler.scale_[0])
+    keras_ms = latencia_keras(model, X)
+
+    reporte = [{
+        "modo": "keras_float",
+        "archivo": args.modelo.name,
+        "tamano_kb": round(args.modelo.stat().st_size / 1024, 1),
+        "latencia_ms": round(keras_ms, 4),
+        "mae_c": round(keras_mae, 4),
+        "delta_mae_c": 0.0,
+    }]
+
+    for modo in args.modos:
+        print(f"\n🔧 Convirtiendo a TFLite ({modo})...")
+        tflite_model = convertir(model, modo, X)
+
+        destino = ruta_salida(modo, args.salida, args.modelo.stem)
+        with open(destino, "wb") as f:
+            f.write(tflite_model)
+        print(f"💾 Guardado: {destino.name} ({len(tflite_model)/1024:.1f} KB)")
+
+        mae, latencia = evaluar_tflite(destino, X, y, scaler)
+        reporte.append({
+            "modo": modo,
+            "archivo": destino.name,
+            "tamano_kb": round(len(tflite_model) / 1024, 1),
+            "latencia_ms": round(latencia, 4),
+            "mae_c": round(mae, 4),
+            "delta_mae_c": round(mae - keras_mae, 4),
+        })
+
+    print(f"\n📊 REPORTE DE CUANTIZACIÓN")
+    print(f"{'Modo':<12} {'Tamaño KB':>10} {'ms/invoke':>10} {'MAE °C':>9} {'ΔMAE':>8}  Archivo")
+    print("-" * 80)
+    for r in reporte:
+        print(f"{r['modo']:<12} {r['tamano_kb']:>10.1f} {r['latencia_ms']:>10.4f} {r['mae_c']:>9.4f} {r['delta_mae_c']:>+8.4f}  {r['archivo']}")
+
+    reporte_path = args.salida / "reporte_cuantizacion.csv"
+    with open(reporte_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(reporte[0].keys()))
+        writer.writeheader()
+        writer.writerows(reporte)
+    print(f"\n💾 Reporte guardado en: {reporte_path}")
+    print(f"\n🚀 Listo! Elige el modelo más rápido con MAE aceptable, commitea y pushea a Raspberry Pi")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,52 @@
 # --- partes superiores iguales (imports) ---
 import sqlite3
 import os
+import calendar
+import importlib.util
+import logging
+import math
+import sys
+import threading
+from array import array
 from datetime import datetime, timedelta
-import pytz
-import pandas as pd
 import time
 
+# pandas y pytz se importan dentro de las funciones que los usan: así
+# 'import database' (y el arranque de app.py) no paga su costo de importación
+
+logger = logging.getLogger(__name__)
+
 DB_FOLDER = 'data'
 DB_NAME = 'clima.db'
 DB_PATH = os.path.join(DB_FOLDER, DB_NAME)
-TIMEZONE = pytz.timezone('America/Santiago')
+TIMEZONE_NAME = 'America/Santiago'
+
+# Almacenamiento de muestras crudas (escrito por Codigos_arduinos/python/storage)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORAGE_MODULES_DIR = os.path.join(BASE_DIR, 'Codigos_arduinos', 'python', 'storage')
+SAMPLE_STORE_DIR = os.path.join(BASE_DIR, 'Codigos_arduinos', 'data', 'samples')
+RING_FILE_PATH = os.path.join(BASE_DIR, 'Codigos_arduinos', 'data', 'recent_samples.ring')
+_storage_modules = {}
+
+def get_storage_module(name):
+    """
+    Importa (una sola vez) un módulo de Codigos_arduinos/python/storage.
+    Se carga por ruta porque ese directorio no es un paquete importable desde aquí.
+    """
+    if name not in _storage_modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(STORAGE_MODULES_DIR, f'{name}.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _storage_modules[name] = module
+    return _storage_modules[name]
+
+def get_sample_store():
+    """Módulo del almacén columnar por día (sample_store)"""
+    return get_storage_module('sample_store')
+
+def get_ring_file():
+    """Módulo del archivo anillo de muestras recientes (ring_file)"""
+    return get_storage_module('ring_file')
 
 def get_db_connection(timeout=30.0):
     """
@@ -43,22 +80,34 @@ def retry_on_lock(func, max_retries=3, delay=0.5):
             raise  # Re-lanzar si no es locked o se acabaron los reintentos
     return None
 
+def _add_missing_columns(cursor, table, columns):
+    """ALTER TABLE ADD COLUMN para las columnas que aún no existen en 'table'; devuelve las agregadas"""
+    existing = {row['name'] for row in cursor.execute(f'PRAGMA table_info({table})')}
+    added = []
+    for name, decl in columns.items():
+        if name not in existing:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {decl}')
+            added.append(name)
+    return added
+
 def init_database():
     if not os.path.exists(DB_FOLDER):
         os.makedirs(DB_FOLDER)
+    if not os.path.exists(DB_PATH):
+        # Vacuum incremental (maintenance.py libera páginas de a poco). Debe
+        # fijarse antes de activar WAL y de crear tablas, así que solo aplica a
+        # DBs nuevas; una existente se convierte con
+        # 'python maintenance.py --convertir-vacuum' (VACUUM completo, bloqueante).
+        conn = sqlite3.connect(DB_PATH)
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.close()
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    # Crear tabla sensor_data SIN sensor_id ni ubicacion
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS sensor_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME NOT NULL,
-            temperatura REAL NOT NULL,
-            humedad REAL NOT NULL,
-            presion REAL
-        )
-    ''')
+    # Tabla sensor_data: un minuto por fuente y fila, con (source, epoch) como
+    # clave primaria agrupada. Esquemas anteriores (id + timestamp TEXT, o solo
+    # epoch sin fuente) se migran abajo.
+    cursor.execute(SENSOR_DATA_SCHEMA.format(table='sensor_data'))
 
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS predictions (
@@ -74,33 +123,389 @@ def init_database():
         )
     ''')
 
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sensor_timestamp ON sensor_data(timestamp)')
+    # Resúmenes por hora y fuente de los minutos que ya salieron de la retención
+    cursor.execute(SENSOR_ROLLUP_SCHEMA.format(table='sensor_rollup_hourly'))
+    _migrate_rollup_source(cursor)
+
+    # Corridas de pronóstico: cada pronóstico completo es una corrida versionada
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS forecast_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at DATETIME DEFAULT (datetime('now', 'localtime')),
+            horizon_minutes INTEGER NOT NULL,
+            model_version TEXT,
+            source TEXT,
+            duration_ms REAL,
+            start_time DATETIME,
+            step_seconds INTEGER,
+            temperatura_f32 BLOB,
+            humedad_f32 BLOB,
+            presion_f32 BLOB
+        )
+    ''')
+
+    # Puntero a la corrida vigente (una sola fila); se cambia al final de cada corrida
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS forecast_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            current_run_id INTEGER REFERENCES forecast_runs(id)
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO forecast_state (id, current_run_id) VALUES (1, NULL)')
+
+    # Hasta dónde se sincronizó cada origen (filas de una partición del
+    # almacén, bytes del CSV); se actualiza junto con los minutos (ver _upsert_minutes)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_cursor (
+            name TEXT PRIMARY KEY,
+            position INTEGER NOT NULL
+        )
+    ''')
+
+    # Migraciones: columnas agregadas después de crear las tablas
+    # n / n_presion: muestras promediadas en cada minuto (las filas previas cuentan como una)
+    added = _add_missing_columns(cursor, 'sensor_data', {
+        'n': 'INTEGER NOT NULL DEFAULT 1',
+        'n_presion': 'INTEGER NOT NULL DEFAULT 1',
+    })
+    if 'n_presion' in added:
+        cursor.execute('UPDATE sensor_data SET n_presion = 0 WHERE presion IS NULL')
+    _add_missing_columns(cursor, 'predictions', {'run_id': 'INTEGER REFERENCES forecast_runs(id)'})
+    _add_missing_columns(cursor, 'forecast_runs', {
+        'start_time': 'DATETIME',
+        'step_seconds': 'INTEGER',
+        'temperatura_f32': 'BLOB',
+        'humedad_f32': 'BLOB',
+        'presion_f32': 'BLOB',
+    })
+    _migrate_current_run_rows(cursor)
+
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_prediction_time ON predictions(prediction_time)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_prediction_run ON predictions(run_id, prediction_time)')
+    conn.commit()
+    conn.close()
+
+    if _sensor_data_is_legacy():
+        migrate_sensor_data()
+
+    # Consultas por tiempo de todas las fuentes (vista combinada, retención)
+    conn = get_db_connection()
+    conn.execute(SENSOR_EPOCH_INDEX_SQL)
     conn.commit()
     conn.close()
 
+# --- Esquema de sensor_data con epoch entero, por fuente ---
+# epoch = reloj local (naive) codificado con calendar.timegm, igual que el
+# almacén de muestras: datetime(epoch, 'unixepoch') devuelve la hora local tal cual.
+# Cada fuente ('wired', 'wireless', ...) guarda sus propios minutos: la clave
+# (source, epoch) deja las filas de una fuente contiguas (últimos minutos y
+# rangos por fuente son un recorrido de la clave) y el índice por epoch sirve
+# a la vista combinada de todas las fuentes.
+DEFAULT_SOURCE = 'default'  # filas sin fuente conocida (CSV sin columna source, datos migrados)
+SENSOR_DATA_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        source TEXT NOT NULL DEFAULT 'default',
+        epoch INTEGER NOT NULL,
+        temperatura REAL NOT NULL,
+        humedad REAL NOT NULL,
+        presion REAL,
+        n INTEGER NOT NULL DEFAULT 1,
+        n_presion INTEGER NOT NULL DEFAULT 1,
+        PRIMARY KEY (source, epoch)
+    ) WITHOUT ROWID
+'''
+# Resumen horario por fuente (maintenance.rollup_old_minutes): medias
+# ponderadas por n (presión por n_presion) para poder combinar resúmenes
+SENSOR_ROLLUP_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        source TEXT NOT NULL DEFAULT 'default',
+        epoch INTEGER NOT NULL,
+        temperatura REAL,
+        temperatura_min REAL,
+        temperatura_max REAL,
+        humedad REAL,
+        presion REAL,
+        n INTEGER NOT NULL,
+        n_presion INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (source, epoch)
+    ) WITHOUT ROWID
+'''
+SENSOR_EPOCH_INDEX_SQL = 'CREATE INDEX IF NOT EXISTS idx_sensor_data_epoch ON sensor_data(epoch)'
+SENSOR_TIMESTAMP_SQL = "datetime(epoch, 'unixepoch') AS timestamp"  # 'YYYY-MM-DD HH:MM:SS'
+MIGRATION_BATCH = 5000  # filas copiadas por transacción durante la migración
+EPOCH_ORIGIN = datetime(1970, 1, 1)
+
+def to_epoch(value):
+    """Epoch entero (reloj local naive) desde str, datetime o pandas.Timestamp"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip().replace('T', ' '))
+    return calendar.timegm(value.timetuple())
+
+def from_epoch(epoch):
+    """Inversa de to_epoch, como texto 'YYYY-MM-DD HH:MM:SS'"""
+    return (EPOCH_ORIGIN + timedelta(seconds=epoch)).strftime('%Y-%m-%d %H:%M:%S')
+
+def _migrate_rollup_source(cursor):
+    """
+    sensor_rollup_hourly con clave solo por epoch (antes de separar fuentes)
+    -> clave (source, epoch); las horas existentes quedan en DEFAULT_SOURCE.
+    La tabla es chica (una fila por hora): se copia en la misma transacción.
+    """
+    columnas = {row['name'] for row in cursor.execute('PRAGMA table_info(sensor_rollup_hourly)')}
+    if 'source' in columnas:
+        return
+    logger.info("🔧 Migrando sensor_rollup_hourly al esquema por (fuente, hora)...")
+    cursor.execute('DROP TABLE IF EXISTS sensor_rollup_hourly_new')
+    cursor.execute(SENSOR_ROLLUP_SCHEMA.format(table='sensor_rollup_hourly_new'))
+    cursor.execute('''
+        INSERT INTO sensor_rollup_hourly_new
+            (source, epoch, temperatura, temperatura_min, temperatura_max, humedad, presion, n, n_presion)
+        SELECT ?, epoch, temperatura, temperatura_min, temperatura_max, humedad, presion, n,
+               CASE WHEN presion IS NULL THEN 0 ELSE n END
+        FROM sensor_rollup_hourly
+    ''', (DEFAULT_SOURCE,))
+    cursor.execute('DROP TABLE sensor_rollup_hourly')
+    cursor.execute('ALTER TABLE sensor_rollup_hourly_new RENAME TO sensor_rollup_hourly')
+
+def _sensor_data_columns():
+    conn = get_db_connection()
+    columnas = {row['name'] for row in conn.execute('PRAGMA table_info(sensor_data)')}
+    conn.close()
+    return columnas
+
+def _sensor_data_is_legacy():
+    return 'source' not in _sensor_data_columns()
+
+def migrate_sensor_data(batch=MIGRATION_BATCH):
+    """
+    Migración en línea de esquemas anteriores al esquema por (source, epoch):
+    id AUTOINCREMENT + timestamp TEXT + índice secundario, o epoch como única
+    clave (minutos de todas las fuentes promediados). Las filas existentes
+    quedan en la fuente DEFAULT_SOURCE. Copia por lotes de 'batch' filas en
+    transacciones cortas (los lectores y la sincronización siguen funcionando),
+    y al final, en una sola transacción, copia lo que llegó mientras tanto y
+    reemplaza la tabla. Si hay minutos repetidos gana la última fila insertada.
+    Devuelve filas migradas.
+    """
+    if 'epoch' in _sensor_data_columns():
+        key = 'epoch'
+        copy_q = '''
+            INSERT OR REPLACE INTO sensor_data_new (source, epoch, temperatura, humedad, presion, n, n_presion)
+            SELECT ?, epoch, temperatura, humedad, presion, n, n_presion
+            FROM sensor_data WHERE epoch > ?
+            ORDER BY epoch LIMIT ?
+        '''
+    else:
+        key = 'id'
+        copy_q = f'''
+            INSERT OR REPLACE INTO sensor_data_new (source, epoch, temperatura, humedad, presion, n, n_presion)
+            SELECT ?, CAST(strftime('%s', timestamp) AS INTEGER), temperatura, humedad, presion,
+                   1, presion IS NOT NULL
+            FROM sensor_data WHERE id > ? AND strftime('%s', timestamp) IS NOT NULL
+            ORDER BY id LIMIT ?
+        '''
+
+    def _prepare():
+        conn = get_db_connection()
+        conn.execute('DROP TABLE IF EXISTS sensor_data_new')
+        conn.execute(SENSOR_DATA_SCHEMA.format(table='sensor_data_new'))
+        conn.commit()
+        conn.close()
+
+    def _copy_batch(last_id):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(copy_q, (DEFAULT_SOURCE, last_id, batch))
+        copied = cursor.rowcount
+        next_id = conn.execute(
+            f'SELECT MAX({key}) FROM (SELECT {key} FROM sensor_data WHERE {key} > ? ORDER BY {key} LIMIT ?)',
+            (last_id, batch)
+        ).fetchone()[0]
+        conn.commit()
+        conn.close()
+        return copied, next_id
+
+    def _swap(last_id):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute(copy_q, (DEFAULT_SOURCE, last_id, -1))
+        cursor.execute('DROP TABLE sensor_data')
+        cursor.execute('ALTER TABLE sensor_data_new RENAME TO sensor_data')
+        cursor.execute(SENSOR_EPOCH_INDEX_SQL)
+        conn.commit()
+        conn.close()
+
+    logger.info("🔧 Migrando sensor_data al esquema por (fuente, epoch) (WITHOUT ROWID)...")
+    retry_on_lock(_prepare, max_retries=5, delay=0.5)
+    last_id, total = -1, 0
+    while True:
+        copied, next_id = retry_on_lock(lambda: _copy_batch(last_id), max_retries=5, delay=0.5)
+        if next_id is None:
+            break
+        total += copied
+        last_id = next_id
+    retry_on_lock(lambda: _swap(last_id), max_retries=5, delay=0.5)
+    logger.info(f"✅ sensor_data migrada: {total} filas")
+    return total
+
 # --- Insert sensor data simplified (sin sensor_id, ubicacion) ---
-def insert_sensor_data(temperatura, humedad, presion=None, timestamp=None):
+def insert_sensor_data(temperatura, humedad, presion=None, timestamp=None, source=DEFAULT_SOURCE):
+    """Inserta (o reemplaza) una lectura de 'source'; devuelve su epoch"""
     conn = get_db_connection()
     cursor = conn.cursor()
     if timestamp is None:
-        timestamp = datetime.now(TIMEZONE).strftime('%Y-%m-%d %H:%M:%S')
+        import pytz
+        timestamp = datetime.now(pytz.timezone(TIMEZONE_NAME)).strftime('%Y-%m-%d %H:%M:%S')
+    epoch = to_epoch(timestamp)
     cursor.execute('''
-        INSERT INTO sensor_data (timestamp, temperatura, humedad, presion)
-        VALUES (?, ?, ?, ?)
-    ''', (timestamp, temperatura, humedad, presion))
-    record_id = cursor.lastrowid
+        INSERT OR REPLACE INTO sensor_data (source, epoch, temperatura, humedad, presion, n, n_presion)
+        VALUES (?, ?, ?, ?, ?, 1, ?)
+    ''', (source, epoch, temperatura, humedad, presion, int(presion is not None)))
     conn.commit()
     conn.close()
-    return record_id
+    return epoch
+
+# --- Sincronización incremental por minuto ---
+# Cada minuto de sensor_data guarda su media y cuántas muestras la forman
+# (n, n_presion). Las muestras que llegan después para un minuto ya guardado
+# (atrasadas, desordenadas, o el resto de un minuto que se sincronizó a
+# medias) se combinan con un upsert ponderado, sin releer el historial.
+# Cada origen recuerda en sync_cursor hasta dónde se leyó; el cursor se
+# guarda en la misma transacción que los minutos, así nada se cuenta dos veces.
+# Cada fuente (sensor) tiene sus propios minutos: nunca se mezclan al ingerir.
+UPSERT_MINUTE_SQL = '''
+    INSERT INTO sensor_data (source, epoch, temperatura, humedad, presion, n, n_presion)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(source, epoch) DO UPDATE SET
+        temperatura = (temperatura * n + excluded.temperatura * excluded.n) / (n + excluded.n),
+        humedad = (humedad * n + excluded.humedad * excluded.n) / (n + excluded.n),
+        presion = CASE
+            WHEN excluded.n_presion = 0 THEN presion
+            WHEN n_presion = 0 OR presion IS NULL THEN excluded.presion
+            ELSE (presion * n_presion + excluded.presion * excluded.n_presion) / (n_presion + excluded.n_presion)
+        END,
+        n = n + excluded.n,
+        n_presion = n_presion + excluded.n_presion
+'''
+STORE_CURSOR_PREFIX = 'store:'  # + partición (día): filas ya sincronizadas
+CSV_CURSOR_PREFIX = 'csv:'      # + ruta absoluta: bytes ya sincronizados
+INGEST_WORKERS = 4              # fuentes agregadas en paralelo (hilos)
+PARALLEL_MIN_ROWS = 50000       # por debajo de esto no vale la pena repartir
+
+def _read_cursors(prefix):
+    """{nombre: posición} de sync_cursor con el prefijo dado"""
+    def _fetch():
+        conn = get_db_connection()
+        rows = conn.execute('SELECT name, position FROM sync_cursor WHERE substr(name, 1, ?) = ?',
+                            (len(prefix), prefix)).fetchall()
+        conn.close()
+        return rows
+    return {row['name']: row['position'] for row in retry_on_lock(_fetch, max_retries=5, delay=0.5)}
+
+def _last_epoch():
+    def _fetch():
+        conn = get_db_connection()
+        row = conn.execute('SELECT MAX(epoch) as max_epoch FROM sensor_data').fetchone()
+        conn.close()
+        return row['max_epoch']
+    return retry_on_lock(_fetch, max_retries=5, delay=0.5)
+
+def _aggregate_source(df):
+    """Media y cantidad de muestras por minuto de una sola fuente"""
+    import pandas as pd
+    epoch = (df['timestamp'].dt.floor('min') - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+    return df.groupby(epoch.rename('epoch')).agg(
+        temperatura=('temperatura', 'mean'),
+        humedad=('humedad', 'mean'),
+        presion=('presion', 'mean'),
+        n=('temperatura', 'size'),
+        n_presion=('presion', 'count'),
+    ).reset_index()
+
+def _aggregate_by_minute(df):
+    """
+    Media y cantidad de muestras por fuente y minuto.
+    df: timestamp, [source], temperatura, humedad, presion -> source, epoch, medias, n, n_presion
+
+    Cada fuente se agrega por separado; con muchas filas y varias fuentes, en
+    paralelo (los groupby de pandas liberan el GIL), así más estaciones no
+    alargan la ingesta de cada una.
+    """
+    import pandas as pd
+    from concurrent.futures import ThreadPoolExecutor
+    source = df['source'] if 'source' in df.columns else DEFAULT_SOURCE
+    df = pd.DataFrame({
+        'source': source,
+        'timestamp': df['timestamp'],
+        'temperatura': pd.to_numeric(df['temperatura'], errors='coerce'),
+        'humedad': pd.to_numeric(df['humedad'], errors='coerce'),
+        'presion': pd.to_numeric(df['presion'], errors='coerce'),
+    }, index=df.index).dropna(subset=['timestamp', 'temperatura', 'humedad'])
+    df['source'] = df['source'].astype(str).where(df['source'].notna(), DEFAULT_SOURCE)
+    fuentes = [(nombre, grupo) for nombre, grupo in df.groupby('source', sort=True)]
+    if not fuentes:
+        return _empty_minutes()
+
+    def _agregar(fuente):
+        nombre, grupo = fuente
+        agg = _aggregate_source(grupo)
+        agg.insert(0, 'source', nombre)
+        return agg
 
-# --- Nueva función: carga CSV y agrega por minuto ---
+    if len(fuentes) > 1 and len(df) >= PARALLEL_MIN_ROWS:
+        with ThreadPoolExecutor(max_workers=min(len(fuentes), INGEST_WORKERS)) as executor:
+            partes = list(executor.map(_agregar, fuentes))
+    else:
+        partes = [_agregar(f) for f in fuentes]
+    return pd.concat(partes, ignore_index=True)
+
+def _upsert_minutes(agg, cursors=None, delete_cursors=()):
+    """
+    Combina los minutos agregados (_aggregate_by_minute) con sensor_data y,
+    en la misma transacción, guarda/borra posiciones de sync_cursor.
+    Devuelve minutos nuevos o actualizados.
+    """
+    presiones = agg['presion'].tolist()
+    records = list(zip(
+        agg['source'].astype(str).tolist(),
+        agg['epoch'].astype(int).tolist(),
+        agg['temperatura'].tolist(),
+        agg['humedad'].tolist(),
+        [None if p != p else p for p in presiones],  # NaN -> NULL
+        agg['n'].astype(int).tolist(),
+        agg['n_presion'].astype(int).tolist(),
+    ))
+
+    def _sync():
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.executemany(UPSERT_MINUTE_SQL, records)
+        if cursors:
+            cursor.executemany('INSERT OR REPLACE INTO sync_cursor (name, position) VALUES (?, ?)',
+                               list(cursors.items()))
+        if delete_cursors:
+            cursor.executemany('DELETE FROM sync_cursor WHERE name = ?', [(name,) for name in delete_cursors])
+        conn.commit()
+        conn.close()
+        return len(records)
+
+    return retry_on_lock(_sync, max_retries=5, delay=0.5)
+
+def _empty_minutes():
+    import pandas as pd
+    return pd.DataFrame(columns=['source', 'epoch', 'temperatura', 'humedad', 'presion', 'n', 'n_presion'])
+
+# --- Carga CSV y agrega por minuto ---
 def load_csv_and_aggregate_to_db(csv_path=None):
     """
-    Lee Codigos_arduinos/data/sensor_data.csv, agrupa por minuto (promedio)
-    e inserta/regenera la tabla sensor_data.
-    Si csv_path es None, usa la ruta por defecto.
+    Lee Codigos_arduinos/data/sensor_data.csv desde el byte donde terminó la
+    sincronización anterior, agrupa por minuto y lo combina con sensor_data
+    (ver _upsert_minutes). Si csv_path es None, usa la ruta por defecto.
+    Devuelve minutos nuevos o actualizados.
     """
+    import io
+    import pandas as pd
     base_dir = os.path.dirname(__file__)
     default_path = os.path.join(base_dir, "Codigos_arduinos", "data", "sensor_data.csv")
     csv_path = csv_path or default_path
@@ -108,7 +513,32 @@ def load_csv_and_aggregate_to_db(csv_path=None):
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV no encontrado en {csv_path}")
 
-    df = pd.read_csv(csv_path)
+    key = CSV_CURSOR_PREFIX + os.path.abspath(csv_path)
+    offset = _read_cursors(key).get(key)
+    # Sin cursor (DB cargada por la versión anterior): solo minutos posteriores al último
+    last_epoch = _last_epoch() if offset is None else None
+    size = os.path.getsize(csv_path)
+    if offset is not None and offset > size:
+        logger.warning(f"⚠️  {csv_path} se achicó (¿recreado?): se relee desde el inicio")
+        offset = 0
+    offset = offset or 0
+
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        if offset > 0:
+            f.seek(offset)
+        else:
+            offset = len(header)
+        data = f.read()
+    # La última línea puede estar a medio escribir: queda para la próxima vez
+    end = data.rfind(b'\n') + 1
+    if end == 0:
+        return 0
+    df = pd.read_csv(io.BytesIO(header + data[:end]))
+    new_offset = offset + end
+
+    df = df.rename(columns={'temperature': 'temperatura', 'humidity': 'humedad', 'pressure': 'presion',
+                            'tipo': 'source'})
 
     # Intentar detectar columna timestamp; si no existe asumir existe 'time' o crear desde índice
     if 'timestamp' not in df.columns:
@@ -137,66 +567,73 @@ def load_csv_and_aggregate_to_db(csv_path=None):
     # Convertir a timezone local si es naive
     df['timestamp'] = df['timestamp'].dt.tz_localize(None)
 
-    # Agrupar por minuto: redondear timestamp a minuto y promediar
-    df['timestamp_min'] = df['timestamp'].dt.floor('min')  # 'min' es minuto (reemplaza 'T' deprecated)
-    agg = df.groupby('timestamp_min').agg({
-        'temperatura': 'mean',
-        'humedad': 'mean',
-        'presion': 'mean'
-    }).reset_index().rename(columns={'timestamp_min':'timestamp'})
+    agg = _aggregate_by_minute(df) if len(df) else _empty_minutes()
+    if last_epoch is not None:
+        agg = agg[agg['epoch'] > last_epoch]
+    return _upsert_minutes(agg, {key: new_offset})
 
-    # Sincronización incremental: solo insertar datos nuevos
-    def _sync():
-        conn = get_db_connection()
-        cursor = conn.cursor()
+def load_store_and_aggregate_to_db(store_dir=None):
+    """
+    Igual que load_csv_and_aggregate_to_db pero leyendo del almacén columnar
+    (Codigos_arduinos/data/samples). De cada partición (día) lee solo las filas
+    agregadas desde la sincronización anterior (cursor por partición), sin
+    importar su epoch, y solo las columnas necesarias.
+    """
+    store = get_sample_store()
+    store_dir = store_dir or SAMPLE_STORE_DIR
+    if not store.store_exists(store_dir):
+        raise FileNotFoundError(f"Almacén de muestras no encontrado en {store_dir}")
 
-        # Obtener el último timestamp en la base de datos
-        cursor.execute('SELECT MAX(timestamp) as max_ts FROM sensor_data')
-        result = cursor.fetchone()
-        last_timestamp = result['max_ts'] if result['max_ts'] else None
-
-        # Filtrar solo registros nuevos
-        agg_to_insert = agg.copy()
-        if last_timestamp:
-            last_timestamp_dt = pd.to_datetime(last_timestamp)
-            agg_to_insert = agg_to_insert[agg_to_insert['timestamp'] > last_timestamp_dt]
-        
-        if len(agg_to_insert) == 0:
-            conn.close()
-            return 0  # No hay datos nuevos
+    manifest = store.load_manifest(store_dir)
+    cursors = _read_cursors(STORE_CURSOR_PREFIX)
+    if not cursors:
+        cursors = _bootstrap_store_cursors(store, manifest, store_dir)
 
-        insert_q = 'INSERT INTO sensor_data (timestamp, temperatura, humedad, presion) VALUES (?, ?, ?, ?)'
-        records = [(row['timestamp'].strftime('%Y-%m-%d %H:%M:%S'), 
-                    float(row['temperatura']) if not pd.isna(row['temperatura']) else None,
-                    float(row['humedad']) if not pd.isna(row['humedad']) else None,
-                    float(row['presion']) if not pd.isna(row['presion']) else None) 
-                   for _, row in agg_to_insert.iterrows()]
+    # Particiones borradas por la retención: si el día vuelve a aparecer empieza de 0
+    stale = [name for name in cursors
+             if name != STORE_CURSOR_PREFIX and name[len(STORE_CURSOR_PREFIX):] not in manifest['partitions']]
 
-        cursor.executemany(insert_q, records)
-        conn.commit()
-        conn.close()
-        return len(records)
-    
-    return retry_on_lock(_sync, max_retries=5, delay=0.5)
+    total = 0
+    for name, info in sorted(manifest['partitions'].items()):
+        key = STORE_CURSOR_PREFIX + name
+        start, stop = cursors.get(key, 0), info['rows']
+        if stop <= start:
+            continue
+        data = store.read_partition_rows(name, start, stop,
+                                         columns=['epoch', 'source', 'temperature', 'humidity', 'pressure'],
+                                         store_dir=store_dir)
+        df = store.to_dataframe(data, store_dir=store_dir).rename(
+            columns={'temperature': 'temperatura', 'humidity': 'humedad', 'pressure': 'presion'})
+        total += _upsert_minutes(_aggregate_by_minute(df), {key: stop}, stale)
+        stale = ()
+    if stale:
+        _upsert_minutes(_empty_minutes(), delete_cursors=stale)
+    return total
 
-# --- Insert predictions desde CSV generado por predecir_futuro ---
-def insert_prediction(prediction_time, temperatura_pred, humedad_pred, presion_pred=None, confidence=None, model_version='v1.0'):
-    def _insert():
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO predictions 
-            (prediction_time, temperatura_pred, humedad_pred, presion_pred, confidence, model_version)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (prediction_time, temperatura_pred, humedad_pred, presion_pred, confidence, model_version))
-        record_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return record_id
-    
-    return retry_on_lock(_insert, max_retries=5, delay=0.3)
+def _bootstrap_store_cursors(store, manifest, store_dir):
+    """
+    Primera sincronización por cursores sobre una DB ya cargada (la versión
+    anterior insertaba solo minutos posteriores al último guardado): marca
+    como leídas, en cada partición, las filas hasta la última que cae en un
+    minuto ya guardado, para no contarlas dos veces.
+    """
+    import numpy as np
+    last_epoch = _last_epoch()
+    cursors = {STORE_CURSOR_PREFIX: last_epoch or 0}  # marca: bootstrap hecho
+    if last_epoch is not None:
+        limit = last_epoch - last_epoch % 60 + 60
+        for name, info in manifest['partitions'].items():
+            if info['min_epoch'] >= limit:
+                continue
+            epochs = store.read_partition_rows(name, 0, info['rows'], columns=['epoch'], store_dir=store_dir)['epoch']
+            read = np.flatnonzero(epochs < limit)
+            cursors[STORE_CURSOR_PREFIX + name] = int(read[-1]) + 1 if len(read) else 0
+    _upsert_minutes(_empty_minutes(), cursors)
+    return cursors
 
-def insert_predictions_from_csv(csv_path):
+# --- Insert predictions desde CSV generado por predecir_futuro ---
+def insert_predictions_from_csv(csv_path, model_version='v1.0', source='manual', duration_ms=None):
+    import pandas as pd
     if not os.path.exists(csv_path):
         raise FileNotFoundError(csv_path)
     df = pd.read_csv(csv_path)
@@ -208,90 +645,442 @@ def insert_predictions_from_csv(csv_path):
     else:
         raise ValueError("CSV de predicciones no tiene columna 'timestamp' ni 'prediction_time'")
 
-    for _, row in df.iterrows():
-        pt = pd.to_datetime(row[pred_time_col]).strftime('%Y-%m-%d %H:%M:%S')
-        temp = float(row.get('temperatura_predicha', row.get('temperatura_pred', row.get('temperatura_predicted', None))))
-        # Humedad/presion pueden no existir en CSV de ejemplo. Ajustar si tu modelo predice más features.
-        humedad = float(row.get('humedad_pred', row.get('humedad_predicha', None))) if 'humedad_pred' in row.index or 'humedad_predicha' in row.index else None
-        presion = float(row.get('presion_pred', None)) if 'presion_pred' in row.index else None
-        insert_prediction(pt, temp, humedad, presion, confidence=None, model_version='v1.0')
+    return save_predictions(
+        df.rename(columns={pred_time_col: 'timestamp'}),
+        model_version=model_version, source=source, duration_ms=duration_ms
+    )
 
-    return True
+# Pronóstico compacto: una fila por corrida con inicio, paso y un BLOB float32
+# (little-endian) por variable. 360 minutos = 1.4 KB por variable, sin filas
+# ni entradas de índice por minuto.
+FORECAST_VARIABLES = {
+    'temperatura_f32': ('temperatura_pred', ('temperatura_predicha', 'temperatura_pred', 'temperatura_predicted')),
+    'humedad_f32': ('humedad_pred', ('humedad_predicha', 'humedad_pred')),
+    'presion_f32': ('presion_pred', ('presion_predicha', 'presion_pred')),
+}
 
-# --- Obtener los últimos datos del sensor ---
-def get_latest_sensor_data(limit=10):
+def _pack_forecast(df):
+    """(start_time, step_seconds, {columna_blob: bytes o None}) desde un DataFrame de pronóstico"""
+    import numpy as np
+    import pandas as pd
+    tiempos = pd.to_datetime(df['timestamp'])
+    step = int((tiempos.iloc[1] - tiempos.iloc[0]).total_seconds()) if len(tiempos) > 1 else 60
+    blobs = {}
+    for blob_col, (_, aliases) in FORECAST_VARIABLES.items():
+        col = next((c for c in aliases if c in df.columns), None)
+        # Humedad/presión solo existen si el modelo es multi-salida
+        blobs[blob_col] = None if col is None else np.asarray(df[col], dtype='<f4').tobytes()
+    return tiempos.iloc[0].strftime('%Y-%m-%d %H:%M:%S'), step, blobs
+
+def _unpack_f32(blob, offset=0, limit=None):
+    """Lista de floats desde un BLOB float32, decodificando solo [offset, offset+limit)"""
+    if blob is None:
+        return None
+    end = len(blob) // 4 if limit is None else min(len(blob) // 4, offset + limit)
+    values = array('f')
+    values.frombytes(memoryview(blob)[offset * 4:max(offset, end) * 4])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tolist()
+
+def _pack_f32(values):
+    """BLOB float32 little-endian desde una lista (None -> NaN); None si no hay ningún valor"""
+    if all(v is None for v in values):
+        return None
+    packed = array('f', [float('nan') if v is None else v for v in values])
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+def _finite(values):
+    """Redondea a 4 decimales; NaN/inf -> None (JSON no tiene NaN)"""
+    return [round(v, 4) if math.isfinite(v) else None for v in values]
+
+def _migrate_current_run_rows(cursor):
     """
-    Devuelve las últimas lecturas desde la tabla sensor_data.
+    Pronósticos guardados como filas de predictions (esquemas anteriores a
+    los BLOB) se empaquetan en forecast_runs, para que la API los siga
+    sirviendo después de actualizar:
+      - la corrida vigente con filas por run_id (esquema de corridas por filas)
+      - sin corrida vigente, las filas sin run_id (esquema original): pasan a
+        una corrida nueva, que queda como vigente
+    Las demás filas se van con la poda.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    run = cursor.execute('''
+        SELECT s.current_run_id AS id, r.start_time
+        FROM forecast_state s LEFT JOIN forecast_runs r ON r.id = s.current_run_id
+        WHERE s.id = 1
+    ''').fetchone()
+    if run['id'] is not None:
+        if run['start_time'] is not None:
+            return
+        run_id = run['id']
+        rows = cursor.execute('''
+            SELECT prediction_time, temperatura_pred, humedad_pred, presion_pred, model_version
+            FROM predictions WHERE run_id = ? ORDER BY prediction_time
+        ''', (run_id,)).fetchall()
+    else:
+        # La fila más reciente de cada minuto (el esquema original podía repetirlos)
+        rows = cursor.execute('''
+            SELECT p.prediction_time, p.temperatura_pred, p.humedad_pred, p.presion_pred, p.model_version
+            FROM predictions p
+            JOIN (SELECT MAX(id) AS id FROM predictions WHERE run_id IS NULL GROUP BY prediction_time) u
+              ON u.id = p.id
+            ORDER BY p.prediction_time
+        ''').fetchall()
+        if not rows:
+            return
+        cursor.execute('''
+            INSERT INTO forecast_runs (created_at, horizon_minutes, model_version, source)
+            VALUES (?, ?, ?, 'migracion')
+        ''', (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), len(rows), rows[-1]['model_version']))
+        run_id = cursor.lastrowid
+        cursor.execute('UPDATE forecast_state SET current_run_id = ? WHERE id = 1', (run_id,))
+    if not rows:
+        return
+    logger.info(f"🔧 Empaquetando la corrida vigente {run_id} ({len(rows)} filas) en forecast_runs...")
+    start = datetime.fromisoformat(str(rows[0]['prediction_time']))
+    step = 60
+    if len(rows) > 1:
+        step = int((datetime.fromisoformat(str(rows[1]['prediction_time'])) - start).total_seconds())
     cursor.execute('''
-        SELECT timestamp, temperatura, humedad, presion
-        FROM sensor_data
-        ORDER BY timestamp DESC
-        LIMIT ?
-    ''', (limit,))
-    rows = cursor.fetchall()
-    conn.close()
+        UPDATE forecast_runs
+        SET start_time = ?, step_seconds = ?, temperatura_f32 = ?, humedad_f32 = ?, presion_f32 = ?
+        WHERE id = ?
+    ''', (start.strftime('%Y-%m-%d %H:%M:%S'), step,
+          _pack_f32([row['temperatura_pred'] for row in rows]),
+          _pack_f32([row['humedad_pred'] for row in rows]),
+          _pack_f32([row['presion_pred'] for row in rows]),
+          run_id))
 
-    # Convertir a lista de diccionarios
-    return [
-        {
-            "timestamp": row["timestamp"],
-            "temperatura": row["temperatura"],
-            "humedad": row["humedad"],
-            "presion": row["presion"]
-        }
-        for row in rows
-    ]
+def save_predictions(df, model_version='v1.0', source='manual', duration_ms=None):
+    """
+    Guarda un pronóstico completo (DataFrame de predecir_futuro.pronosticar)
+    como una corrida nueva y devuelve su id.
 
+    La corrida es una sola fila de forecast_runs con los valores empaquetados
+    (ver _pack_forecast); en la misma transacción corta se cambia el puntero
+    current_run_id, así los lectores siempre ven una corrida completa. Las
+    corridas viejas se eliminan en segundo plano (prune_old_runs_async).
+    """
+    start_time, step, blobs = _pack_forecast(df)
+    # Hora local como el resto de la DB (CURRENT_TIMESTAMP de SQLite es UTC)
+    created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-# --- Obtener las predicciones futuras ---
-def get_future_predictions():
+    def _insert():
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO forecast_runs
+            (created_at, horizon_minutes, model_version, source, duration_ms, start_time, step_seconds,
+             temperatura_f32, humedad_f32, presion_f32)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (created_at, len(df), model_version, source, duration_ms, start_time, step,
+              blobs['temperatura_f32'], blobs['humedad_f32'], blobs['presion_f32']))
+        run_id = cursor.lastrowid
+        cursor.execute('UPDATE forecast_state SET current_run_id = ? WHERE id = 1', (run_id,))
+        conn.commit()
+        conn.close()
+        return run_id
+
+    run_id = retry_on_lock(_insert, max_retries=5, delay=0.3)
+    prune_old_runs_async()
+    return run_id
+
+def get_current_run():
+    """Metadatos de la corrida vigente (o None si aún no hay pronóstico)"""
+    def _fetch():
+        conn = get_db_connection()
+        row = conn.execute('''
+            SELECT r.id, r.created_at, r.horizon_minutes, r.model_version, r.source, r.duration_ms
+            FROM forecast_state s JOIN forecast_runs r ON r.id = s.current_run_id
+            WHERE s.id = 1
+        ''').fetchone()
+        conn.close()
+        return row
+
+    row = retry_on_lock(_fetch, max_retries=5, delay=0.3)
+    return dict(row) if row else None
+
+# --- Poda de corridas antiguas ---
+KEEP_RUNS = 3  # corridas más recientes conservadas (la vigente nunca se borra)
+PRUNE_BATCH = 2000  # filas por transacción al borrar: bloqueos cortos
+
+_prune_lock = threading.Lock()
+
+def prune_old_runs(keep=None):
     """
-    Devuelve todas las predicciones almacenadas en la tabla predictions.
-    Con reintentos automáticos si la BD está bloqueada.
+    Borra predicciones y corridas anteriores a las 'keep' más recientes (nunca
+    la vigente), en lotes de PRUNE_BATCH filas. Devuelve filas borradas.
     """
-    def _fetch():
+    keep = KEEP_RUNS if keep is None else keep
+    def _old_runs():
+        conn = get_db_connection()
+        rows = conn.execute('''
+            SELECT id FROM forecast_runs
+            WHERE id NOT IN (SELECT id FROM forecast_runs ORDER BY id DESC LIMIT ?)
+              AND id IS NOT (SELECT current_run_id FROM forecast_state WHERE id = 1)
+        ''', (keep,)).fetchall()
+        conn.close()
+        return [row['id'] for row in rows]
+
+    def _delete_batch():
         conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT prediction_time, temperatura_pred, humedad_pred, presion_pred, confidence, model_version
-            FROM predictions
-            ORDER BY prediction_time ASC
-        ''')
-        rows = cursor.fetchall()
+        # Filas sin corrida (anteriores a la migración) u obsoletas
+        placeholders = ','.join('?' * len(old_runs))
+        cursor.execute(f'''
+            DELETE FROM predictions WHERE id IN (
+                SELECT id FROM predictions
+                WHERE run_id IS NULL OR run_id IN ({placeholders})
+                LIMIT ?
+            )
+        ''', (*old_runs, PRUNE_BATCH))
+        deleted = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return deleted
+
+    old_runs = retry_on_lock(_old_runs, max_retries=5, delay=0.3)
+    total = 0
+    while True:
+        deleted = retry_on_lock(_delete_batch, max_retries=5, delay=0.3)
+        total += deleted
+        if deleted < PRUNE_BATCH:
+            break
+
+    if old_runs:
+        def _delete_runs():
+            conn = get_db_connection()
+            placeholders = ','.join('?' * len(old_runs))
+            conn.execute(f'DELETE FROM forecast_runs WHERE id IN ({placeholders})', old_runs)
+            conn.commit()
+            conn.close()
+        retry_on_lock(_delete_runs, max_retries=5, delay=0.3)
+    return total
+
+def prune_old_runs_async(keep=None):
+    """Poda en un hilo aparte; si ya hay una poda en curso no lanza otra"""
+    if not _prune_lock.acquire(blocking=False):
+        return None
+
+    def _run():
+        try:
+            prune_old_runs(keep)
+        except Exception as e:
+            logger.error(f"❌ Error podando corridas antiguas: {e}", exc_info=True)
+        finally:
+            _prune_lock.release()
+
+    thread = threading.Thread(target=_run, daemon=True)
+    thread.start()
+    return thread
+
+# --- Lecturas de sensor_data: por fuente o combinadas ---
+# Sin 'source' se combinan todas las fuentes por minuto, ponderando por la
+# cantidad de muestras (equivale a lo que se guardaba antes de separar fuentes).
+SENSOR_COMBINED_COLUMNS_SQL = f'''{SENSOR_TIMESTAMP_SQL},
+    SUM(temperatura * n) / SUM(n) AS temperatura,
+    SUM(humedad * n) / SUM(n) AS humedad,
+    SUM(presion * n_presion) / NULLIF(SUM(n_presion), 0) AS presion'''
+
+def _query_sensor(where='1', params=(), source=None, order='ASC', limit=None):
+    """Filas {timestamp, temperatura, humedad, presion} de sensor_data que cumplen 'where'"""
+    if source is None:
+        sql = f'''
+            SELECT {SENSOR_COMBINED_COLUMNS_SQL}
+            FROM sensor_data WHERE {where}
+            GROUP BY epoch ORDER BY epoch {order} LIMIT ?
+        '''
+        args = (*params, limit or -1)
+    else:
+        sql = f'''
+            SELECT {SENSOR_TIMESTAMP_SQL}, temperatura, humedad, presion
+            FROM sensor_data WHERE source = ? AND {where}
+            ORDER BY epoch {order} LIMIT ?
+        '''
+        args = (source, *params, limit or -1)
+
+    def _fetch():
+        conn = get_db_connection()
+        rows = conn.execute(sql, args).fetchall()
         conn.close()
         return rows
-    
-    rows = retry_on_lock(_fetch, max_retries=5, delay=0.3)
-    
+
+    return [dict(row) for row in retry_on_lock(_fetch, max_retries=5, delay=0.3)]
+
+def _latest_sensor(limit, source=None):
+    """Últimos 'limit' minutos (más reciente primero)"""
+    if source is None:
+        # Solo los últimos 'limit' minutos distintos (índice por epoch), no toda la tabla
+        where = '''epoch >= (SELECT MIN(epoch) FROM (
+            SELECT DISTINCT epoch FROM sensor_data ORDER BY epoch DESC LIMIT ?))'''
+        return _query_sensor(where, (limit or -1,), order='DESC', limit=limit)
+    return _query_sensor(source=source, order='DESC', limit=limit)
+
+# --- Obtener los últimos datos del sensor ---
+def get_latest_sensor_data(limit=10, source=None):
+    """
+    Devuelve las últimas lecturas desde la tabla sensor_data (de 'source', o
+    todas las fuentes combinadas).
+    """
+    return _latest_sensor(limit, source)
+
+# --- Fuentes con datos en sensor_data ---
+def get_sensor_sources():
+    """[{source, minutos, desde, hasta}] por fuente (recorre la clave primaria)"""
+    def _fetch():
+        conn = get_db_connection()
+        rows = conn.execute('''
+            SELECT source, COUNT(*) AS minutos,
+                   datetime(MIN(epoch), 'unixepoch') AS desde,
+                   datetime(MAX(epoch), 'unixepoch') AS hasta
+            FROM sensor_data GROUP BY source ORDER BY source
+        ''').fetchall()
+        conn.close()
+        return rows
+
+    return [dict(row) for row in retry_on_lock(_fetch, max_retries=5, delay=0.3)]
+
+
+# --- Obtener las predicciones futuras ---
+def get_forecast_arrays(offset=0, limit=None):
+    """
+    Corrida vigente como arrays: {run_id, start_time, step_seconds,
+    model_version, temperatura_pred, humedad_pred, presion_pred} con las
+    listas ya recortadas a [offset, offset+limit). None si no hay corrida.
+    """
+    def _fetch():
+        conn = get_db_connection()
+        row = conn.execute('''
+            SELECT r.id, r.start_time, r.step_seconds, r.model_version,
+                   r.temperatura_f32, r.humedad_f32, r.presion_f32
+            FROM forecast_state s JOIN forecast_runs r ON r.id = s.current_run_id
+            WHERE s.id = 1
+        ''').fetchone()
+        conn.close()
+        return row
+
+    row = retry_on_lock(_fetch, max_retries=5, delay=0.3)
+    if row is None or row['start_time'] is None:
+        return None
+    forecast = {
+        "run_id": row['id'],
+        "start_time": row['start_time'],
+        "step_seconds": row['step_seconds'],
+        "model_version": row['model_version'],
+    }
+    for blob_col, (name, _) in FORECAST_VARIABLES.items():
+        forecast[name] = _unpack_f32(row[blob_col], offset, limit)
+    return forecast
+
+def get_future_predictions(limit=None, offset=0):
+    """
+    Devuelve las predicciones de la corrida vigente (forecast_state), una por
+    minuto, expandiendo solo el tramo [offset, offset+limit) de los arrays.
+    Los valores no finitos (NaN de un modelo roto) van como null.
+    Con reintentos automáticos si la BD está bloqueada.
+    """
+    forecast = get_forecast_arrays(offset, limit)
+    if forecast is None:
+        return []
+
+    start = datetime.strptime(forecast['start_time'], '%Y-%m-%d %H:%M:%S')
+    step = timedelta(seconds=forecast['step_seconds'])
+    temps = _finite(forecast['temperatura_pred'])
+    n = len(temps)
+    humedades = _finite(forecast['humedad_pred'] or []) or [None] * n
+    presiones = _finite(forecast['presion_pred'] or []) or [None] * n
     return [
         {
-            "prediction_time": row["prediction_time"],
-            "temperatura_pred": row["temperatura_pred"],
-            "humedad_pred": row["humedad_pred"],
-            "presion_pred": row["presion_pred"],
-            "confidence": row["confidence"],
-            "model_version": row["model_version"]
+            "prediction_time": (start + step * (offset + i)).isoformat(' '),
+            "temperatura_pred": temps[i],
+            "humedad_pred": humedades[i],
+            "presion_pred": presiones[i],
+            "confidence": None,
+            "model_version": forecast['model_version']
         }
-        for row in rows
+        for i in range(n)
     ]
 
+def get_future_predictions_columnar(limit=None, offset=0):
+    """
+    Mismo tramo que get_future_predictions pero columnar (?format=columnar):
+    un array por variable, más el instante del primer minuto y el paso. El
+    minuto i es start + i * step_seconds. Las variables que el modelo no
+    predice van como null (no un null por minuto) y 'confidence' se omite.
+    None si no hay corrida vigente.
+    """
+    forecast = get_forecast_arrays(offset, limit)
+    if forecast is None:
+        return None
+
+    start = datetime.strptime(forecast['start_time'], '%Y-%m-%d %H:%M:%S')
+    step = forecast['step_seconds']
+    columnar = {
+        "format": "columnar",
+        "run_id": forecast['run_id'],
+        "model_version": forecast['model_version'],
+        "start": (start + timedelta(seconds=step * offset)).isoformat(' '),
+        "step_seconds": step,
+        "count": len(forecast['temperatura_pred']),
+    }
+    for name, _ in FORECAST_VARIABLES.values():
+        valores = forecast[name]
+        columnar[name] = None if valores is None else _finite(valores)
+    return columnar
+
 
-# --- Limpiar todas las predicciones ---
-def clear_predictions():
+# --- Minutos de sensor_data posteriores a un timestamp ---
+def get_sensor_data_since(timestamp=None, limit=None, source=None):
     """
-    Elimina todas las predicciones de la tabla predictions.
-    Con reintentos automáticos si la BD está bloqueada.
+    Minutos de sensor_data posteriores a 'timestamp' en orden cronológico
+    (de 'source', o todas las fuentes combinadas).
+    Sin timestamp devuelve los últimos 'limit' minutos.
     """
-    def _delete():
+    if timestamp is None:
+        return _latest_sensor(limit, source)[::-1]
+    return _query_sensor('epoch > ?', (to_epoch(timestamp),), source, limit=limit)
+
+
+# --- Minutos de sensor_data en un rango [start, end) ---
+def get_sensor_data_range(start, end, source=None):
+    """Lecturas con start <= timestamp < end (str o datetime), en orden cronológico"""
+    return _query_sensor('epoch >= ? AND epoch < ?', (to_epoch(start), to_epoch(end)), source)
+
+
+# --- Resúmenes por hora en un rango [start, end) ---
+def get_sensor_rollups_range(start, end, source=None):
+    """
+    Resúmenes horarios (ver maintenance.py) con start <= hora < end, de
+    'source' o de todas las fuentes combinadas (ponderando por n).
+    """
+    rango = (to_epoch(start), to_epoch(end))
+    if source is None:
+        sql = f'''
+            SELECT {SENSOR_TIMESTAMP_SQL},
+                   SUM(temperatura * n) / SUM(n) AS temperatura,
+                   MIN(temperatura_min) AS temperatura_min, MAX(temperatura_max) AS temperatura_max,
+                   SUM(humedad * n) / SUM(n) AS humedad,
+                   SUM(presion * n_presion) / NULLIF(SUM(n_presion), 0) AS presion,
+                   SUM(n) AS n
+            FROM sensor_rollup_hourly WHERE epoch >= ? AND epoch < ?
+            GROUP BY epoch ORDER BY epoch ASC
+        '''
+        args = rango
+    else:
+        sql = f'''
+            SELECT {SENSOR_TIMESTAMP_SQL}, temperatura, temperatura_min, temperatura_max, humedad, presion, n
+            FROM sensor_rollup_hourly WHERE source = ? AND epoch >= ? AND epoch < ?
+            ORDER BY epoch ASC
+        '''
+        args = (source, *rango)
+
+    def _fetch():
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM predictions')
-        deleted_count = cursor.rowcount
-        conn.commit()
+        rows = conn.execute(sql, args).fetchall()
         conn.close()
-        return deleted_count
-    
-    return retry_on_lock(_delete, max_retries=5, delay=0.3)
+        return rows
+
+    rows = retry_on_lock(_fetch, max_retries=5, delay=0.3)
+    return [dict(row) for row in rows]
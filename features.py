@@ -0,0 +1,213 @@
+"""
+Features y ventanas de entrada de los modelos.
+
+Única definición de cómo se arma la entrada (n, N_PASOS, N_FEATURES) de los
+modelos, compartida por los notebooks de entrenamiento, backtest.py,
+convertir_modelo_a_tflite.py y predecir_futuro.py:
+
+    - features por minuto: temperatura, humedad, presión (hPa) y hora_decimal
+    - hora_decimal = hora + minuto / 60, escalada igual que las demás columnas
+      (también en los minutos futuros del pronóstico autoregresivo)
+    - presión en hPa como en el entrenamiento: el sensor entrega kPa
+    - todo en float32; las ventanas son vistas con stride tricks sobre la
+      serie escalada, sin copiar el historial por ventana
+
+Para una serie de n minutos, la serie escalada ocupa n × 16 bytes y las
+(n - 23) ventanas no ocupan memoria extra; la copia se hace por lote
+(ver lotes()), así que generar el set de entrenamiento de millones de minutos
+no necesita materializar n × 96 valores.
+
+El scaler de inferencia es un JSON con mean_/scale_ (ver guardar_scaler /
+cargar_scaler): el predictor no importa scikit-learn ni joblib, y el archivo
+no depende de la versión de NumPy con la que se entrenó (los .pkl sí).
+
+Uso:
+    X, factor = features.matriz_features(df)          # (n, 4) float32
+    scaler = features.cargar_scaler(ruta_json)        # Escalador (sin sklearn)
+    X_scaled = features.escalar(X, scaler)            # (n, 4) float32
+    X_seq, y = features.secuencias(X_scaled)          # vistas (n-24, 24, 4), (n-24,)
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+N_PASOS = 24  # minutos por ventana
+FEATURES = ['temperatura', 'humedad', 'presion', 'hora_decimal']
+N_FEATURES = len(FEATURES)
+COLUMNA_HORA = FEATURES.index('hora_decimal')
+PRESION_KPA_MAX = 200     # una mediana por debajo de esto es kPa (el sensor); el entrenamiento usó hPa
+BLOQUE_ESCALADO = 1 << 20  # filas escaladas por bloque (acota temporales en float64)
+
+
+def hora_decimal(timestamps):
+    """Hora del día en [0, 24) (hora + minuto / 60) como float32"""
+    ts = pd.DatetimeIndex(pd.to_datetime(timestamps, errors='coerce'))
+    return (ts.hour + ts.minute / 60.0).to_numpy(dtype=np.float32)
+
+
+def factor_presion(presion):
+    """10 si la presión viene en kPa (sensor), 1 si ya está en hPa"""
+    mediana = np.nanmedian(np.asarray(presion, dtype=np.float64)) if len(presion) else np.nan
+    return 10.0 if mediana < PRESION_KPA_MAX else 1.0
+
+
+def matriz_features(df, columnas=('temperatura', 'humedad', 'presion'), timestamp='timestamp'):
+    """
+    Matriz (n, 4) float32 en el orden de FEATURES y el factor aplicado a la
+    presión (para devolver pronósticos en la unidad del sensor). 'timestamp'
+    es la columna de tiempo; si es None se usa el índice (DatetimeIndex).
+    """
+    tiempos = df.index if timestamp is None else df[timestamp]
+    X = np.empty((len(df), N_FEATURES), dtype=np.float32)
+    for i, col in enumerate(columnas):
+        X[:, i] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float32)
+    factor = factor_presion(X[:, 2])
+    if factor != 1.0:
+        X[:, 2] *= factor
+    X[:, COLUMNA_HORA] = hora_decimal(tiempos)
+    return X, factor
+
+
+def _media_escala(scaler):
+    media = getattr(scaler, 'mean_', None)
+    escala = getattr(scaler, 'scale_', None)
+    if media is None or escala is None:
+        return None, None
+    return np.asarray(media, dtype=np.float32), np.asarray(escala, dtype=np.float32)
+
+
+def escalar(X, scaler, bloque=BLOQUE_ESCALADO):
+    """
+    X (n, k) escalado a float32. Con StandardScaler (mean_/scale_) se opera en
+    float32 directamente; con otro scaler se llama a transform por bloques.
+    """
+    X = np.asarray(X)
+    salida = np.empty(X.shape, dtype=np.float32)
+    media, escala = _media_escala(scaler)
+    for i in range(0, len(X), bloque):
+        parte = X[i:i + bloque]
+        if media is not None:
+            np.subtract(parte, media, out=salida[i:i + bloque], casting='unsafe')
+            salida[i:i + bloque] /= escala
+        else:
+            salida[i:i + bloque] = scaler.transform(parte)
+    return salida
+
+
+def escalar_columna(valores, scaler, columna):
+    """Escala una sola columna (p. ej. la hora de los minutos futuros)"""
+    valores = np.asarray(valores, dtype=np.float32)
+    media, escala = _media_escala(scaler)
+    if media is not None:
+        return (valores - media[columna]) / escala[columna]
+    dummy = np.zeros((valores.size, N_FEATURES))
+    dummy[:, columna] = valores.reshape(-1)
+    return scaler.transform(dummy)[:, columna].astype(np.float32).reshape(valores.shape)
+
+
+def desescalar_columna(valores, scaler, columna):
+    """Inversa de escalar_columna (p. ej. temperatura predicha -> °C)"""
+    valores = np.asarray(valores)
+    media, escala = _media_escala(scaler)
+    if media is not None:
+        return valores * escala[columna].astype(np.float64) + media[columna].astype(np.float64)
+    dummy = np.zeros((valores.size, N_FEATURES))
+    dummy[:, columna] = valores.reshape(-1)
+    return scaler.inverse_transform(dummy)[:, columna].reshape(valores.shape)
+
+
+class Escalador:
+    """
+    StandardScaler sin scikit-learn: transform = (X - mean_) / scale_ en
+    float32. Expone mean_, scale_ y n_features_in_ como el de sklearn, así
+    escalar(), escalar_columna() y desescalar_columna() lo tratan igual.
+    """
+
+    def __init__(self, mean, scale, features=None):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+        if self.mean_.shape != self.scale_.shape or self.mean_.ndim != 1:
+            raise ValueError(f"mean/scale incompatibles: {self.mean_.shape} vs {self.scale_.shape}")
+        self.n_features_in_ = len(self.mean_)
+        self.features = list(features) if features is not None else FEATURES[:self.n_features_in_]
+
+    def transform(self, X):
+        return escalar(X, self)
+
+    def inverse_transform(self, X_scaled):
+        return np.asarray(X_scaled, dtype=np.float64) * self.scale_ + self.mean_
+
+
+def guardar_scaler(scaler, path, features=None):
+    """
+    Exporta mean_/scale_ de un scaler ajustado (StandardScaler de sklearn o
+    Escalador) a JSON. Lo llaman los notebooks de entrenamiento y
+    regenerar_scaler.py (para .pkl existentes).
+    """
+    features = features if features is not None else getattr(scaler, 'features', None)
+    n = len(scaler.mean_)
+    datos = {
+        'tipo': 'standard',
+        'features': list(features) if features is not None else FEATURES[:n],
+        'mean': [float(v) for v in scaler.mean_],
+        'scale': [float(v) for v in scaler.scale_],
+    }
+    Path(path).write_text(json.dumps(datos, indent=2) + '\n', encoding='utf-8')
+    return Path(path)
+
+
+def cargar_scaler(path):
+    """Escalador desde el JSON de guardar_scaler()"""
+    datos = json.loads(Path(path).read_text(encoding='utf-8'))
+    if datos.get('tipo', 'standard') != 'standard':
+        raise ValueError(f"Scaler no soportado en {path}: {datos.get('tipo')}")
+    return Escalador(datos['mean'], datos['scale'], datos.get('features'))
+
+
+def ventanas(X_scaled, n_pasos=N_PASOS, aplanar=False):
+    """
+    Todas las ventanas de n_pasos filas consecutivas como vista de solo
+    lectura: (n - n_pasos + 1, n_pasos, k), o (…, n_pasos * k) con aplanar
+    (entrada de los modelos Dense). Sin copia si X_scaled es contiguo.
+    """
+    X = np.ascontiguousarray(X_scaled)
+    k = X.shape[1]
+    if aplanar:
+        # Filas contiguas: la ventana aplanada es un tramo del arreglo plano
+        return sliding_window_view(X.reshape(-1), n_pasos * k)[::k]
+    return sliding_window_view(X, (n_pasos, k))[:, 0]
+
+
+def secuencias(X_scaled, n_pasos=N_PASOS, columna_objetivo=0, aplanar=False):
+    """
+    Pares de entrenamiento: ventana de los minutos [i - n_pasos, i) y valor de
+    'columna_objetivo' en el minuto i. X es una vista (ver ventanas()), y un
+    slice de X_scaled. Con columna_objetivo=slice(0, 3), y es (n, 3): ts, hr
+    y p0 del minuto i (objetivo del modelo multi-salida).
+    """
+    X = np.ascontiguousarray(X_scaled)
+    return ventanas(X, n_pasos, aplanar)[:-1], X[n_pasos:, columna_objetivo]
+
+
+def lotes(X, y, tam_lote=32, mezclar=False, semilla=None):
+    """
+    Lotes contiguos (X_lote, y_lote) de las vistas de secuencias(): solo se
+    copia un lote a la vez. Sirve como generador para tf.data / model.fit.
+    """
+    orden = np.arange(len(X))
+    if mezclar:
+        np.random.default_rng(semilla).shuffle(orden)
+    for i in range(0, len(orden), tam_lote):
+        idx = orden[i:i + tam_lote]
+        if not mezclar:
+            idx = slice(idx[0], idx[-1] + 1)
+        yield np.ascontiguousarray(X[idx]), np.ascontiguousarray(y[idx])
+
+
+def horas_futuras(ultimo_timestamp, n, scaler):
+    """hora_decimal escalada de los n minutos siguientes a ultimo_timestamp"""
+    futuros = pd.Timestamp(ultimo_timestamp) + pd.to_timedelta(np.arange(1, n + 1), unit='min')
+    return escalar_columna(hora_decimal(futuros), scaler, COLUMNA_HORA)
@@ -0,0 +1,171 @@
+"""
+Gráfica del pronóstico vigente para /api/predictions/chart.png|svg.
+
+Los mismos cuatro paneles de modelos/visualizar_predicciones.py (serie
+completa, detalle de los primeros 30 minutos, distribución y cambio
+acumulado) más el resumen por hora, renderizados con matplotlib sin pantalla
+(Figure + backend Agg, sin pyplot ni estado global).
+
+Cada corrida se renderiza una sola vez por formato y queda en CHART_DIR
+(forecast_<run_id>.<formato>): las vistas siguientes son una lectura de
+archivo. Se escribe en un temporal y se renombra, así varios workers WSGI
+pueden pedir la misma gráfica a la vez sin ver un archivo a medio escribir.
+
+matplotlib/NumPy/pandas se importan al renderizar, no al importar app.py.
+"""
+import glob
+import io
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CHART_DIR = Path(__file__).resolve().parent / 'data' / 'charts'
+FORMATOS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+DPI = 110
+KEEP_CHARTS = 3  # corridas con gráfica en disco (como database.KEEP_RUNS)
+
+_render_lock = threading.Lock()  # un render a la vez por proceso
+
+
+def resumen_por_hora(temps, step_seconds=60):
+    """
+    Temperatura mínima, máxima y media por hora de horizonte y cambio de la
+    media respecto del primer minuto pronosticado (DataFrame indexado por
+    etiqueta '0-1h', '1-2h', ...).
+    """
+    import numpy as np
+    import pandas as pd
+    temps = np.asarray(temps, dtype=np.float64)
+    # minutos 1..60 -> '0-1h', 61..120 -> '1-2h', ...
+    hora = np.arange(len(temps)) * step_seconds // 3600
+    resumen = pd.Series(temps).groupby(hora).agg(['min', 'max', 'mean'])
+    resumen['cambio'] = resumen['mean'] - temps[0]
+    resumen.index = [f"{h}-{h + 1}h" for h in resumen.index]
+    return resumen
+
+
+def dibujar_paneles(fig, temps, step_seconds=60):
+    """Paneles del pronóstico en 'fig' (matplotlib Figure); devuelve el resumen por hora"""
+    import numpy as np
+    temps = np.asarray(temps, dtype=np.float64)
+    minutos = (np.arange(len(temps)) + 1) * step_seconds / 60.0
+    horas = minutos / 60.0
+    media = temps.mean()
+    resumen = resumen_por_hora(temps, step_seconds)
+
+    grid = fig.add_gridspec(3, 2, height_ratios=[1, 1, 0.45])
+    ax1, ax2 = fig.add_subplot(grid[0, 0]), fig.add_subplot(grid[0, 1])
+    ax3, ax4 = fig.add_subplot(grid[1, 0]), fig.add_subplot(grid[1, 1])
+
+    # 1. Serie temporal completa
+    ax1.plot(horas, temps, linewidth=1.5, color='#e74c3c', alpha=0.8)
+    ax1.axhline(y=media, color='blue', linestyle='--', alpha=0.5, label=f'Media: {media:.2f}°C')
+    ax1.set_xlabel('Horas desde ahora')
+    ax1.set_ylabel('Temperatura (°C)')
+    ax1.set_title(f'Predicción de Temperatura - Próximas {horas[-1]:.0f} Horas', fontweight='bold')
+    ax1.grid(True, alpha=0.3)
+    ax1.legend()
+
+    # 2. Primeros 30 minutos (detalle)
+    detalle = minutos <= 30
+    ax2.plot(minutos[detalle], temps[detalle], linewidth=2, color='#3498db', marker='o', markersize=1, alpha=0.8)
+    ax2.set_xlabel('Minutos desde ahora')
+    ax2.set_ylabel('Temperatura (°C)')
+    ax2.set_title('Detalle: Primeros 30 Minutos', fontweight='bold')
+    ax2.grid(True, alpha=0.3)
+
+    # 3. Distribución de temperaturas
+    ax3.hist(temps, bins=50, color='#2ecc71', alpha=0.7, edgecolor='black')
+    ax3.axvline(media, color='red', linestyle='--', linewidth=2, label=f'Media: {media:.2f}°C')
+    ax3.set_xlabel('Temperatura (°C)')
+    ax3.set_ylabel('Frecuencia')
+    ax3.set_title('Distribución de Temperaturas Predichas', fontweight='bold')
+    ax3.grid(True, alpha=0.3, axis='y')
+    ax3.legend()
+
+    # 4. Cambio acumulado
+    cambios = temps - temps[0]
+    ax4.plot(horas, cambios, linewidth=1.5, color='#9b59b6', alpha=0.8)
+    ax4.axhline(y=0, color='black', linestyle='-', linewidth=1, alpha=0.5)
+    ax4.fill_between(horas, cambios, 0, where=(cambios >= 0), alpha=0.3, color='red', label='Aumento')
+    ax4.fill_between(horas, cambios, 0, where=(cambios < 0), alpha=0.3, color='blue', label='Disminución')
+    ax4.set_xlabel('Horas desde ahora')
+    ax4.set_ylabel('Cambio de Temperatura (°C)')
+    ax4.set_title(f'Cambio Acumulado (ref: {temps[0]:.2f}°C)', fontweight='bold')
+    ax4.grid(True, alpha=0.3)
+    ax4.legend()
+
+    # 5. Resumen por hora
+    ax5 = fig.add_subplot(grid[2, :])
+    ax5.axis('off')
+    filas = [
+        [f"{v:.2f}°C" for v in resumen['min']],
+        [f"{v:.2f}°C" for v in resumen['max']],
+        [f"{v:.2f}°C" for v in resumen['mean']],
+        [f"{v:+.2f}°C" for v in resumen['cambio']],
+    ]
+    tabla = ax5.table(cellText=filas, rowLabels=['Mín', 'Máx', 'Prom', 'Cambio'],
+                      colLabels=list(resumen.index), loc='center', cellLoc='center')
+    tabla.auto_set_font_size(False)
+    tabla.set_fontsize(9)
+    ax5.set_title('Resumen por hora', fontweight='bold')
+    return resumen
+
+
+def render(forecast, formato='png'):
+    """Bytes de la gráfica de un pronóstico (dict de database.get_forecast_arrays)"""
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(16, 12), layout='constrained')
+    dibujar_paneles(fig, forecast['temperatura_pred'], forecast['step_seconds'])
+    fig.suptitle(f"Pronóstico #{forecast['run_id']} desde {forecast['start_time']} "
+                 f"({forecast['model_version']})", fontsize=14)
+    salida = io.BytesIO()
+    fig.savefig(salida, format=formato, dpi=DPI)
+    return salida.getvalue()
+
+
+def chart_path(run_id, formato):
+    return CHART_DIR / f"forecast_{run_id}.{formato}"
+
+
+def _podar(run_id):
+    """Borra gráficas de corridas anteriores a las KEEP_CHARTS más recientes"""
+    for path in glob.glob(str(CHART_DIR / 'forecast_*.*')):
+        m = re.match(r'forecast_(\d+)\.', os.path.basename(path))
+        if m and int(m.group(1)) <= run_id - KEEP_CHARTS:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def get_chart(run_id, formato, cargar_pronostico):
+    """
+    Ruta de la gráfica de la corrida 'run_id'; si no existe se renderiza con
+    cargar_pronostico() (-> dict de get_forecast_arrays o None).
+    Devuelve None si no hay pronóstico.
+    """
+    path = chart_path(run_id, formato)
+    if path.exists():
+        return path
+    with _render_lock:
+        if path.exists():
+            return path
+        forecast = cargar_pronostico()
+        if forecast is None:
+            return None
+        # La vigente pudo cambiar entre la consulta de metadatos y la de los datos
+        path = chart_path(forecast['run_id'], formato)
+        if path.exists():
+            return path
+        CHART_DIR.mkdir(parents=True, exist_ok=True)
+        temporal = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        temporal.write_bytes(render(forecast, formato))
+        os.replace(temporal, path)
+        logger.info(f"🖼️  Gráfica de la corrida #{forecast['run_id']} renderizada ({formato})")
+        _podar(forecast['run_id'])
+        return path
@@ -0,0 +1,84 @@
+"""
+Compresión de las respuestas JSON de /api/* según Accept-Encoding.
+
+Por Wi-Fi en la Raspberry Pi el tiempo de carga del dashboard lo domina el
+tamaño de las respuestas (p. ej. /api/predictions/future con 1440 minutos),
+y el JSON comprime muy bien. Se negocia en un after_request:
+
+    - brotli ('br') si el cliente lo acepta y el paquete brotli está
+      instalado (opcional, no va en requirements.txt: 'pip install brotli');
+      si no, gzip de la biblioteca estándar
+    - solo respuestas JSON de /api/* de al menos MIN_BYTES, sin
+      Content-Encoding previo ni archivos servidos con send_file
+      (las gráficas PNG/SVG ya van con ETag y 304)
+    - siempre con 'Vary: Accept-Encoding', para que cachés intermedias no
+      mezclen versiones
+
+Uso (app.py):
+    http_compression.init_app(app)
+"""
+import gzip
+import logging
+
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+PREFIJO = '/api/'
+MIN_BYTES = 1024    # por debajo, la cabecera gzip/br no compensa
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # 11 es el máximo pero cuesta ~10x más CPU en la Pi
+
+_brotli = None      # módulo brotli, False si no está instalado
+
+
+def _cargar_brotli():
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+            _brotli = brotli
+        except ImportError:
+            _brotli = False
+    return _brotli
+
+
+def codificaciones():
+    """Codificaciones ofrecidas, en orden de preferencia del servidor"""
+    return ['br', 'gzip'] if _cargar_brotli() else ['gzip']
+
+
+def comprimir(datos, codificacion):
+    if codificacion == 'br':
+        return _cargar_brotli().compress(datos, quality=BROTLI_QUALITY)
+    return gzip.compress(datos, compresslevel=GZIP_LEVEL)
+
+
+def _comprimible(response):
+    return (
+        request.path.startswith(PREFIJO)
+        and response.mimetype == 'application/json'
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and 'Content-Encoding' not in response.headers
+        and 200 <= response.status_code < 300
+    )
+
+
+def comprimir_respuesta(response):
+    if not _comprimible(response):
+        return response
+    response.vary.add('Accept-Encoding')
+    codificacion = request.accept_encodings.best_match(codificaciones())
+    if codificacion is None:
+        return response
+    datos = response.get_data()
+    if len(datos) < MIN_BYTES:
+        return response
+    response.set_data(comprimir(datos, codificacion))
+    response.headers['Content-Encoding'] = codificacion
+    return response
+
+
+def init_app(app):
+    app.after_request(comprimir_respuesta)
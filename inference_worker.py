@@ -0,0 +1,317 @@
+"""
+Proceso de inferencia aislado y compartido.
+
+Los pronósticos (TF/TFLite + pandas) corren en un proceso aparte de larga
+vida, con prioridad de CPU reducida, que mantiene el modelo cargado entre
+pedidos. Hay uno solo por máquina: los workers de gunicorn y sync_worker.py
+se conectan a él por un socket local (AF_UNIX; named pipe en Windows), así el
+modelo está una sola vez en memoria. El primer proceso que lo necesita lo
+lanza (python inference_worker.py, desacoplado); termina solo cuando se
+cierra la última conexión. Si TF se cae o se queda sin memoria muere ese
+proceso y no la app: el próximo pedido lanza otro.
+
+Cada conexión se atiende en su propio hilo: pedidos de procesos distintos
+(p. ej. el pronóstico continuo y un /api/predict) corren a la vez, cada uno
+con un intérprete del pool de predecir_futuro (TFLITE_POOL_SIZE). Dentro de
+una misma conexión los pedidos van de a uno.
+
+El modelo sale de modelos/registry.json (model_registry.ModeloVivo): un hilo
+del proceso vigila el registro y, si aparece un artefacto o versión nueva,
+lo carga y calienta en segundo plano y lo intercambia entre pedidos, sin
+reiniciar el proceso. Cada respuesta lleva la versión que la calculó.
+
+Protocolo (tuplas por la conexión; al conectar llega ('hola', pid)):
+    ('pronosticar', (ventana, n)) -> ('ok', (DataFrame, version_modelo))
+    ('predecir', horas)           -> ('ok', (ruta_csv, version_modelo))
+    ('recargar', None)            -> ('ok', True si cambió el modelo)
+    ('estado', None)              -> ('ok', {...})
+    cualquier fallo               -> ('error', 'Tipo: mensaje')
+
+Uso:
+    worker = inference_worker.get_worker()
+    df, modelo = worker.pronosticar(ventana, 360)
+"""
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent
+INFERENCE_NICE = 10        # niceness del proceso (0 = igual que la app, 19 = la más baja)
+INFERENCE_TIMEOUT = 300    # segundos por pedido (incluye cargar el modelo); si se excede se reinicia
+START_TIMEOUT = 30         # segundos para que un proceso recién lanzado acepte conexiones
+IDLE_GRACE = 5             # segundos sin conexiones antes de terminar
+LOCK_PATH = BASE_DIR / 'data' / 'inference.lock'  # un solo proceso de inferencia por máquina
+if sys.platform.startswith('win'):
+    ADDRESS = r'\\.\pipe\clima_inferencia'
+else:
+    ADDRESS = str(BASE_DIR / 'data' / 'inference.sock')
+# El socket es 0600 (solo este usuario); la clave evita conexiones accidentales
+AUTHKEY = b'clima-inferencia'
+
+
+class InferenceError(RuntimeError):
+    """El proceso de inferencia falló, terminó o no respondió a tiempo"""
+
+
+def _bajar_prioridad(nice):
+    try:
+        os.nice(nice)
+    except AttributeError:
+        # Windows no tiene os.nice; psutil es opcional
+        try:
+            import psutil
+            psutil.Process().nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+        except ImportError:
+            logger.warning("⚠️  Sin os.nice ni psutil: inferencia con prioridad normal")
+    except OSError as e:
+        logger.warning(f"⚠️  No se pudo bajar la prioridad de la inferencia: {e}")
+
+
+def _atender(conn, vivo, predecir, pd):
+    """Hilo por conexión: sus pedidos de a uno, modelo residente compartido"""
+    while True:
+        try:
+            comando, args = conn.recv()
+        except (EOFError, OSError):
+            break  # el proceso cliente cerró la conexión
+        if comando == 'salir':
+            break
+        try:
+            if comando in ('pronosticar', 'predecir'):
+                modelo = vivo.actual()  # una referencia por pedido: un swap no lo interrumpe
+            if comando == 'pronosticar':
+                ventana, n = args
+                resultado = (predecir.pronosticar(modelo, pd.DataFrame(ventana), n), modelo['version'])
+            elif comando == 'predecir':
+                resultado = (predecir.run_prediction(horas_futuro=args, modelo=modelo), modelo['version'])
+            elif comando == 'recargar':
+                resultado = vivo.revisar()
+            elif comando == 'estado':
+                resultado = {
+                    "pid": os.getpid(),
+                    "nice": os.nice(0) if hasattr(os, 'nice') else None,
+                    **vivo.estado(),
+                }
+            else:
+                raise ValueError(f"Comando desconocido: {comando}")
+            conn.send(('ok', resultado))
+        except (EOFError, OSError):
+            break
+        except Exception as e:
+            logger.error(f"❌ Error en '{comando}': {type(e).__name__}: {e}", exc_info=True)
+            try:
+                conn.send(('error', f"{type(e).__name__}: {e}"))
+            except OSError:
+                break
+    conn.close()
+
+
+def servir(address=ADDRESS, nice=INFERENCE_NICE):
+    """
+    Proceso de inferencia: acepta conexiones hasta que se cierra la última
+    (y pasan IDLE_GRACE segundos sin otra). Si ya hay uno vivo, sale.
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] [inferencia] %(message)s')
+    import sync_worker
+    lock = sync_worker.SyncLock(LOCK_PATH)
+    if not lock.acquire():
+        logger.info(f"ℹ️  Ya hay un proceso de inferencia (pid {lock.holder()})")
+        return
+    _bajar_prioridad(nice)
+
+    import pandas as pd
+    import model_registry
+    import predecir_futuro as predecir
+
+    if not address.startswith('\\\\') and os.path.exists(address):
+        os.unlink(address)  # socket de un proceso anterior que murió (tenemos el lock)
+    listener = Listener(address, authkey=AUTHKEY)
+    if not address.startswith('\\\\'):
+        os.chmod(address, 0o600)
+    vivo = model_registry.ModeloVivo()
+    vivo.iniciar_watcher()
+    conexiones = []
+    cambio = threading.Condition()
+
+    def _conexion(conn):
+        try:
+            _atender(conn, vivo, predecir, pd)
+        finally:
+            with cambio:
+                conexiones.remove(conn)
+                cambio.notify_all()
+
+    def _vigilar_inactividad():
+        with cambio:
+            while True:
+                cambio.wait_for(lambda: not conexiones)
+                if not cambio.wait_for(lambda: conexiones, timeout=IDLE_GRACE):
+                    break
+        logger.info("👋 Sin conexiones: proceso de inferencia terminado")
+        listener.close()  # borra el socket
+        os._exit(0)  # el accept() del hilo principal no se puede interrumpir de otra forma
+
+    logger.info(f"🧠 Proceso de inferencia escuchando en {address} (pid {os.getpid()}, nice +{nice})")
+    threading.Thread(target=_vigilar_inactividad, daemon=True).start()
+    while True:
+        try:
+            conn = listener.accept()
+        except Exception as e:
+            logger.warning(f"⚠️  Conexión rechazada: {type(e).__name__}: {e}")
+            continue
+        with cambio:
+            conexiones.append(conn)
+            cambio.notify_all()
+        conn.send(('hola', os.getpid()))
+        threading.Thread(target=_conexion, args=(conn,), name='inferencia-conexion', daemon=True).start()
+
+
+class InferenceWorker:
+    """Lado de la app: se conecta al proceso compartido (lanzándolo si hace falta) y serializa sus pedidos"""
+
+    def __init__(self, nice=INFERENCE_NICE, timeout=INFERENCE_TIMEOUT, address=ADDRESS):
+        self.nice = nice
+        self.timeout = timeout
+        self.address = address
+        self.pedidos = 0
+        self.reinicios = 0
+        self.ultimo_error = None
+        self._pid = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _lanzar(self):
+        """Proceso de inferencia desacoplado: sobrevive al worker que lo lanzó"""
+        opciones = {}
+        if sys.platform.startswith('win'):
+            opciones['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            opciones['start_new_session'] = True
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), '--nice', str(self.nice)],
+            stdin=subprocess.DEVNULL, **opciones
+        )
+
+    def _conectar(self):
+        limite = time.monotonic() + START_TIMEOUT
+        lanzado = False
+        while True:
+            try:
+                conn = Client(self.address, authkey=AUTHKEY)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if not lanzado:
+                    self._lanzar()
+                    lanzado = True
+                if time.monotonic() > limite:
+                    raise InferenceError(f"El proceso de inferencia no aceptó conexiones en {START_TIMEOUT} s")
+                time.sleep(0.2)
+        _, self._pid = conn.recv()
+        self._conn = conn
+        logger.info(f"🧠 Conectado al proceso de inferencia (pid {self._pid}"
+                    f"{', recién lanzado' if lanzado else ''})")
+
+    def _desconectar(self):
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = None
+
+    def _matar(self):
+        """Termina el proceso colgado; el próximo pedido (de cualquier worker) lanza otro"""
+        if self._pid is not None:
+            try:
+                os.kill(self._pid, signal.SIGTERM)  # TerminateProcess en Windows
+            except OSError:
+                pass
+        self._desconectar()
+
+    def _pedir(self, comando, args=None):
+        with self._lock:
+            if self._conn is None:
+                if self._pid is not None:
+                    self.reinicios += 1
+                    logger.warning("⚠️  Se había perdido el proceso de inferencia; se reconecta")
+                self._conectar()
+            self.pedidos += 1
+            try:
+                self._conn.send((comando, args))
+                if not self._conn.poll(self.timeout):
+                    self._matar()
+                    self.ultimo_error = f"Sin respuesta en {self.timeout} s; proceso de inferencia reiniciado"
+                    raise InferenceError(self.ultimo_error)
+                estado, resultado = self._conn.recv()
+            except (EOFError, OSError) as e:
+                self._desconectar()
+                self.ultimo_error = f"El proceso de inferencia terminó: {type(e).__name__}"
+                raise InferenceError(self.ultimo_error) from e
+        if estado == 'error':
+            self.ultimo_error = resultado
+            raise InferenceError(resultado)
+        return resultado
+
+    def pronosticar(self, ventana, n_predicciones):
+        """Pronóstico desde una ventana (lista de dicts de sensor_data); devuelve (DataFrame, version_modelo)"""
+        return self._pedir('pronosticar', (ventana, n_predicciones))
+
+    def predecir(self, horas_futuro):
+        """predecir_futuro.run_prediction en el hijo; devuelve (ruta_csv, version_modelo)"""
+        return self._pedir('predecir', horas_futuro)
+
+    def recargar(self):
+        """Revisa el registro de modelos ya (sin esperar al watcher); True si cambió el modelo"""
+        return self._pedir('recargar')
+
+    def status(self):
+        """Estado visto desde la app (no consulta al proceso: nunca bloquea)"""
+        return {
+            "pid": self._pid,
+            "vivo": self._conn is not None,
+            "nice": self.nice,
+            "pedidos": self.pedidos,
+            "reinicios": self.reinicios,
+            "ocupado": self._lock.locked(),
+            "ultimo_error": self.ultimo_error,
+        }
+
+    def cerrar(self):
+        """Cierra la conexión; el proceso compartido sigue mientras otro worker lo use"""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.send(('salir', None))
+                except OSError:
+                    pass
+            self._desconectar()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    """Conexión al proceso de inferencia, compartida por el proceso de la app"""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = InferenceWorker()
+        return _worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Proceso de inferencia compartido (lo lanza la app si no corre)")
+    parser.add_argument('--nice', type=int, default=INFERENCE_NICE)
+    args = parser.parse_args()
+    servir(nice=args.nice)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Pool de intérpretes TFLite para pronósticos concurrentes.
+
+Un tflite.Interpreter no es thread-safe: dos hilos invocando el mismo intérprete
+corrompen sus tensores. El pool crea N intérpretes que comparten el mismo buffer
+del modelo (se lee una sola vez del disco), cada uno con su propio num_threads,
+y los presta en exclusiva a cada trabajo de predicción:
+
+    pool = get_pool(ruta_tflite, size=2, num_threads=2)
+    with pool.lease() as interp:
+        y = interp.predict(X)
+"""
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def load_tflite():
+    """tflite_runtime si está instalado (Raspberry Pi), si no tensorflow.lite"""
+    try:
+        import tflite_runtime.interpreter as tflite
+        return tflite
+    except ImportError:
+        import tensorflow as tf
+        return tf.lite
+
+
+class PooledInterpreter:
+    """Intérprete ya asignado, con (de)cuantización de entrada/salida int8"""
+
+    def __init__(self, tflite, model_content, num_threads):
+        self.interpreter = tflite.Interpreter(model_content=model_content, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()
+        self.output_details = self.interpreter.get_output_details()
+        self.in_scale, self.in_zero = self.input_details[0]['quantization']
+        self.out_scale, self.out_zero = self.output_details[0]['quantization']
+        self.input_int8 = self.input_details[0]['dtype'] == np.int8
+        self.output_int8 = self.output_details[0]['dtype'] == np.int8
+
+    def resize_batch(self, batch):
+        """Redimensiona la entrada a (batch, ...) para inferencia por lotes (backtest.py)"""
+        shape = list(self.input_details[0]['shape'])
+        if shape[0] == batch:
+            return
+        self.interpreter.resize_tensor_input(self.input_details[0]['index'], [batch] + shape[1:])
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()
+        self.output_details = self.interpreter.get_output_details()
+
+    def predict(self, X_input):
+        if self.input_int8:
+            X_input = np.clip(np.round(X_input / self.in_scale + self.in_zero), -128, 127).astype(np.int8)
+        else:
+            X_input = X_input.astype(np.float32)
+        self.interpreter.set_tensor(self.input_details[0]['index'], X_input)
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self.output_details[0]['index'])
+        if self.output_int8:
+            return (output.astype(np.float32) - self.out_zero) * self.out_scale
+        return output
+
+
+class InterpreterPool:
+    """N intérpretes sobre el mismo buffer de modelo, prestados de a uno"""
+
+    def __init__(self, model_path, size=2, num_threads=1):
+        self.model_path = Path(model_path)
+        self.size = size
+        self.num_threads = num_threads
+        tflite = load_tflite()
+        # El buffer debe vivir mientras vivan los intérpretes
+        self.model_content = self.model_path.read_bytes()
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._idle.put(PooledInterpreter(tflite, self.model_content, num_threads))
+        interp = self._idle.queue[0]
+        # iguales en todos los intérpretes del pool
+        self.input_details = interp.input_details
+        self.output_details = interp.output_details
+        logger.info(
+            f"🧮 Pool TFLite: {size} intérpretes × {num_threads} hilos ({self.model_path.name}, "
+            f"input {interp.input_details[0]['shape']} {interp.input_details[0]['dtype'].__name__})"
+        )
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Presta un intérprete en exclusiva; espera hasta 'timeout' si están todos ocupados"""
+        try:
+            interp = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"Sin intérpretes libres en el pool tras {timeout}s")
+        try:
+            yield interp
+        finally:
+            self._idle.put(interp)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(model_path, size=2, num_threads=1):
+    """Pool compartido por proceso para (modelo, size, num_threads)"""
+    key = (str(model_path), size, num_threads)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = InterpreterPool(model_path, size=size, num_threads=num_threads)
+        return _pools[key]
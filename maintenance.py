@@ -0,0 +1,211 @@
+"""
+Retención y mantenimiento de data/clima.db (y del almacén de muestras).
+
+Sin esto la DB, el WAL y los archivos de muestras crecen sin límite en la SD
+de la Raspberry Pi. Cada pasada:
+
+    1. Resume por fuente y hora (sensor_rollup_hourly) los minutos de
+       sensor_data más viejos que RAW_RETENTION_DAYS y los borra.
+    2. Poda corridas de pronóstico viejas (database.prune_old_runs).
+    3. Borra CSVs de predicciones viejos y, si SAMPLES_RETENTION_DAYS está
+       configurado, las particiones viejas del almacén de muestras.
+    4. Libera páginas con PRAGMA incremental_vacuum y trunca el WAL.
+
+Todo se hace en rebanadas pequeñas (una transacción corta por rebanada y una
+pausa entre ellas), así la API nunca espera el lock más que unos ms.
+
+Uso:
+    python maintenance.py                      # una pasada
+    python maintenance.py --convertir-vacuum   # una vez, en DBs creadas antes del vacuum incremental
+"""
+import argparse
+import glob
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import database
+
+logger = logging.getLogger(__name__)
+
+# Configuración de retención (sin variables de entorno, como app.py)
+RAW_RETENTION_DAYS = 30          # minutos crudos en sensor_data
+SAMPLES_RETENTION_DAYS = None    # particiones del almacén de muestras (None = conservar)
+PREDICTION_CSV_RETENTION_DAYS = 1
+MAINTENANCE_INTERVAL = 3600      # segundos entre pasadas (hilo de app.py)
+
+# Tamaño de las rebanadas
+ROLLUP_SLICE_HOURS = 6           # horas resumidas y borradas por transacción (360 filas)
+VACUUM_SLICE_PAGES = 256         # páginas liberadas por incremental_vacuum (1 MB con páginas de 4 KB)
+SLICE_PAUSE = 0.05               # segundos entre rebanadas para dejar pasar a la API
+LOCK_TIMEOUT = 0.2               # si la DB está ocupada se reintenta en la próxima pasada
+
+HOUR = 3600
+
+
+def _connect():
+    return database.get_db_connection(timeout=LOCK_TIMEOUT)
+
+
+def rollup_old_minutes(retention_days=RAW_RETENTION_DAYS, now=None):
+    """
+    Resume por fuente y hora y borra los minutos anteriores al corte de
+    retención. Las medias se ponderan por n (muestras de cada minuto; la
+    presión por n_presion) y, si una hora ya tenía resumen (minutos que
+    llegaron tarde), se combina igual. Devuelve minutos procesados.
+    """
+    now = now or datetime.now()
+    cutoff = database.to_epoch(now - timedelta(days=retention_days))
+    cutoff -= cutoff % HOUR  # solo horas completas
+
+    conn = _connect()
+    oldest = conn.execute('SELECT MIN(epoch) FROM sensor_data').fetchone()[0]
+    conn.close()
+    if oldest is None or oldest >= cutoff:
+        return 0
+
+    total = 0
+    start = oldest - oldest % HOUR
+    while start < cutoff:
+        end = min(start + ROLLUP_SLICE_HOURS * HOUR, cutoff)
+        conn = _connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+                INSERT INTO sensor_rollup_hourly
+                    (source, epoch, temperatura, temperatura_min, temperatura_max, humedad, presion, n, n_presion)
+                SELECT source, epoch - epoch % 3600,
+                       SUM(temperatura * n) / SUM(n), MIN(temperatura), MAX(temperatura),
+                       SUM(humedad * n) / SUM(n),
+                       SUM(presion * n_presion) / NULLIF(SUM(n_presion), 0),
+                       SUM(n), SUM(n_presion)
+                FROM sensor_data WHERE epoch >= ? AND epoch < ?
+                GROUP BY source, epoch - epoch % 3600
+                ON CONFLICT(source, epoch) DO UPDATE SET
+                    temperatura = (temperatura * n + excluded.temperatura * excluded.n) / (n + excluded.n),
+                    temperatura_min = MIN(temperatura_min, excluded.temperatura_min),
+                    temperatura_max = MAX(temperatura_max, excluded.temperatura_max),
+                    humedad = (humedad * n + excluded.humedad * excluded.n) / (n + excluded.n),
+                    presion = COALESCE(
+                        (COALESCE(presion, 0) * n_presion + COALESCE(excluded.presion, 0) * excluded.n_presion)
+                        / NULLIF(n_presion + excluded.n_presion, 0),
+                        presion, excluded.presion),
+                    n = n + excluded.n,
+                    n_presion = n_presion + excluded.n_presion
+            ''', (start, end))
+            cursor.execute('DELETE FROM sensor_data WHERE epoch >= ? AND epoch < ?', (start, end))
+            borrados = cursor.rowcount
+            total += borrados
+            conn.commit()
+            # Saltar directo al próximo minuto existente: con historial ralo la
+            # mayoría de los tramos estarían vacíos (índice por epoch)
+            siguiente = conn.execute('SELECT MIN(epoch) FROM sensor_data WHERE epoch >= ?', (end,)).fetchone()[0]
+        finally:
+            conn.close()
+        if siguiente is None:
+            break
+        start = siguiente - siguiente % HOUR
+        if borrados and start < cutoff:
+            time.sleep(SLICE_PAUSE)  # solo tras tramos que escribieron
+    return total
+
+
+def remove_old_files(now=None):
+    """CSVs de predicciones y particiones del almacén fuera de la retención"""
+    now = now or datetime.now()
+    removed = 0
+    limite_csv = time.time() - PREDICTION_CSV_RETENTION_DAYS * 86400
+    for path in glob.glob(os.path.join(database.BASE_DIR, 'predicciones_*_horas_por_minuto.csv')):
+        if os.path.getmtime(path) < limite_csv:
+            os.remove(path)
+            removed += 1
+
+    if SAMPLES_RETENTION_DAYS is not None:
+        store = database.get_sample_store()
+        if store.store_exists(database.SAMPLE_STORE_DIR):
+            antes = (now - timedelta(days=SAMPLES_RETENTION_DAYS)).replace(hour=0, minute=0, second=0, microsecond=0)
+            removed += len(store.drop_partitions(antes, store_dir=database.SAMPLE_STORE_DIR))
+    return removed
+
+
+def incremental_vacuum(max_slices=64):
+    """Libera páginas libres de a VACUUM_SLICE_PAGES; devuelve páginas liberadas"""
+    freed = 0
+    for _ in range(max_slices):
+        conn = _connect()
+        try:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:  # 2 = INCREMENTAL
+                return freed
+            free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if free == 0:
+                return freed
+            conn.execute(f'PRAGMA incremental_vacuum({VACUUM_SLICE_PAGES})').fetchall()
+            freed += min(free, VACUUM_SLICE_PAGES)
+        finally:
+            conn.close()
+        time.sleep(SLICE_PAUSE)
+    return freed
+
+
+def checkpoint_wal():
+    """wal_checkpoint(TRUNCATE); devuelve False si había lectores y no se pudo truncar"""
+    conn = _connect()
+    try:
+        busy, _, _ = conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+        return busy == 0
+    finally:
+        conn.close()
+
+
+def run_maintenance():
+    """Una pasada completa; los errores de lock se registran y se reintenta en la próxima"""
+    inicio = time.perf_counter()
+    resumen = {}
+    pasos = [
+        ('minutos_resumidos', rollup_old_minutes),
+        ('filas_prediccion_podadas', database.prune_old_runs),
+        ('archivos_borrados', remove_old_files),
+        ('paginas_liberadas', incremental_vacuum),
+        ('wal_truncado', checkpoint_wal),
+    ]
+    for nombre, paso in pasos:
+        try:
+            resumen[nombre] = paso()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"⚠️  Mantenimiento: '{nombre}' pospuesto ({e})")
+            resumen[nombre] = None
+    resumen['duracion_s'] = round(time.perf_counter() - inicio, 2)
+    logger.info(f"🧹 Mantenimiento de la DB: {resumen}")
+    return resumen
+
+
+def convert_to_incremental_vacuum():
+    """Activa auto_vacuum=INCREMENTAL en una DB existente (VACUUM completo: bloquea la DB)"""
+    conn = database.get_db_connection()
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    conn.execute('VACUUM')
+    modo = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+    conn.close()
+    return modo == 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retención y mantenimiento de clima.db")
+    parser.add_argument('--convertir-vacuum', action='store_true',
+                        help='Convierte la DB a auto_vacuum incremental (una vez; detener la app antes)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    database.init_database()
+    if args.convertir_vacuum:
+        ok = convert_to_incremental_vacuum()
+        print("✅ auto_vacuum incremental activo" if ok else "❌ No se pudo activar auto_vacuum incremental")
+        return
+    run_maintenance()
+
+
+if __name__ == '__main__':
+    main()
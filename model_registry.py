@@ -0,0 +1,276 @@
+"""
+Registro de modelos de pronóstico y recarga en caliente.
+
+modelos/registry.json lista los modelos desplegables, en orden de preferencia:
+
+    {
+      "activo": null,                      # nombre fijo, o null = el primero que cargue
+      "modelos": [
+        {"nombre": "tflite_simple", "version": "1.0", "backend": "tflite",
+         "archivo": "modelo stefano/modelo_simple_tflite.tflite",
+         "scaler": "modelo stefano/scaler_4_features_tflite.json",
+         "entrada": [1, 96]},
+        {..., "backend": "keras", "entrada": [1, 24, 4], "preferir_en": ["Windows"]}
+      ]
+    }
+
+Rutas relativas a modelos/. 'entrada' es la forma que debe tener el modelo
+(se verifica al cargar: un artefacto que no coincide se rechaza) y decide si
+la ventana se aplana (Dense) o va en 3D (LSTM). 'preferir_en' adelanta un
+modelo en esos sistemas (platform.system()); los que no existen en disco o
+no pueden cargarse (p. ej. Keras sin TensorFlow) se saltan.
+
+La versión que se guarda en cada corrida es '<nombre>@<version>+<sha256[:8]>':
+el hash del archivo distingue un artefacto reemplazado sin subir la versión.
+
+Para desplegar un modelo nuevo basta copiar el .tflite/.json y agregar o
+editar su entrada (subiendo la versión): ModeloVivo revisa cada
+POLL_SECONDS el manifiesto y los artefactos, carga y calienta el nuevo en
+segundo plano y lo intercambia de forma atómica. Los pronósticos en curso
+terminan con el modelo anterior; si el nuevo falla, sigue el anterior.
+
+Uso (proceso de inferencia, ver inference_worker.py):
+    vivo = model_registry.ModeloVivo()
+    vivo.iniciar_watcher()
+    modelo = vivo.actual()        # dict de predecir_futuro.cargar_modelo
+"""
+import hashlib
+import json
+import logging
+import platform
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+import features
+
+logger = logging.getLogger(__name__)
+
+MODELOS_DIR = Path(__file__).resolve().parent / 'modelos'
+REGISTRY_PATH = MODELOS_DIR / 'registry.json'
+POLL_SECONDS = 30     # cada cuánto el watcher revisa manifiesto y artefactos
+WARMUP_INVOKES = 3    # invocaciones de calentamiento por intérprete antes del swap
+BACKENDS = ('tflite', 'keras')
+
+
+def leer_manifiesto(path=REGISTRY_PATH):
+    manifiesto = json.loads(Path(path).read_text(encoding='utf-8'))
+    for entrada in manifiesto.get('modelos', []):
+        faltantes = [k for k in ('nombre', 'version', 'backend', 'archivo', 'scaler', 'entrada') if k not in entrada]
+        if faltantes:
+            raise ValueError(f"Entrada del registro sin {faltantes}: {entrada}")
+        if entrada['backend'] not in BACKENDS:
+            raise ValueError(f"Backend desconocido en '{entrada['nombre']}': {entrada['backend']}")
+    return manifiesto
+
+
+def _ruta(path, relativa):
+    return Path(path).resolve().parent / relativa
+
+
+def candidatos(manifiesto, path=REGISTRY_PATH, sistema=None):
+    """Entradas con archivos en disco, en orden de intento"""
+    sistema = sistema or platform.system()
+    entradas = [
+        e for e in manifiesto.get('modelos', [])
+        if _ruta(path, e['archivo']).exists() and _ruta(path, e['scaler']).exists()
+    ]
+    activo = manifiesto.get('activo')
+    if activo:
+        return [e for e in entradas if e['nombre'] == activo]
+    # sorted es estable: dentro de cada grupo se respeta el orden del manifiesto
+    return sorted(entradas, key=lambda e: sistema not in e.get('preferir_en', []))
+
+
+def huella(path=REGISTRY_PATH):
+    """(archivo, mtime_ns, tamaño) del manifiesto y de los artefactos que lista"""
+    archivos = [Path(path)]
+    try:
+        for e in leer_manifiesto(path).get('modelos', []):
+            archivos += [_ruta(path, e['archivo']), _ruta(path, e['scaler'])]
+    except (OSError, ValueError):
+        pass  # manifiesto a medio escribir: su propio mtime ya marca el cambio
+    firma = []
+    for archivo in archivos:
+        try:
+            st = archivo.stat()
+            firma.append((str(archivo), st.st_mtime_ns, st.st_size))
+        except OSError:
+            firma.append((str(archivo), None, None))
+    return tuple(firma)
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def cargar_entrada(entrada, path=REGISTRY_PATH):
+    """
+    Modelo listo para predecir_futuro.pronosticar: dict con predict, scaler,
+    usar_flatten, pool, salidas, nombre (archivo) y version. Falla si la forma de
+    entrada o el scaler no coinciden con el manifiesto.
+    """
+    import predecir_futuro as predecir
+    archivo = _ruta(path, entrada['archivo'])
+    forma = tuple(entrada['entrada'])
+    scaler = features.cargar_scaler(_ruta(path, entrada['scaler']))
+    if scaler.n_features_in_ != features.N_FEATURES:
+        raise ValueError(f"El scaler de '{entrada['nombre']}' tiene {scaler.n_features_in_} features, "
+                         f"se esperaban {features.N_FEATURES}")
+
+    pool = None
+    if entrada['backend'] == 'tflite':
+        # Pool propio por versión (no el compartido de get_pool, que es por
+        # ruta): el anterior sigue sirviendo hasta el swap
+        import interpreter_pool
+        pool = interpreter_pool.InterpreterPool(
+            archivo, size=predecir.TFLITE_POOL_SIZE, num_threads=predecir.TFLITE_NUM_THREADS
+        )
+        real = tuple(int(d) for d in pool.input_details[0]['shape'])
+        if real != forma:
+            raise ValueError(f"'{archivo.name}' tiene entrada {real}, el registro dice {forma}")
+        salidas = int(pool.output_details[0]['shape'][-1])
+
+        def predict(X_input):
+            with pool.lease() as interp:
+                return interp.predict(X_input)
+    else:
+        from tensorflow import keras
+        model = keras.models.load_model(archivo, compile=False)
+        real = tuple(model.input_shape[1:])
+        if real != forma[1:]:
+            raise ValueError(f"'{archivo.name}' tiene entrada {real}, el registro dice {forma[1:]}")
+        salidas = int(model.output_shape[-1])
+
+        def predict(X_input):
+            return model.predict(X_input, verbose=0)
+
+    return {
+        'predict': predict,
+        'scaler': scaler,
+        'usar_flatten': len(forma) == 2,
+        'pool': pool,
+        'nombre': archivo.name,
+        'entrada': forma,
+        'salidas': salidas,  # 1: temperatura; 3: ts, hr, p0
+        'version': f"{entrada['nombre']}@{entrada['version']}+{_sha256(archivo)[:8]}",
+    }
+
+
+def calentar(modelo, invocaciones=WARMUP_INVOKES):
+    """Primeras invocaciones (asignación de tensores, caches) antes de servir"""
+    X = np.zeros(modelo['entrada'], dtype=np.float32)
+    if modelo['pool'] is not None:
+        # Préstamos sucesivos recorren la cola: se calienta cada intérprete
+        for _ in range(modelo['pool'].size):
+            with modelo['pool'].lease() as interp:
+                for _ in range(invocaciones):
+                    interp.predict(X)
+    else:
+        for _ in range(invocaciones):
+            modelo['predict'](X)
+    return modelo
+
+
+def cargar_mejor(path=REGISTRY_PATH):
+    """Primer candidato del registro que carga y calienta sin errores"""
+    manifiesto = leer_manifiesto(path)
+    lista = candidatos(manifiesto, path)
+    errores = []
+    for entrada in lista:
+        try:
+            logger.info(f"🔄 Cargando modelo '{entrada['nombre']}' v{entrada['version']} ({entrada['backend']})")
+            inicio = time.perf_counter()
+            modelo = calentar(cargar_entrada(entrada, path))
+            logger.info(f"✅ Modelo {modelo['version']} listo en {time.perf_counter() - inicio:.2f} s")
+            return modelo
+        except Exception as e:
+            logger.error(f"❌ No se pudo cargar '{entrada['nombre']}': {type(e).__name__}: {e}")
+            errores.append(f"{entrada['nombre']}: {type(e).__name__}: {e}")
+    disponibles = ', '.join(e['nombre'] for e in manifiesto.get('modelos', []))
+    raise FileNotFoundError(
+        f"❌ Ningún modelo del registro pudo cargarse ({path}).\n"
+        f"   • En el registro: {disponibles or 'ninguno'}\n"
+        f"   • Con archivos en disco: {', '.join(e['nombre'] for e in lista) or 'ninguno'}"
+        + ''.join(f"\n   • {error}" for error in errores)
+    )
+
+
+class ModeloVivo:
+    """Modelo en uso del proceso de inferencia, reemplazable en caliente"""
+
+    def __init__(self, path=REGISTRY_PATH, poll_seconds=POLL_SECONDS):
+        self.path = Path(path)
+        self.poll_seconds = poll_seconds
+        self.recargas = 0
+        self.ultimo_error = None
+        self._modelo = None
+        self._huella = None          # huella con la que se cargó el modelo vivo
+        self._huella_fallida = None  # no reintentar el mismo artefacto roto
+        self._carga_lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def actual(self):
+        """Modelo vivo (la primera vez se carga acá). Tomar la referencia una vez por pronóstico."""
+        modelo = self._modelo
+        if modelo is None:
+            with self._carga_lock:
+                if self._modelo is None:
+                    huella_carga = huella(self.path)
+                    self._modelo, self._huella = cargar_mejor(self.path), huella_carga
+            modelo = self._modelo
+        return modelo
+
+    def revisar(self):
+        """Si cambió el registro o un artefacto, carga y calienta el mejor y lo intercambia; True si cambió"""
+        huella_actual = huella(self.path)
+        if self._modelo is None or huella_actual in (self._huella, self._huella_fallida):
+            return False
+        with self._carga_lock:
+            try:
+                nuevo = cargar_mejor(self.path)
+            except Exception as e:
+                self._huella_fallida = huella_actual
+                self.ultimo_error = f"{type(e).__name__}: {e}"
+                logger.error(f"❌ Recarga de modelo fallida; sigue {self._modelo['version']}")
+                return False
+            anterior = self._modelo
+            # Una sola asignación: quien ya tomó 'anterior' termina con él
+            self._modelo, self._huella = nuevo, huella_actual
+            self.recargas += 1
+            self.ultimo_error = None
+        if nuevo['version'] != anterior['version']:
+            logger.info(f"🔁 Modelo intercambiado: {anterior['version']} -> {nuevo['version']}")
+        return True
+
+    def _vigilar(self):
+        while not self._detener.wait(self.poll_seconds):
+            try:
+                self.revisar()
+            except Exception as e:
+                logger.error(f"❌ Error revisando el registro de modelos: {type(e).__name__}: {e}", exc_info=True)
+
+    def iniciar_watcher(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._vigilar, name='registro-modelos', daemon=True)
+            self._hilo.start()
+
+    def detener_watcher(self):
+        self._detener.set()
+
+    def estado(self):
+        modelo = self._modelo
+        return {
+            "modelo": modelo['nombre'] if modelo else None,
+            "version": modelo['version'] if modelo else None,
+            "recargas": self.recargas,
+            "ultimo_error": self.ultimo_error,
+        }
@@ -1,5 +1,6 @@
 # predecir_futuro_mod.py
 import os
+import io
 import sys
 import platform
 from pathlib import Path
@@ -7,153 +8,201 @@ import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import logging
+from contextlib import nullcontext
+
+import features
 
 os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
 
 # Configurar logger
 logger = logging.getLogger(__name__)
 
-def run_prediction(horas_futuro=6):
-    base_dir = Path(__file__).resolve().parent
-    
-    # Detectar sistema operativo
-    is_windows = platform.system() == "Windows"
+# Pool de intérpretes TFLite: size × num_threads no debe superar los núcleos
+# (Raspberry Pi 4: 2 × 2). Con más hilos que núcleos el invoke se degrada mucho.
+# El proceso de inferencia (inference_worker) es uno solo y atiende cada
+# conexión en su hilo: dos pronósticos a la vez (continuo + /api/predict)
+# toman un intérprete cada uno.
+TFLITE_POOL_SIZE = 2
+TFLITE_NUM_THREADS = max(1, (os.cpu_count() or 1) // TFLITE_POOL_SIZE)
+
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / "Codigos_arduinos" / "data"
+N_PASOS = features.N_PASOS
+N_FEATURES = features.N_FEATURES  # ts, hr, p0, hora_decimal
+
+def leer_ultimas_filas_csv(csv_path, n, bloque=8192):
+    """
+    Lee solo las últimas n filas de un CSV recorriéndolo desde el final por bloques.
+    El costo depende de n, no del tamaño del historial.
+    """
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        inicio_datos = f.tell()
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        datos = b''
+        # n + 1 saltos de línea garantizan n filas completas (la primera puede estar cortada)
+        while pos > inicio_datos and datos.count(b'\n') <= n:
+            leer = min(bloque, pos - inicio_datos)
+            pos -= leer
+            f.seek(pos)
+            datos = f.read(leer) + datos
+    lineas = [l for l in datos.splitlines() if l.strip()]
+    if pos > inicio_datos:
+        lineas = lineas[1:]  # primera línea posiblemente incompleta
+    texto = (header + b'\n'.join(lineas[-n:])).decode('utf-8')
+    return pd.read_csv(io.StringIO(texto))
+
+def cargar_modelo():
+    """
+    Carga y calienta el primer modelo disponible de modelos/registry.json
+    (ver model_registry.py: orden, backends, scaler y forma de entrada).
+    Devuelve un dict con predict, scaler, usar_flatten, pool, nombre (archivo)
+    y version ('<nombre>@<version>+<hash>', la que se guarda en cada corrida),
+    reutilizable entre pronósticos (ver rolling_forecast.py).
+    """
+    import model_registry
+
     is_raspberry = platform.machine() in ['armv7l', 'aarch64'] or 'raspberry' in platform.node().lower()
-    
-    logger.info(f"🖥️  Sistema: {platform.system()} ({platform.machine()})")
-    logger.info(f"   Windows: {is_windows}, Raspberry Pi: {is_raspberry}")
-    
-    # Rutas de modelos
-    model_tflite_simple_path = base_dir / "modelos" / "modelo stefano" / "modelo_simple_tflite.tflite"
-    model_h5_simple_path = base_dir / "modelos" / "modelo stefano" / "modelo_simple_tflite.h5"
-    scaler_tflite_path = base_dir / "modelos" / "modelo stefano" / "scaler_4_features_tflite.pkl"
-    
-    # LSTM antiguo (mejor precisión, requiere TensorFlow completo)
-    model_h5_lstm_path = base_dir / "modelos" / "modelo stefano" / "modelo_lstm_3_features (1).h5"
-    scaler_lstm_path = base_dir / "modelos" / "modelo stefano" / "scaler_4_features.pkl"
-    
-    csv_path = base_dir / "Codigos_arduinos" / "data" / "sensor_data.csv"
+    logger.info(f"🖥️  Sistema: {platform.system()} ({platform.machine()})"
+                f"{' - Raspberry Pi' if is_raspberry else ''}")
+    return model_registry.cargar_mejor()
+
+def _por_minuto(df):
+    """
+    Muestras crudas (timestamp, [source], temperatura, humedad, presion) ->
+    una fila por minuto, como sensor_data: media por fuente y minuto y luego
+    las fuentes combinadas ponderando por cantidad de muestras (presión por
+    las que la traen). Así el modelo recibe minutos, no muestras sueltas.
+    """
+    import database
+    agg = database._aggregate_by_minute(df)
+    pesos = pd.DataFrame({
+        'epoch': agg['epoch'],
+        'temperatura': agg['temperatura'] * agg['n'],
+        'humedad': agg['humedad'] * agg['n'],
+        'presion': agg['presion'].fillna(0) * agg['n_presion'],
+        'n': agg['n'],
+        'n_presion': agg['n_presion'],
+    }).groupby('epoch', sort=True).sum()
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(pesos.index, unit='s'),
+        'temperatura': (pesos['temperatura'] / pesos['n']).to_numpy(),
+        'humedad': (pesos['humedad'] / pesos['n']).to_numpy(),
+        'presion': (pesos['presion'] / pesos['n_presion'].where(pesos['n_presion'] > 0)).to_numpy(),
+    })
+
+def _ultimos_minutos(leer, n_pasos):
+    """
+    Últimos n_pasos minutos desde una fuente de muestras crudas: leer(n)
+    devuelve las últimas n muestras. Con varias muestras por minuto (o varias
+    fuentes) se piden más hasta juntar n_pasos minutos o agotar la fuente.
+    """
+    muestras = n_pasos * 4
+    while True:
+        crudas = leer(muestras)
+        df = _por_minuto(crudas)
+        if len(df) >= n_pasos or len(crudas) < muestras:
+            return df.tail(n_pasos).reset_index(drop=True)
+        muestras *= 2
+
+def _leer_anillo(ring_path, n):
+    """Últimas n muestras del anillo reciente (memmap, sin parsear)"""
+    import database
+    ring_file = database.get_ring_file()
+    registros = ring_file.RingFile(str(ring_path)).recent(n)
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(registros['epoch'], unit='s'),
+        'source': [ring_file.SOURCES[c] if c < len(ring_file.SOURCES) else 'unknown' for c in registros['source']],
+        'temperatura': registros['temperature'],
+        'humedad': registros['humidity'],
+        'presion': registros['pressure'],
+    })
+
+def ventana_minutos(n_pasos=N_PASOS):
+    """
+    Últimos n_pasos minutos de sensor_data (fuentes combinadas, índice por
+    epoch) como lista de dicts en orden cronológico. La comparten el
+    pronóstico manual y el continuo (rolling_forecast), así ambos reciben la
+    misma entrada. Lista vacía si la DB aún no existe.
+    """
+    import database
+    if not os.path.exists(database.DB_PATH):
+        return []
+    return database.get_sensor_data_since(limit=n_pasos)
+
+def cargar_ventana(n_pasos=N_PASOS):
+    """
+    Últimos n_pasos minutos (timestamp, temperatura, humedad, presion).
+    Se leen de sensor_data (ventana_minutos); si la DB aún no junta n_pasos
+    minutos (sin sincronizar todavía) se arman desde las muestras: anillo
+    reciente, almacén columnar o CSV, en ese orden, reducidas a minutos.
+    """
+    filas = ventana_minutos(n_pasos)
+    if len(filas) >= n_pasos:
+        df = pd.DataFrame(filas, columns=['timestamp', 'temperatura', 'humedad', 'presion'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df
+    logger.info(f"ℹ️  sensor_data tiene {len(filas)}/{n_pasos} minutos; se usan las muestras")
+
+    csv_path = DATA_DIR / "sensor_data.csv"
+    samples_dir = DATA_DIR / "samples"
+    ring_path = DATA_DIR / "recent_samples.ring"
+    usar_anillo = ring_path.exists()
+    usar_almacen = (samples_dir / "manifest.json").exists()
 
     # Comprobaciones
-    if not csv_path.exists():
+    if not usar_anillo and not usar_almacen and not csv_path.exists():
         raise FileNotFoundError(f"CSV no encontrado: {csv_path}")
 
-    # ===== ESTRATEGIA DE CARGA DE MODELOS =====
-    # Windows: Usar LSTM .h5 (mejor precisión, TensorFlow disponible)
-    # Raspberry Pi: Usar TFLite simple (compatible con tflite-runtime)
-    
-    model_predict = None
-    scaler = None
-    usar_flatten = False  # Flag para saber si necesitamos aplanar las secuencias
-    
-    import joblib
-    
-    # === WINDOWS: PRIORIDAD AL MODELO LSTM .h5 ===
-    if is_windows and model_h5_lstm_path.exists() and scaler_lstm_path.exists():
-        try:
-            logger.info(f"🪟 Windows detectado - Usando modelo LSTM de alta precisión")
-            logger.info(f"🔄 Cargando modelo LSTM: {model_h5_lstm_path.name}")
-            
-            import tensorflow as tf
-            from tensorflow import keras
-            
-            model = keras.models.load_model(model_h5_lstm_path, compile=False)
-            scaler = joblib.load(scaler_lstm_path)
-            
-            model_predict = lambda X: model.predict(X, verbose=0)
-            usar_flatten = False  # LSTM usa secuencias 3D
-            logger.info(f"✅ Modelo LSTM .h5 cargado exitosamente (Windows)")
-            
-        except Exception as e:
-            logger.error(f"❌ Error cargando LSTM en Windows: {type(e).__name__}: {str(e)}")
-            logger.info(f"⚠️  Fallback a TFLite...")
-            model_predict = None
-    
-    # === RASPBERRY PI: MODELO TFLITE ===
-    if model_predict is None and model_tflite_simple_path.exists() and scaler_tflite_path.exists():
-        try:
-            if is_raspberry:
-                logger.info(f"🥧 Raspberry Pi detectado - Usando modelo TFLite optimizado")
-            logger.info(f"🔄 Intentando modelo TFLite simple: {model_tflite_simple_path.name}")
-            
-            # Cargar scaler
-            scaler = joblib.load(scaler_tflite_path)
-            logger.info(f"✅ Scaler cargado: {scaler_tflite_path.name}")
-            
-            # Intentar cargar con tflite_runtime (sin TensorFlow)
-            try:
-                import tflite_runtime.interpreter as tflite
-                logger.info(f"✅ Usando tflite_runtime (sin TensorFlow)")
-            except ImportError:
-                # Fallback a tensorflow.lite
-                import tensorflow as tf
-                tflite = tf.lite
-                logger.info(f"⚠️  tflite_runtime no disponible, usando tensorflow.lite")
-            
-            logger.info(f"📂 Cargando modelo desde: {model_tflite_simple_path}")
-            interpreter = tflite.Interpreter(model_path=str(model_tflite_simple_path))
-            interpreter.allocate_tensors()
-            
-            input_details = interpreter.get_input_details()
-            output_details = interpreter.get_output_details()
-            logger.info(f"📊 Input shape: {input_details[0]['shape']}, dtype: {input_details[0]['dtype']}")
-            logger.info(f"📊 Output shape: {output_details[0]['shape']}, dtype: {output_details[0]['dtype']}")
-            
-            def predict_tflite(X_input):
-                interpreter.set_tensor(input_details[0]['index'], X_input.astype(np.float32))
-                interpreter.invoke()
-                return interpreter.get_tensor(output_details[0]['index'])
-            
-            model_predict = predict_tflite
-            usar_flatten = True  # Modelo Dense necesita entrada aplanada
-            logger.info(f"✅ Modelo TFLite simple cargado exitosamente")
-            
-        except Exception as e:
-            logger.error(f"❌ Error cargando TFLite simple: {type(e).__name__}: {str(e)}")
-            logger.exception("Traceback completo del error TFLite:")
-            model_predict = None
-    
-    # === FALLBACK FINAL: Intentar cualquier modelo disponible ===
-    if model_predict is None and model_h5_lstm_path.exists() and scaler_lstm_path.exists():
-        try:
-            logger.info(f"🔄 Último intento: Cargando modelo LSTM .h5 con TensorFlow...")
-            
-            import tensorflow as tf
-            from tensorflow import keras
-            
-            model = keras.models.load_model(model_h5_lstm_path, compile=False)
-            scaler = joblib.load(scaler_lstm_path)
-            
-            model_predict = lambda X: model.predict(X, verbose=0)
-            usar_flatten = False  # LSTM usa secuencias 3D
-            logger.info(f"✅ Modelo LSTM .h5 cargado exitosamente")
-                
-        except ImportError:
-            logger.error("❌ TensorFlow no está instalado, no se puede cargar LSTM")
-            raise ImportError(
-                "❌ No se pudo cargar ningún modelo.\n"
-                "   • TFLite simple no está disponible o falló\n"
-                "   • LSTM .h5 requiere TensorFlow (no instalado)\n"
-                "   Solución: Instala 'tensorflow' o entrena el modelo TFLite simple"
-            )
-        except Exception as e:
-            raise RuntimeError(f"❌ Error cargando modelo LSTM: {e}")
-    elif model_predict is None:
-        raise FileNotFoundError(
-            "❌ No se encontró ningún modelo disponible:\n"
-            f"   • TFLite simple: {model_tflite_simple_path.name} ({'✅' if model_tflite_simple_path.exists() else '❌'})\n"
-            f"   • LSTM .h5: {model_h5_lstm_path.name} ({'✅' if model_h5_lstm_path.exists() else '❌'})"
-        )
-    
-    # Verificar que tenemos modelo y scaler
-    if model_predict is None or scaler is None:
-        raise RuntimeError("No se pudo inicializar el modelo correctamente")
+    if usar_anillo:
+        # Anillo reciente: vista memmap de los últimos registros, sin parsear ni copiar
+        df = _ultimos_minutos(lambda n: _leer_anillo(ring_path, n), n_pasos)
+        if len(df) >= n_pasos or not (usar_almacen or csv_path.exists()):
+            return df
+        logger.info(f"ℹ️  El anillo tiene {len(df)}/{n_pasos} minutos; se usa el almacén/CSV")
+
+    columnas = {'temperature': 'temperatura', 'humidity': 'humedad', 'pressure': 'presion'}
+    if usar_almacen:
+        # Almacén columnar: solo las últimas particiones necesarias para la ventana
+        import database
+        store = database.get_sample_store()
+
+        def leer(n):
+            return store.to_dataframe(
+                store.read_tail(n, columns=['epoch', 'source', 'temperature', 'humidity', 'pressure'],
+                                store_dir=str(samples_dir)),
+                store_dir=str(samples_dir)
+            ).rename(columns=columnas)
+    else:
+        # CSV antiguo: leer desde el final solo la ventana necesaria
+        def leer(n):
+            df = leer_ultimas_filas_csv(csv_path, n).rename(columns=columnas)
+            df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+            return df
+
+    # Solo la ventana final: el costo no crece con el historial
+    return _ultimos_minutos(leer, n_pasos)
+
+def pronosticar(modelo, df, n_predicciones):
+    """
+    Pronóstico autoregresivo por minuto a partir de la ventana df (al menos
+    N_PASOS filas). Devuelve un DataFrame con timestamp, temperatura_predicha
+    (+ humedad/presion_predicha con modelos multi-salida) y offsets.
+    """
+    n_pasos = N_PASOS
+    scaler = modelo['scaler']
+    usar_flatten = modelo['usar_flatten']
+    pool = modelo['pool']
+    model_predict = modelo['predict']
+    # Multi-salida (ts, hr, p0 en una invocación) según la forma de salida del modelo
+    multi_salida = modelo['salidas'] >= 3
+    if n_predicciones <= 0:
+        raise ValueError(f"n_predicciones debe ser mayor que 0 (recibido {n_predicciones})")
+    df = df.tail(n_pasos).reset_index(drop=True)
 
-    df = pd.read_csv(csv_path)
-    
     # Verificar columnas requeridas
-    feature_mapping = {'temperatura': 'ts', 'humedad': 'hr', 'presion': 'p0'}
-    missing = [col for col in feature_mapping.keys() if col not in df.columns]
+    missing = [col for col in features.FEATURES[:3] if col not in df.columns]
     if missing:
         raise ValueError(f"Columnas faltantes en CSV: {missing}")
     
@@ -164,75 +213,74 @@ def run_prediction(horas_futuro=6):
     # Convertir timestamp a datetime
     df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
     
-    # Extraer hora_decimal del timestamp (igual que en el entrenamiento)
-    df['hora_decimal'] = df['timestamp'].dt.hour + df['timestamp'].dt.minute / 60.0
-    
-    # Preparar datos con las 4 features (temperatura, humedad, presión, hora_decimal)
-    feature_cols = list(feature_mapping.keys()) + ['hora_decimal']
-    X_raw = df[feature_cols].astype(float).to_numpy()
-    
-    n_pasos = 24
-    n_features = 4  # ts, hr, p0, hora_decimal
-    # ahora por minuto
-    n_predicciones = horas_futuro * 60
-
-    if len(X_raw) < n_pasos:
+    if len(df) < n_pasos:
         raise ValueError("Datos insuficientes para la ventana del modelo")
 
-    X_scaled = scaler.transform(X_raw)
-    ventana_actual = X_scaled[-n_pasos:].copy()
+    # Mismas features que el entrenamiento (ver features.py): presión en hPa,
+    # hora_decimal escalada, float32
+    X_raw, factor_presion = features.matriz_features(df)
+    ventana_actual = features.escalar(X_raw, scaler)
     
     # Obtener último timestamp para calcular timestamps futuros
     ultimo_timestamp = df['timestamp'].iloc[-1]
+    horas_futuras = features.horas_futuras(ultimo_timestamp, n_predicciones, scaler)
 
-    predicciones_temp = []
-    for i in range(n_predicciones):
-        # Preparar input según el tipo de modelo
-        if usar_flatten:
-            # Modelo Dense (TFLite simple): aplanar ventana
-            X_input = ventana_actual.flatten().reshape(1, -1)
-        else:
-            # Modelo LSTM: mantener forma 3D
-            X_input = ventana_actual.reshape(1, n_pasos, n_features)
-        
-        pred_scaled = model_predict(X_input)[0][0]
+    # Un intérprete del pool en exclusiva durante todo el pronóstico
+    with (pool.lease() if pool is not None else nullcontext()) as interp:
+        if interp is not None:
+            model_predict = interp.predict
+        predicciones_temp = []
+        for i in range(n_predicciones):
+            # Preparar input según el tipo de modelo
+            if usar_flatten:
+                # Modelo Dense (TFLite simple): aplanar ventana
+                X_input = ventana_actual.reshape(1, -1)
+            else:
+                # Modelo LSTM: mantener forma 3D
+                X_input = ventana_actual.reshape(1, n_pasos, N_FEATURES)
         
-        # Calcular timestamp futuro
-        timestamp_futuro = ultimo_timestamp + timedelta(minutes=i+1)
-        hora_decimal_futuro = timestamp_futuro.hour + timestamp_futuro.minute / 60.0
+            salida = np.asarray(model_predict(X_input)).reshape(-1)
         
-        # Mantener últimos valores de humedad y presión (escalados)
-        ultima_hr_scaled = ventana_actual[-1, 1]
-        ultima_p0_scaled = ventana_actual[-1, 2]
+            if multi_salida:
+                # Modelo multi-salida: una sola invocación da [ts, hr, p0] (escalados)
+                pred_scaled = salida[:3]
+            else:
+                # Modelo de una salida: mantener últimos valores de humedad y presión (escalados)
+                pred_scaled = np.array([salida[0], ventana_actual[-1, 1], ventana_actual[-1, 2]])
         
-        # Crear nuevo registro con las 4 features
-        nuevo_registro_scaled = np.array([
-            pred_scaled,           # temperatura predicha (escalada)
-            ultima_hr_scaled,      # humedad (escalada)
-            ultima_p0_scaled,      # presión (escalada)
-            hora_decimal_futuro    # hora_decimal (no escalada, ya está en [0, 24))
-        ])
-        
-        ventana_actual = np.vstack([ventana_actual[1:], nuevo_registro_scaled])
-        predicciones_temp.append(pred_scaled)
+            # Nuevo minuto: predicción + hora_decimal escalada del minuto futuro
+            ventana_actual = np.roll(ventana_actual, -1, axis=0)
+            ventana_actual[-1, :3] = pred_scaled
+            ventana_actual[-1, features.COLUMNA_HORA] = horas_futuras[i]
+            predicciones_temp.append(pred_scaled)
 
-    predicciones_array = np.array(predicciones_temp).reshape(-1, 1)
-    dummy = np.zeros((len(predicciones_array), n_features))
-    dummy[:, 0] = predicciones_array.flatten()
-    dummy[:, 1] = X_scaled[-1, 1]  # última humedad
-    dummy[:, 2] = X_scaled[-1, 2]  # última presión
-    dummy[:, 3] = 0  # hora_decimal (no afecta al inverse_transform de temperatura)
-    predicciones_reales = scaler.inverse_transform(dummy)[:, 0]
+    predicciones_array = np.array(predicciones_temp)
+    predicciones_reales = np.column_stack([
+        features.desescalar_columna(predicciones_array[:, j], scaler, j) for j in range(3)
+    ])
 
     # timestamps por minuto a partir del último timestamp en CSV
     timestamps_futuros = [ultimo_timestamp + timedelta(minutes=i+1) for i in range(n_predicciones)]
     resultado_df = pd.DataFrame({
         'timestamp': timestamps_futuros,
-        'temperatura_predicha': predicciones_reales,
+        'temperatura_predicha': predicciones_reales[:, 0],
         'minutos_desde_inicio': range(1, n_predicciones + 1),
         'horas_desde_inicio': [ (i+1)/60 for i in range(n_predicciones) ]
     })
+    if multi_salida:
+        resultado_df['humedad_predicha'] = predicciones_reales[:, 1]
+        resultado_df['presion_predicha'] = predicciones_reales[:, 2] / factor_presion  # unidad del sensor
+    logger.info(f"📈 Variables pronosticadas: {'temperatura, humedad, presión' if multi_salida else 'temperatura'}")
+
+    return resultado_df
+
+def run_prediction(horas_futuro=6, modelo=None):
+    """Pronóstico de 'horas_futuro' a CSV; 'modelo' (de cargar_modelo) evita recargarlo"""
+    df = cargar_ventana(N_PASOS)
+    modelo = modelo or cargar_modelo()
+    # ahora por minuto
+    resultado_df = pronosticar(modelo, df, horas_futuro * 60)
 
-    output_path = base_dir / f"predicciones_{horas_futuro}_horas_por_minuto.csv"
+    output_path = BASE_DIR / f"predicciones_{horas_futuro}_horas_por_minuto.csv"
     resultado_df.to_csv(output_path, index=False)
     return str(output_path)
@@ -1,29 +1,62 @@
 """
-Regenerar scaler compatible con NumPy 1.x para Raspberry Pi
+Exportar scalers .pkl (StandardScaler de scikit-learn) a JSON.
+
+El predictor carga el JSON (mean_/scale_, ver features.cargar_scaler) y no
+importa scikit-learn ni joblib, así que un .pkl guardado con otra versión de
+NumPy ya no rompe la Raspberry Pi. Los notebooks de entrenamiento exportan
+el JSON al guardar el scaler; este script es para los .pkl que ya existen y
+se corre donde esté instalado scikit-learn (el PC de entrenamiento).
+
+Uso:
+    python regenerar_scaler.py
+    python regenerar_scaler.py "modelos/modelo stefano/scaler_ligero1.pkl"
 """
-import joblib
-import numpy as np
+import argparse
 from pathlib import Path
-from sklearn.preprocessing import StandardScaler
 
-# Rutas
+import numpy as np
+
+import features
+
 base_dir = Path(__file__).parent
-scaler_path = base_dir / "modelos" / "modelo stefano" / "scaler_4_features_tflite.pkl"
+modelos_dir = base_dir / "modelos" / "modelo stefano"
+
+# Scalers que usan predecir_futuro.py y backtest.py
+SCALERS = [
+    modelos_dir / "scaler_4_features_tflite.pkl",
+    modelos_dir / "scaler_4_features.pkl",
+]
+
+
+def exportar(pkl_path):
+    """Escribe <pkl>.json junto al .pkl y verifica que transforme igual"""
+    import joblib
+    scaler = joblib.load(pkl_path)
+    nombres = getattr(scaler, 'feature_names_in_', None)
+    json_path = features.guardar_scaler(scaler, pkl_path.with_suffix('.json'), nombres)
+
+    escalador = features.cargar_scaler(json_path)
+    prueba = np.array([[20.0, 60.0, 950.0, 15.0]])[:, :escalador.n_features_in_]
+    diferencia = np.max(np.abs(escalador.transform(prueba) - scaler.transform(prueba)))
+    if diferencia > 1e-4:
+        raise ValueError(f"El JSON no reproduce el scaler ({diferencia:.2e})")
+    return json_path, escalador
 
-print(f"📂 Cargando scaler desde: {scaler_path}")
 
-# Cargar scaler existente
-scaler = joblib.load(scaler_path)
+def main():
+    parser = argparse.ArgumentParser(description="Exporta scalers .pkl a JSON (mean_/scale_)")
+    parser.add_argument('pkl', nargs='*', type=Path, default=SCALERS)
+    args = parser.parse_args()
 
-print(f"✅ Scaler cargado exitosamente")
-print(f"   • mean_: {scaler.mean_}")
-print(f"   • scale_: {scaler.scale_}")
-print(f"   • n_features_in_: {scaler.n_features_in_}")
+    for pkl_path in args.pkl:
+        print(f"📂 Exportando: {pkl_path}")
+        json_path, escalador = exportar(pkl_path)
+        print(f"✅ {json_path.name} ({json_path.stat().st_size} bytes)")
+        print(f"   • features: {escalador.features}")
+        print(f"   • mean_: {escalador.mean_}")
+        print(f"   • scale_: {escalador.scale_}")
+    print(f"\n🚀 Commitea los .json: la Raspberry Pi ya no necesita scikit-learn para predecir")
 
-# Guardar de nuevo con protocolo compatible
-print(f"\n💾 Guardando scaler con protocolo pickle 4 (compatible NumPy 1.x)...")
-joblib.dump(scaler, scaler_path, protocol=4)
 
-print(f"✅ Scaler regenerado exitosamente!")
-print(f"   • Tamaño: {scaler_path.stat().st_size} bytes")
-print(f"\n🚀 Ahora commitea y pushea este archivo a la Raspberry Pi")
+if __name__ == '__main__':
+    main()
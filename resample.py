@@ -0,0 +1,231 @@
+"""
+Remuestreo por streaming de CSVs de muestras (5 s, 5 min, ...) al formato de
+modelos/sensor_data_resampled.csv (timestamp, temperatura, humedad, presion).
+
+Reemplaza a scripts/check_resample.py (que cargaba todo el CSV en memoria):
+
+    - Lee los CSV por bloques de --filas filas (pandas chunksize) y reduce cada
+      bloque a estadísticos parciales por intervalo (suma, conteo, suma de
+      cuadrados, mín, máx, primero, último), que se combinan exactamente.
+    - El último intervalo de cada bloque queda abierto y se combina con el
+      bloque siguiente: un intervalo partido entre bloques o archivos se
+      agrega bien. Solo se escriben los intervalos cerrados, así la memoria
+      depende de --filas y no del tamaño de la entrada.
+    - Varias frecuencias (--freq) y agregaciones (--agg) en una sola pasada.
+
+Se asume entrada ordenada por tiempo (como la escribe la adquisición). Con
+--tolerancia los intervalos quedan abiertos ese tiempo extra para muestras
+desordenadas; las que llegan después de cerrado su intervalo se descartan y
+se informan.
+
+Uso:
+    python resample.py Codigos_arduinos/data/sensor_data.csv
+    python resample.py archivo/*.csv --freq 1min 5min 1h --agg mean min max -o modelos/resampled.csv
+"""
+import argparse
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from backfill import COLUMN_ALIASES
+
+logger = logging.getLogger(__name__)
+
+SALIDA = os.path.join('modelos', 'sensor_data_resampled.csv')
+FILAS_BLOQUE = 200000    # filas de CSV por bloque leído
+VARIABLES = ['temperatura', 'humedad', 'presion']
+AGREGACIONES = ['mean', 'min', 'max', 'sum', 'count', 'std', 'first', 'last']
+FORMATO_TIMESTAMP = '%Y-%m-%d %H:%M:%S'
+
+# Estadístico parcial -> cómo se combinan dos parciales del mismo intervalo
+COMBINAR = {
+    'sum': 'sum', 'count': 'sum', 'sumsq': 'sum',
+    'min': 'min', 'max': 'max', 'first': 'first', 'last': 'last',
+}
+
+
+def _parciales(valores, intervalo):
+    """Estadísticos parciales por intervalo de un bloque (columnas (estadístico, variable))"""
+    g = valores.groupby(intervalo, sort=True)
+    return pd.concat({
+        'sum': g.sum(),
+        'count': g.count(),
+        'sumsq': (valores ** 2).groupby(intervalo, sort=True).sum(),
+        'min': g.min(),
+        'max': g.max(),
+        'first': g.first(),
+        'last': g.last(),
+    }, axis=1)
+
+
+def _finalizar(parciales, agregaciones):
+    """Intervalos cerrados -> DataFrame de salida (timestamp + una columna por variable y agregación)"""
+    salida = pd.DataFrame(index=parciales.index)
+    for var in parciales['sum'].columns:
+        n = parciales['count'][var]
+        media = parciales['sum'][var] / n.where(n > 0)
+        for agg in agregaciones:
+            col = var if len(agregaciones) == 1 else f"{var}_{agg}"
+            if agg == 'mean':
+                salida[col] = media
+            elif agg == 'std':
+                var_muestral = (parciales['sumsq'][var] - n * media ** 2) / (n - 1).where(n > 1)
+                salida[col] = np.sqrt(var_muestral.clip(lower=0))
+            elif agg == 'count':
+                salida[col] = n.astype(np.int64)
+            else:
+                salida[col] = parciales[agg][var]
+    salida = salida[(parciales['count'] > 0).any(axis=1)]  # intervalos sin ningún valor numérico
+    salida.index.name = 'timestamp'
+    return salida.reset_index()
+
+
+class Remuestreo:
+    """Estado de una frecuencia: intervalos abiertos y CSV de salida"""
+
+    def __init__(self, freq, salida, agregaciones, tolerancia=None):
+        self.freq = freq
+        self.salida = salida
+        self.agregaciones = agregaciones
+        self.tolerancia = pd.Timedelta(tolerancia) if tolerancia else pd.Timedelta(0)
+        self.abiertos = None      # parciales de los intervalos aún no escritos
+        self.corte = None         # intervalos < corte ya escritos
+        self.intervalos = 0
+        self.descartadas = 0
+        self._encabezado = True
+
+    def agregar(self, ts, valores):
+        intervalo = ts.dt.floor(self.freq)
+        if self.corte is not None:
+            tardias = (intervalo < self.corte).to_numpy()
+            if tardias.any():
+                self.descartadas += int(tardias.sum())
+                intervalo, valores = intervalo[~tardias], valores[~tardias]
+        if len(intervalo) == 0:
+            return
+        parciales = _parciales(valores, intervalo)
+        if self.abiertos is not None:
+            combinado = pd.concat([self.abiertos, parciales])
+            parciales = combinado.groupby(level=0, sort=True).agg(
+                {col: COMBINAR[col[0]] for col in combinado.columns}
+            )
+        # Cerrados: todos salvo el último intervalo visto (y los dentro de la tolerancia)
+        corte = (parciales.index.max() - self.tolerancia).floor(self.freq)
+        cerrados = parciales.index < corte
+        self._escribir(parciales[cerrados])
+        self.abiertos = parciales[~cerrados]
+        self.corte = corte if self.corte is None else max(self.corte, corte)
+
+    def cerrar(self):
+        if self.abiertos is not None:
+            self._escribir(self.abiertos)
+            self.abiertos = None
+
+    def _escribir(self, parciales):
+        if len(parciales) == 0:
+            return
+        df = _finalizar(parciales, self.agregaciones)
+        df.to_csv(self.salida, mode='w' if self._encabezado else 'a', header=self._encabezado,
+                  index=False, date_format=FORMATO_TIMESTAMP)
+        self._encabezado = False
+        self.intervalos += len(df)
+
+
+def _columnas(path):
+    """{nombre canónico: columna del CSV} según COLUMN_ALIASES"""
+    cabecera = pd.read_csv(path, nrows=0).columns
+    cols = {k: next((a for a in alias if a in cabecera), None)
+            for k, alias in COLUMN_ALIASES.items() if k in ('timestamp', *VARIABLES)}
+    faltantes = [k for k in ('timestamp', 'temperatura', 'humedad') if cols[k] is None]
+    if faltantes:
+        raise ValueError(f"Columnas requeridas no encontradas en {path}: {faltantes}")
+    return {k: v for k, v in cols.items() if v is not None}
+
+
+def iter_bloques(paths, filas=FILAS_BLOQUE):
+    """(timestamps, DataFrame de VARIABLES) por bloque de cada CSV, en orden"""
+    for path in paths:
+        cols = _columnas(path)
+        logger.info(f"📥 Leyendo {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+        for bloque in pd.read_csv(path, usecols=list(cols.values()), chunksize=filas):
+            bloque = bloque.rename(columns={v: k for k, v in cols.items()})
+            ts = pd.to_datetime(bloque['timestamp'], errors='coerce')
+            if ts.dt.tz is not None:
+                ts = ts.dt.tz_localize(None)
+            valores = pd.DataFrame(
+                {var: pd.to_numeric(bloque[var], errors='coerce') if var in bloque else np.nan for var in VARIABLES},
+                index=bloque.index,
+            )
+            validas = ts.notna()
+            yield ts[validas], valores[validas]
+
+
+def ruta_salida(salida, freq, varias):
+    """Con varias frecuencias cada una va a su archivo: <salida>_<freq>.csv"""
+    if not varias:
+        return salida
+    base, ext = os.path.splitext(salida)
+    return f"{base}_{freq}{ext or '.csv'}"
+
+
+def remuestrear(paths, salida=SALIDA, freqs=('1min',), agregaciones=('mean',), filas=FILAS_BLOQUE,
+                tolerancia=None):
+    """Remuestrea los CSV; devuelve dict con filas leídas y, por frecuencia, archivo e intervalos"""
+    for agg in agregaciones:
+        if agg not in AGREGACIONES:
+            raise ValueError(f"Agregación desconocida: {agg} (opciones: {', '.join(AGREGACIONES)})")
+    for freq in freqs:
+        pd.Timedelta(pd.tseries.frequencies.to_offset(freq))  # falla antes de leer si la frecuencia no es fija
+    inicio = time.perf_counter()
+    estados = [
+        Remuestreo(freq, ruta_salida(salida, freq, len(freqs) > 1), list(agregaciones), tolerancia)
+        for freq in freqs
+    ]
+    filas_leidas = 0
+    for ts, valores in iter_bloques(paths, filas):
+        filas_leidas += len(ts)
+        for estado in estados:
+            estado.agregar(ts, valores)
+    for estado in estados:
+        estado.cerrar()
+
+    segundos = time.perf_counter() - inicio
+    return {
+        'filas_leidas': filas_leidas,
+        'segundos': round(segundos, 2),
+        'filas_s': round(filas_leidas / segundos) if segundos > 0 else None,
+        'salidas': [
+            {'freq': e.freq, 'archivo': e.salida, 'intervalos': e.intervalos, 'descartadas': e.descartadas}
+            for e in estados
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remuestreo por streaming de CSVs de muestras")
+    parser.add_argument('csv', nargs='+', help='CSV de entrada en orden (timestamp, temperatura/temperature, ...)')
+    parser.add_argument('-o', '--salida', default=SALIDA, help='CSV de salida (con varias --freq, sufijo _<freq>)')
+    parser.add_argument('--freq', nargs='+', default=['1min'], help='Frecuencias de pandas: 1min 5min 1h ...')
+    parser.add_argument('--agg', nargs='+', default=['mean'], choices=AGREGACIONES, help='Agregaciones')
+    parser.add_argument('--filas', type=int, default=FILAS_BLOQUE, help='Filas por bloque leído')
+    parser.add_argument('--tolerancia', default=None, help='Espera extra para muestras desordenadas (p. ej. 5min)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    for path in args.csv:
+        if not os.path.exists(path):
+            raise SystemExit(f"❌ CSV no encontrado: {path}")
+
+    r = remuestrear(args.csv, args.salida, args.freq, args.agg, args.filas, args.tolerancia)
+    print(f"✅ {r['filas_leidas']:,} filas leídas en {r['segundos']} s ({r['filas_s']:,} filas/s)")
+    for s in r['salidas']:
+        print(f"   {s['freq']:>6}: {s['intervalos']:,} intervalos -> {s['archivo']}")
+        if s['descartadas']:
+            print(f"   ⚠️  {s['descartadas']:,} muestras llegaron con su intervalo ya cerrado (ver --tolerancia)")
+
+
+if __name__ == '__main__':
+    main()
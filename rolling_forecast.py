@@ -0,0 +1,125 @@
+"""
+Pronóstico continuo (rolling).
+
+Cada vez que la sincronización ingiere minutos nuevos en sensor_data, la
+ventana avanza con esas observaciones reales y se recalcula el horizonte, sin
+que nadie tenga que lanzar /api/predict. El modelo y la ventana (últimos
+N_PASOS minutos) viven en memoria entre actualizaciones: por actualización se
+leen de la DB solo esos N_PASOS minutos (por clave primaria) y se hace una
+invocación por paso del horizonte. Como la sincronización también corrige
+minutos ya guardados (muestras atrasadas), la ventana se compara completa y
+no solo por su último minuto.
+
+El pronóstico es autoregresivo, así que una observación nueva cambia todos los
+pasos posteriores: el horizonte afectado es el que empieza en ese minuto, y es
+lo único que se recalcula (no se recarga modelo ni historial).
+
+La inferencia corre en el proceso aislado de inference_worker (modelo
+residente, prioridad baja); acá solo se arma la ventana y se guarda la corrida.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+
+import database
+import inference_worker
+import predecir_futuro as predecir
+
+logger = logging.getLogger(__name__)
+
+ROLLING_HORAS = 6  # horizonte del pronóstico continuo
+
+
+class RollingForecast:
+    """Ventana de minutos reales + modelo cargado, avanzados minuto a minuto"""
+
+    def __init__(self, horas=ROLLING_HORAS):
+        self.horas = horas
+        self.modelo = None  # versión del modelo que usó el proceso de inferencia (registro)
+        self.ventana = []  # filas de sensor_data en orden cronológico
+        self.ultimo_minuto = None
+        self.ultima_actualizacion = None
+        self.ultima_duracion_ms = None
+        self.ultimo_run_id = None
+        self.errores = 0
+        self._lock = threading.Lock()
+
+    def avanzar(self):
+        """
+        Relee los últimos N_PASOS minutos; devuelve (ventana, cuántos son nuevos
+        o cambiaron). No toca self.ventana: se reemplaza recién cuando la
+        corrida quedó guardada, así un fallo de la inferencia se reintenta con
+        la próxima sincronización aunque no lleguen minutos nuevos.
+        """
+        ventana = predecir.ventana_minutos(predecir.N_PASOS)
+        anteriores = {fila['timestamp']: fila for fila in self.ventana}
+        cambios = sum(1 for fila in ventana if anteriores.get(fila['timestamp']) != fila)
+        return ventana, cambios
+
+    def actualizar(self):
+        """
+        Avanza la ventana y, si hubo minutos nuevos o corregidos, recalcula el
+        horizonte y lo guarda como corrida nueva (pasa a ser la vigente).
+        Devuelve filas escritas.
+        """
+        with self._lock:
+            ventana, cambios = self.avanzar()
+            if cambios == 0:
+                return 0
+            if len(ventana) < predecir.N_PASOS:
+                logger.debug(f"ℹ️  Pronóstico continuo: {len(ventana)}/{predecir.N_PASOS} minutos en la ventana")
+                return 0
+
+            inicio = time.perf_counter()
+            resultado_df, self.modelo = inference_worker.get_worker().pronosticar(ventana, self.horas * 60)
+            self.ultima_duracion_ms = (time.perf_counter() - inicio) * 1000
+            self.ultimo_run_id = database.save_predictions(
+                resultado_df, model_version=self.modelo,
+                source='rolling', duration_ms=self.ultima_duracion_ms
+            )
+            # Recién ahora: si algo de lo anterior falló, la ventana vieja fuerza el reintento
+            self.ventana = ventana
+            self.ultimo_minuto = ventana[-1]['timestamp']
+            self.ultima_actualizacion = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            logger.info(
+                f"🔁 Pronóstico continuo desde {self.ultimo_minuto}: corrida #{self.ultimo_run_id}, "
+                f"{len(resultado_df)} minutos en {self.ultima_duracion_ms:.0f} ms"
+            )
+            return len(resultado_df)
+
+    def status(self):
+        return {
+            "horas": self.horas,
+            "ultimo_minuto": self.ultimo_minuto,
+            "ventana": len(self.ventana),
+            "ultima_actualizacion": self.ultima_actualizacion,
+            "ultima_duracion_ms": self.ultima_duracion_ms,
+            "ultimo_run_id": self.ultimo_run_id,
+            "modelo": self.modelo,
+            "errores": self.errores,
+        }
+
+
+_servicio = None
+_servicio_lock = threading.Lock()
+
+
+def get_service():
+    """Servicio compartido por proceso"""
+    global _servicio
+    with _servicio_lock:
+        if _servicio is None:
+            _servicio = RollingForecast()
+        return _servicio
+
+
+def on_new_data():
+    """Llamar tras cada sincronización con minutos nuevos; nunca propaga errores"""
+    servicio = get_service()
+    try:
+        return servicio.actualizar()
+    except Exception as e:
+        servicio.errores += 1
+        logger.error(f"❌ Error en pronóstico continuo: {type(e).__name__}: {e}", exc_info=True)
+        return 0
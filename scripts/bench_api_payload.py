@@ -0,0 +1,92 @@
+"""
+Benchmark de /api/predictions/future: formato por filas (un objeto por
+minuto, el actual) contra ?format=columnar, sin comprimir, con gzip y con
+brotli (si el paquete brotli está instalado).
+
+Mide bytes en la red (cuerpo de la respuesta) y tiempo de servidor por
+petición (consulta + serialización JSON + compresión, vía el test client de
+Flask), y por separado solo la serialización, sobre una DB temporal con un
+pronóstico sintético.
+
+Uso:
+    python scripts/bench_api_payload.py
+    python scripts/bench_api_payload.py --horas 24 --repeticiones 50
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+import database  # noqa: E402
+import http_compression  # noqa: E402
+from app import app  # noqa: E402
+
+
+def pronostico_sintetico(horas):
+    n = horas * 60
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2025-01-01 00:01', periods=n, freq='min'),
+        'temperatura_predicha': 15 + 5 * np.sin(np.arange(n) / 120) + np.random.default_rng(0).normal(0, 0.05, n),
+    })
+
+
+def medir(func, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        func()
+        tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filas vs columnar, sin comprimir / gzip / brotli")
+    parser.add_argument('--horas', type=int, default=24)
+    parser.add_argument('--repeticiones', type=int, default=30)
+    args = parser.parse_args()
+
+    database.DB_FOLDER = tempfile.mkdtemp(prefix='bench_api_')
+    database.DB_PATH = os.path.join(database.DB_FOLDER, 'bench.db')
+    database.init_database()
+    # Solo temperatura, como el modelo simple: humedad/presión/confidence van como null
+    database.save_predictions(pronostico_sintetico(args.horas), model_version='bench', source='bench')
+    minutos = args.horas * 60
+
+    formatos = {
+        'filas': (f'/api/predictions/future?limit={minutos}',
+                  lambda: database.get_future_predictions(limit=minutos)),
+        'columnar': (f'/api/predictions/future?limit={minutos}&format=columnar',
+                     lambda: database.get_future_predictions_columnar(limit=minutos)),
+    }
+    codificaciones = ['identity'] + http_compression.codificaciones()
+    cliente = app.test_client()
+
+    print(f"Pronóstico de {args.horas} h ({minutos} minutos), mediana de {args.repeticiones} repeticiones\n")
+    print(f"{'formato':<10} {'encoding':<9} {'bytes':>9} {'vs filas':>9} {'petición ms':>12} {'serializar ms':>14}")
+    print("-" * 68)
+    base = None
+    for formato, (url, leer) in formatos.items():
+        datos = leer()
+        serializar = medir(lambda: json.dumps(datos), args.repeticiones)
+        for codificacion in codificaciones:
+            cabeceras = {'Accept-Encoding': codificacion}
+            respuesta = cliente.get(url, headers=cabeceras)
+            assert respuesta.status_code == 200, respuesta.status_code
+            assert respuesta.headers.get('Content-Encoding', 'identity') == codificacion
+            n_bytes = len(respuesta.get_data())
+            base = base or n_bytes
+            peticion = medir(lambda: cliente.get(url, headers=cabeceras).get_data(), args.repeticiones)
+            print(f"{formato:<10} {codificacion:<9} {n_bytes:>9,} {n_bytes / base:>8.1%} "
+                  f"{peticion:>12.2f} {serializar:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
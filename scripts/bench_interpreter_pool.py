@@ -0,0 +1,66 @@
+"""
+Benchmark del pool de intérpretes TFLite: pronósticos por segundo con 1-4
+pronósticos concurrentes, para varias combinaciones de size × num_threads.
+
+Cada pronóstico simula run_prediction: un préstamo del pool y N invokes
+secuenciales (360 = 6 horas por minuto).
+
+Uso:
+    python scripts/bench_interpreter_pool.py
+    python scripts/bench_interpreter_pool.py --pasos 60 --configs 1x4 2x2 4x1
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+import interpreter_pool  # noqa: E402
+
+DEFAULT_MODEL = BASE_DIR / "modelos" / "modelo stefano" / "modelo_simple_tflite.tflite"
+
+
+def pronostico(pool, pasos):
+    with pool.lease() as interp:
+        shape = interp.input_details[0]['shape']
+        X = np.zeros(shape, dtype=np.float32)
+        for _ in range(pasos):
+            y = interp.predict(X)
+            X[0, 0] = y[0][0]  # dependencia secuencial como en el pronóstico real
+
+
+def medir(pool, concurrentes, pasos, rondas):
+    with ThreadPoolExecutor(max_workers=concurrentes) as executor:
+        inicio = time.perf_counter()
+        for _ in range(rondas):
+            list(executor.map(lambda _: pronostico(pool, pasos), range(concurrentes)))
+        total = time.perf_counter() - inicio
+    return concurrentes * rondas / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput del pool de intérpretes TFLite")
+    parser.add_argument('--modelo', type=Path, default=DEFAULT_MODEL)
+    parser.add_argument('--pasos', type=int, default=360, help='Invokes por pronóstico')
+    parser.add_argument('--rondas', type=int, default=3)
+    parser.add_argument('--configs', nargs='+', default=['1x1', '1x4', '2x2', '4x1'],
+                        help='Combinaciones size x num_threads')
+    args = parser.parse_args()
+
+    print(f"Modelo: {args.modelo.name} | {args.pasos} invokes por pronóstico\n")
+    print(f"{'pool':<8} " + " ".join(f"{f'{c} conc.':>12}" for c in range(1, 5)) + "   (pronósticos/s)")
+    print("-" * 62)
+    for config in args.configs:
+        size, threads = (int(v) for v in config.split('x'))
+        pool = interpreter_pool.InterpreterPool(args.modelo, size=size, num_threads=threads)
+        pronostico(pool, 10)  # calentamiento
+        resultados = [medir(pool, c, args.pasos, args.rondas) for c in range(1, 5)]
+        print(f"{config:<8} " + " ".join(f"{r:>12.2f}" for r in resultados))
+
+
+if __name__ == '__main__':
+    main()
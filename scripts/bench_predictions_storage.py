@@ -0,0 +1,130 @@
+"""
+Benchmark del almacenamiento de pronósticos: filas por minuto (esquema
+anterior, una fila de predictions por minuto) contra corrida empaquetada
+(una fila de forecast_runs con BLOBs float32).
+
+Mide escritura de una corrida, tamaño en disco tras N corridas y latencia de
+lectura completa (dicts por minuto), de un tramo (?limit=60) y, para el
+esquema empaquetado, de los arrays sin expandir; sobre una DB temporal.
+
+Uso:
+    python scripts/bench_predictions_storage.py
+    python scripts/bench_predictions_storage.py --horas 24 --corridas 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+import database  # noqa: E402
+
+
+def pronostico_sintetico(horas):
+    n = horas * 60
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2025-01-01 00:01', periods=n, freq='min'),
+        'temperatura_predicha': 15 + 5 * np.sin(np.arange(n) / 120),
+        'humedad_predicha': 60 + 10 * np.cos(np.arange(n) / 90),
+        'presion_predicha': np.full(n, 955.0),
+    })
+
+
+def guardar_filas(df, run_id):
+    """Escritura del esquema anterior: una fila por minuto"""
+    rows = [
+        (t.strftime('%Y-%m-%d %H:%M:%S'), float(tp), float(hp), float(pp), None, 'bench', run_id)
+        for t, tp, hp, pp in zip(df['timestamp'], df['temperatura_predicha'], df['humedad_predicha'], df['presion_predicha'])
+    ]
+    conn = database.get_db_connection()
+    conn.executemany('''
+        INSERT INTO predictions
+        (prediction_time, temperatura_pred, humedad_pred, presion_pred, confidence, model_version, run_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+    conn.close()
+
+
+def leer_filas(run_id, limit=None):
+    """Lectura del esquema anterior: filas -> sqlite3.Row -> dicts"""
+    conn = database.get_db_connection()
+    rows = conn.execute('''
+        SELECT prediction_time, temperatura_pred, humedad_pred, presion_pred, confidence, model_version
+        FROM predictions WHERE run_id = ? ORDER BY prediction_time ASC LIMIT ?
+    ''', (run_id, limit or -1)).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def tamano_db():
+    conn = database.get_db_connection()
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.close()
+    return os.path.getsize(database.DB_PATH)
+
+
+def medir(func, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        func()
+        tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filas por minuto vs corrida empaquetada")
+    parser.add_argument('--horas', type=int, default=6)
+    parser.add_argument('--corridas', type=int, default=20, help='Corridas escritas para medir tamaño')
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    df = pronostico_sintetico(args.horas)
+    resultados = {}
+    for esquema in ('filas', 'empaquetado'):
+        database.DB_FOLDER = tempfile.mkdtemp(prefix='bench_pred_')
+        database.DB_PATH = os.path.join(database.DB_FOLDER, 'bench.db')
+        database.init_database()
+        database.KEEP_RUNS = args.corridas  # sin poda durante la medición
+        base = tamano_db()
+
+        if esquema == 'filas':
+            contador = iter(range(1, 10**9))
+            escribir = lambda: guardar_filas(df, next(contador))
+            leer = lambda: leer_filas(1)
+            leer_tramo = lambda: leer_filas(1, limit=60)
+            leer_arrays = None
+        else:
+            escribir = lambda: database.save_predictions(df, model_version='bench', source='bench')
+            leer = lambda: database.get_future_predictions()
+            leer_tramo = lambda: database.get_future_predictions(limit=60)
+            leer_arrays = lambda: database.get_forecast_arrays()
+
+        for _ in range(args.corridas):
+            escribir()
+        resultados[esquema] = {
+            'escritura_ms': medir(escribir, args.repeticiones),
+            'kb_por_corrida': (tamano_db() - base) / 1024 / (args.corridas + args.repeticiones),
+            'lectura_ms': medir(leer, args.repeticiones),
+            'tramo_60_ms': medir(leer_tramo, args.repeticiones),
+            'arrays_ms': medir(leer_arrays, args.repeticiones) if leer_arrays else None,
+        }
+
+    print(f"Pronóstico de {args.horas} h ({args.horas * 60} minutos), mediana de {args.repeticiones} repeticiones\n")
+    print(f"{'esquema':<12} {'escritura ms':>13} {'KB/corrida':>11} {'lectura ms':>11} {'limit=60 ms':>12} {'arrays ms':>10}")
+    print("-" * 74)
+    for esquema, r in resultados.items():
+        arrays = f"{r['arrays_ms']:>10.2f}" if r['arrays_ms'] is not None else f"{'-':>10}"
+        print(f"{esquema:<12} {r['escritura_ms']:>13.2f} {r['kb_por_corrida']:>11.1f} "
+              f"{r['lectura_ms']:>11.2f} {r['tramo_60_ms']:>12.2f} {arrays}")
+
+
+if __name__ == '__main__':
+    main()
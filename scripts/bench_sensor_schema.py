@@ -0,0 +1,165 @@
+"""
+Benchmark del esquema de sensor_data: anterior (id AUTOINCREMENT + timestamp
+TEXT + índice secundario) contra el actual (PRIMARY KEY (source, epoch),
+WITHOUT ROWID, con índice por epoch; una sola fuente).
+
+Mide inserción (filas/s en lotes como los de la sincronización), MAX del
+último minuto, últimas N lecturas, escaneos de rango de 1 y 7 días (con el
+instante formateado como texto, como lo devuelve la API, y crudo) y tamaño en
+disco, sobre DBs temporales con el mismo historial sintético.
+
+Uso:
+    python scripts/bench_sensor_schema.py
+    python scripts/bench_sensor_schema.py --dias 365 --lote 60
+"""
+import argparse
+import calendar
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+import database  # noqa: E402
+
+LEGACY_SCHEMA = [
+    '''CREATE TABLE sensor_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME NOT NULL,
+        temperatura REAL NOT NULL,
+        humedad REAL NOT NULL,
+        presion REAL
+    )''',
+    'CREATE INDEX idx_sensor_timestamp ON sensor_data(timestamp)',
+]
+
+INICIO = datetime(2024, 1, 1)
+
+
+def minutos(n):
+    for i in range(n):
+        t = INICIO + timedelta(minutes=i)
+        yield t, 15 + random.random() * 10, 40 + random.random() * 40, 950 + random.random() * 10
+
+
+class Legacy:
+    nombre = 'anterior'
+
+    def crear(self, conn):
+        for q in LEGACY_SCHEMA:
+            conn.execute(q)
+
+    def insertar(self, conn, filas):
+        conn.executemany('INSERT INTO sensor_data (timestamp, temperatura, humedad, presion) VALUES (?, ?, ?, ?)',
+                         [(t.strftime('%Y-%m-%d %H:%M:%S'), a, b, c) for t, a, b, c in filas])
+
+    def maximo(self, conn):
+        return conn.execute('SELECT MAX(timestamp) FROM sensor_data').fetchone()
+
+    def ultimas(self, conn, n):
+        return conn.execute('SELECT timestamp, temperatura, humedad, presion FROM sensor_data '
+                            'ORDER BY timestamp DESC LIMIT ?', (n,)).fetchall()
+
+    def rango(self, conn, desde, hasta):
+        return conn.execute('SELECT timestamp, temperatura, humedad, presion FROM sensor_data '
+                            'WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp',
+                            (desde.strftime('%Y-%m-%d %H:%M:%S'), hasta.strftime('%Y-%m-%d %H:%M:%S'))).fetchall()
+
+    rango_crudo = rango  # el texto ya es el valor almacenado
+
+
+class Epoch:
+    nombre = 'epoch'
+
+    def crear(self, conn):
+        conn.execute(database.SENSOR_DATA_SCHEMA.format(table='sensor_data'))
+        conn.execute(database.SENSOR_EPOCH_INDEX_SQL)
+
+    def insertar(self, conn, filas):
+        conn.executemany('INSERT INTO sensor_data (epoch, temperatura, humedad, presion) VALUES (?, ?, ?, ?)',
+                         [(calendar.timegm(t.timetuple()), a, b, c) for t, a, b, c in filas])
+
+    def maximo(self, conn):
+        return conn.execute('SELECT MAX(epoch) FROM sensor_data').fetchone()
+
+    def ultimas(self, conn, n):
+        return conn.execute(f'SELECT {database.SENSOR_TIMESTAMP_SQL}, temperatura, humedad, presion '
+                            'FROM sensor_data ORDER BY epoch DESC LIMIT ?', (n,)).fetchall()
+
+    def rango(self, conn, desde, hasta):
+        return conn.execute(f'SELECT {database.SENSOR_TIMESTAMP_SQL}, temperatura, humedad, presion '
+                            'FROM sensor_data WHERE epoch >= ? AND epoch < ? ORDER BY epoch',
+                            (calendar.timegm(desde.timetuple()), calendar.timegm(hasta.timetuple()))).fetchall()
+
+    def rango_crudo(self, conn, desde, hasta):
+        """Sin formatear el instante: lo que usan predictor y backtests"""
+        return conn.execute('SELECT epoch, temperatura, humedad, presion FROM sensor_data '
+                            'WHERE epoch >= ? AND epoch < ? ORDER BY epoch',
+                            (calendar.timegm(desde.timetuple()), calendar.timegm(hasta.timetuple()))).fetchall()
+
+
+def medir(func, repeticiones=20):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        func()
+        tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2] * 1000
+
+
+def correr(esquema, n, lote):
+    path = os.path.join(tempfile.mkdtemp(prefix='bench_sensor_'), 'bench.db')
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    esquema.crear(conn)
+
+    filas = list(minutos(n))
+    inicio = time.perf_counter()
+    for i in range(0, n, lote):
+        esquema.insertar(conn, filas[i:i + lote])
+        conn.commit()
+    filas_s = n / (time.perf_counter() - inicio)
+
+    fin = INICIO + timedelta(minutes=n)
+    dia = fin - timedelta(days=1)
+    semana = fin - timedelta(days=7)
+    resultado = {
+        'insert_filas_s': filas_s,
+        'max_ms': medir(lambda: esquema.maximo(conn)),
+        'ultimas_ms': medir(lambda: esquema.ultimas(conn, 1440)),
+        'rango_1d_ms': medir(lambda: esquema.rango(conn, dia, fin)),
+        'rango_7d_ms': medir(lambda: esquema.rango(conn, semana, fin), 5),
+        'crudo_7d_ms': medir(lambda: esquema.rango_crudo(conn, semana, fin), 5),
+    }
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.close()
+    resultado['mb'] = os.path.getsize(path) / 1024 / 1024
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="sensor_data: timestamp TEXT vs epoch WITHOUT ROWID")
+    parser.add_argument('--dias', type=int, default=90, help='Historial sintético (un minuto por fila)')
+    parser.add_argument('--lote', type=int, default=60, help='Filas por transacción al insertar')
+    args = parser.parse_args()
+
+    random.seed(0)
+    n = args.dias * 1440
+    print(f"Historial: {n:,} minutos ({args.dias} días), inserción en lotes de {args.lote}\n")
+    print(f"{'esquema':<10} {'insert filas/s':>15} {'MAX ms':>8} {'últ.1440 ms':>12} "
+          f"{'1 día ms':>9} {'7 días ms':>10} {'7d crudo ms':>12} {'MB':>7}")
+    print("-" * 90)
+    for esquema in (Legacy(), Epoch()):
+        r = correr(esquema, n, args.lote)
+        print(f"{esquema.nombre:<10} {r['insert_filas_s']:>15,.0f} {r['max_ms']:>8.3f} {r['ultimas_ms']:>12.2f} "
+              f"{r['rango_1d_ms']:>9.2f} {r['rango_7d_ms']:>10.2f} {r['crudo_7d_ms']:>12.2f} {r['mb']:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
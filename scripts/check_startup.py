@@ -0,0 +1,71 @@
+"""
+Benchmark de arranque de app.py con `python -X importtime`.
+
+Falla (exit 1) si importar app.py supera el presupuesto de tiempo o si arrastra
+módulos pesados que deben importarse solo al usarse (pandas, TF, sklearn...).
+
+Uso:
+    python scripts/check_startup.py                 # presupuesto por defecto
+    python scripts/check_startup.py --budget-ms 800
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_BUDGET_MS = 1500  # Raspberry Pi; en PC importar app.py toma bastante menos
+FORBIDDEN_MODULES = ['pandas', 'numpy', 'tensorflow', 'tflite_runtime', 'sklearn', 'joblib', 'pytz', 'matplotlib']
+
+
+def measure_import(module='app'):
+    """Importa el módulo en un proceso nuevo y devuelve [(modulo, self_us, cumulative_us)]"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Error importando {module}:\n{proc.stderr}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de importación de app.py")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--top', type=int, default=10, help='Mostrar los N imports más lentos')
+    args = parser.parse_args()
+
+    rows = measure_import('app')
+    total_ms = next(cum for name, _, cum in rows if name == 'app') / 1000
+    imported = {name.split('.')[0] for name, _, _ in rows}
+    heavy = [m for m in FORBIDDEN_MODULES if m in imported]
+
+    print(f"import app: {total_ms:.1f} ms (presupuesto {args.budget_ms:.0f} ms)")
+    print(f"\nTop {args.top} imports (acumulado):")
+    top_level = [r for r in rows if '.' not in r[0].strip()]
+    for name, _, cum in sorted(top_level, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"  {cum / 1000:>8.1f} ms  {name}")
+
+    ok = True
+    if heavy:
+        print(f"\n❌ Módulos pesados importados al arrancar: {heavy}")
+        ok = False
+    if total_ms > args.budget_ms:
+        print(f"\n❌ Arranque sobre presupuesto: {total_ms:.1f} ms > {args.budget_ms:.0f} ms")
+        ok = False
+    if ok:
+        print("\n✅ Arranque dentro del presupuesto")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""
+Sincronización de muestras -> data/clima.db como proceso aparte.
+
+En producción la API corre en varios workers WSGI (ver wsgi.py) y ninguno
+sincroniza: este proceso es el único que escribe la ingesta (muestras por
+minuto, pronóstico continuo y mantenimiento de la DB). Un lock de archivo
+(data/sync.lock) garantiza un solo sincronizador activo entre procesos; lo
+libera el sistema operativo si el proceso muere.
+
+En desarrollo (python app.py) el mismo lock lo toma el hilo de sincronización
+de la app, así el reloader de Flask o una segunda instancia no duplican la
+sincronización.
+
+Uso:
+    python sync_worker.py                 # demonio: sincroniza cada SYNC_INTERVAL s
+    python sync_worker.py --una-vez       # una sola pasada (cron, pruebas)
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import database
+
+logger = logging.getLogger('sync_worker')
+
+# Configuración de sincronización (sin variables de entorno, como app.py)
+BASE_DIR = Path(__file__).resolve().parent
+CSV_PATH = BASE_DIR / 'Codigos_arduinos' / 'data' / 'sensor_data.csv'
+SAMPLES_DIR = BASE_DIR / 'Codigos_arduinos' / 'data' / 'samples'  # almacén columnar por día
+LOCK_PATH = BASE_DIR / 'data' / 'sync.lock'
+SYNC_INTERVAL = 60  # Sincronizar cada 60 segundos
+ROLLING_FORECAST = True  # Recalcular el pronóstico con cada minuto nuevo sincronizado
+DB_MAINTENANCE = True  # Retención y vacuum incremental periódicos (ver maintenance.py)
+
+
+class SyncBusy(RuntimeError):
+    """Otro proceso tiene el lock de sincronización"""
+
+
+class SyncLock:
+    """Lock de archivo exclusivo y no bloqueante (flock en Linux, msvcrt en Windows)"""
+
+    def __init__(self, path=LOCK_PATH):
+        self.path = Path(path)
+        self._file = None
+
+    @property
+    def held(self):
+        """True si este proceso es el sincronizador"""
+        return self._file is not None
+
+    def acquire(self):
+        """Intenta tomar el lock sin esperar; devuelve True si quedó tomado por este proceso"""
+        if self._file is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(self.path, 'a+')
+        try:
+            if sys.platform.startswith('win'):
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        # pid del dueño, solo informativo (ver holder)
+        f.seek(0)
+        f.truncate()
+        f.write(f"{os.getpid()}\n")
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if sys.platform.startswith('win'):
+                import msvcrt
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def holder(self):
+        """pid del último proceso que tomó el lock (None si no se sabe)"""
+        try:
+            return int(self.path.read_text().strip() or 0) or None
+        except (OSError, ValueError):
+            return None
+
+
+sync_lock = SyncLock()
+_sync_mutex = threading.Lock()  # dentro del proceso: hilo de sincronización vs. /api/sync/force
+
+
+def run_exclusive(func):
+    """
+    Ejecuta 'func' (una escritura de ingesta) como sincronizador. Si este
+    proceso no tiene el lock lo toma solo para esta llamada; si lo tiene otro
+    proceso lanza SyncBusy.
+    """
+    with _sync_mutex:
+        temporal = not sync_lock.held
+        if temporal and not sync_lock.acquire():
+            raise SyncBusy(f"La sincronización está a cargo de otro proceso (pid {sync_lock.holder()})")
+        try:
+            return func()
+        finally:
+            if temporal:
+                sync_lock.release()
+
+
+def samples_available():
+    """True si existe el almacén columnar o, en su defecto, el CSV antiguo"""
+    return (SAMPLES_DIR / 'manifest.json').exists() or CSV_PATH.exists()
+
+
+def sync_samples_once():
+    """
+    Una pasada de sincronización: usa el almacén columnar si existe, si no el
+    CSV antiguo. Devuelve minutos nuevos o actualizados.
+    """
+    def _sync():
+        if (SAMPLES_DIR / 'manifest.json').exists():
+            return database.load_store_and_aggregate_to_db(store_dir=str(SAMPLES_DIR))
+        return database.load_csv_and_aggregate_to_db(csv_path=str(CSV_PATH))
+
+    return run_exclusive(_sync)
+
+
+def sync_loop(should_run=lambda: True, interval=SYNC_INTERVAL):
+    """
+    Bucle de sincronización: cada 'interval' segundos revisa si hay datos
+    nuevos y, si los hay, actualiza el pronóstico continuo.
+    """
+    logger.info(f"🔄 Iniciando sincronización automática de {SAMPLES_DIR} cada {interval}s")
+
+    while should_run():
+        try:
+            if samples_available():
+                logger.info(f"📥 Sincronizando muestras a la base de datos...")
+                rows_added = sync_samples_once()
+                if rows_added > 0:
+                    logger.info(f"✅ Sincronización completada: {rows_added} minutos nuevos o actualizados")
+                    if ROLLING_FORECAST:
+                        # Import diferido; la inferencia corre en el proceso de inference_worker
+                        import rolling_forecast
+                        rolling_forecast.on_new_data()
+                else:
+                    logger.debug(f"ℹ️  Sin datos nuevos para sincronizar")
+            else:
+                logger.warning(f"⚠️  Sin muestras: no existe {SAMPLES_DIR.absolute()} ni {CSV_PATH.absolute()}")
+        except FileNotFoundError as e:
+            logger.error(f"❌ Error: Archivo no encontrado - {e}")
+        except ValueError as e:
+            logger.error(f"❌ Error de valor en CSV: {e}")
+        except Exception as e:
+            logger.error(f"❌ Error inesperado en sincronización automática: {type(e).__name__}: {e}", exc_info=True)
+
+        # Esperar antes de la próxima sincronización
+        time.sleep(interval)
+
+
+def maintenance_loop(should_run=lambda: True):
+    """
+    Hilo de mantenimiento: una pasada de maintenance.py cada
+    MAINTENANCE_INTERVAL mientras should_run() (es decir, mientras este
+    proceso sea el sincronizador: el mantenimiento también borra de sensor_data).
+    """
+    import maintenance
+    while should_run():
+        try:
+            maintenance.run_maintenance()
+        except Exception as e:
+            logger.error(f"❌ Error en mantenimiento de la DB: {type(e).__name__}: {e}", exc_info=True)
+        time.sleep(maintenance.MAINTENANCE_INTERVAL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincronizador de muestras a clima.db (único escritor)")
+    parser.add_argument('--una-vez', action='store_true', help='Una sola pasada y salir')
+    parser.add_argument('--intervalo', type=float, default=SYNC_INTERVAL, help='Segundos entre pasadas')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+
+    database.init_database()
+    if not sync_lock.acquire():
+        print(f"❌ Ya hay un sincronizador activo (pid {sync_lock.holder()}, lock {LOCK_PATH})")
+        sys.exit(1)
+
+    try:
+        if args.una_vez:
+            rows_added = sync_samples_once() if samples_available() else 0
+            print(f"✅ {rows_added} minutos nuevos o actualizados")
+            return
+        if DB_MAINTENANCE:
+            threading.Thread(target=maintenance_loop, daemon=True).start()
+            logger.info("🧹 Mantenimiento periódico de la DB iniciado")
+        sync_loop(interval=args.intervalo)
+    except KeyboardInterrupt:
+        logger.info("⚠️  Sincronizador interrumpido por el usuario (Ctrl+C)")
+    finally:
+        sync_lock.release()
+
+
+if __name__ == '__main__':
+    main()
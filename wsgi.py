@@ -0,0 +1,17 @@
+"""
+Punto de entrada WSGI para producción, con varios workers:
+
+    gunicorn -w 3 -b 0.0.0.0:5000 wsgi:application      # Linux / Raspberry Pi
+    waitress-serve --port=5000 wsgi:application          # Windows
+
+Los workers solo sirven la API; la sincronización, el pronóstico continuo y
+el mantenimiento de la DB corren aparte en un único proceso:
+
+    python sync_worker.py
+
+La inferencia corre en un único proceso compartido por todos los workers
+(inference_worker.py, lo lanza el primero que pronostica).
+"""
+from app import create_app
+
+application = create_app()